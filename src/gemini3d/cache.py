@@ -0,0 +1,172 @@
+"""
+opt-in, process-wide cache of simulation grids
+
+Grids can be several GB, and are read again and again by plotting, comparison and
+frame reading functions. When enabled, read.grid returns cached grids for files that
+have not changed on disk. Cached arrays are read-only, so that one consumer cannot
+silently modify the grid seen by another.
+
+Example
+-------
+
+    gemini3d.cache.enable_grid_cache(max_bytes=8 * 2**30)
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from collections import OrderedDict
+import typing as T
+import os
+import threading
+
+import numpy as np
+
+__all__ = ["GridCache", "enable_grid_cache", "disable_grid_cache", "grid_cache"]
+
+MAX_BYTES = 2 * 2**30
+
+_GRID_CACHE: GridCache | None = None
+
+
+class GridCache:
+    """
+    least-recently-used cache of grid dicts, bounded by total array bytes
+
+    Entries are keyed by resolved filename, file modification time and size,
+    and the requested variables, so a rewritten grid file is read again.
+
+    Parameters
+    ----------
+    max_bytes: int
+        total size of cached arrays, beyond which least recently used grids are evicted
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[dict[str, T.Any], int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        file: Path,
+        loader: T.Callable[[], dict[str, T.Any]],
+        *,
+        var: set[str] | None = None,
+        kind: str = "grid",
+    ) -> dict[str, T.Any]:
+        """
+        get grid from cache, calling loader() to read it on a miss
+
+        Parameters
+        ----------
+        file: pathlib.Path
+            grid file
+        loader: callable
+            reads the grid from file
+        var: set of str, optional
+            variables requested (part of the key)
+        kind: str
+            distinguishes different readers of the same file (part of the key)
+
+        Returns
+        -------
+        xg: dict
+            grid, a new dict on each call whose arrays are read-only and shared
+        """
+
+        key = _key(file, var, kind)
+
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(hit[0])
+            self.misses += 1
+
+        xg = loader()
+
+        nbytes = 0
+        for v in xg.values():
+            if isinstance(v, np.ndarray):
+                v.setflags(write=False)
+                nbytes += v.nbytes
+
+        with self._lock:
+            if nbytes <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (xg, nbytes)
+                self.nbytes += nbytes
+                self._evict()
+
+        return dict(xg)
+
+    def resize(self, max_bytes: int):
+        """change byte budget, evicting as needed"""
+
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._entries:
+            _, (_, n) = self._entries.popitem(last=False)
+            self.nbytes -= n
+
+
+def _key(file: Path, var: set[str] | None, kind: str) -> tuple:
+    file = Path(file).expanduser().resolve()
+    st = os.stat(file)
+
+    return (kind, file, st.st_mtime_ns, st.st_size, frozenset(var) if var else None)
+
+
+def enable_grid_cache(max_bytes: int = MAX_BYTES) -> GridCache:
+    """
+    enable the process-wide grid cache
+
+    Parameters
+    ----------
+    max_bytes: int
+        byte budget of cached grid arrays
+
+    Returns
+    -------
+    cache: GridCache
+        the grid cache
+    """
+
+    global _GRID_CACHE
+
+    if _GRID_CACHE is None:
+        _GRID_CACHE = GridCache(max_bytes)
+    else:
+        _GRID_CACHE.resize(max_bytes)
+
+    return _GRID_CACHE
+
+
+def disable_grid_cache():
+    """disable and empty the process-wide grid cache"""
+
+    global _GRID_CACHE
+
+    if _GRID_CACHE is not None:
+        _GRID_CACHE.clear()
+    _GRID_CACHE = None
+
+
+def grid_cache() -> GridCache | None:
+    """the process-wide grid cache, or None if not enabled"""
+
+    return _GRID_CACHE
@@ -34,12 +34,14 @@ def compare_output(
     if tol is None:
         tol = load_tol()
 
-    for i, t in enumerate(params["time"]):
+    # read the next frames while comparing this one
+    new_frames = read.iter_frames(new_dir, times=params["time"])
+    ref_frames = read.iter_frames(ref_dir, times=params["time"])
+
+    for i, (t, A, B) in enumerate(zip(params["time"], new_frames, ref_frames)):
         st = f"UTsec {t}"
-        A = read.frame(new_dir, t)
         if not A:
             raise FileNotFoundError(f"{new_dir} does not appear to contain data at {t}")
-        B = read.frame(ref_dir, t)
 
         names = ["ne", "v1", "v2", "v3", "Ti", "Te", "J1", "J2", "J3"]
         itols = ["N", "V", "V", "V", "T", "T", "J", "J", "J"]
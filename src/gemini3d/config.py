@@ -194,6 +194,7 @@ def expand_envvar(P: dict[str, T.Any]) -> dict[str, T.Any]:
         "precdir",
         "sourcedir",
         "aurmap_dir",
+        "grid_store",
     }:
         if k in P:
             if "@" in P[k]:
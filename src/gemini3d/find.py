@@ -9,9 +9,7 @@ import shutil
 import os
 import subprocess
 
-import numpy as np
-
-from .utils import filename2datetime
+from . import frame_index
 
 EXE_PATHS = [
     ".",
@@ -23,6 +21,8 @@ EXE_PATHS = [
     "build/Release",
 ]
 
+MAX_OFFSET = timedelta(seconds=1)  # 10 ms precision, allow extra accumulated tolerance
+
 
 def config(path: Path) -> Path:
     """given a path or config filename, return the full path to config file"""
@@ -120,6 +120,9 @@ def msis_exe(root: Path = None) -> Path | None:
 def frame(simdir: Path, time: datetime) -> Path:
     """
     find frame closest to time
+
+    Uses the persistent per-directory frame index, so repeated calls are cheap
+    even for directories with many thousands of frames.
     """
 
     suffix = ".h5"
@@ -132,25 +135,19 @@ def frame(simdir: Path, time: datetime) -> Path:
         + f"{time.microsecond:06d}"
     )
 
-    fn = simdir / (stem + suffix)
-    if fn.is_file():
-        return fn
+    if not simdir.is_dir():
+        raise FileNotFoundError(f"{stem}{suffix} not found in {simdir}")
 
-    # %% WORKAROUND for real32 file ticks. This will be removed when datetime-fortran is implemented
-    MAX_OFFSET = timedelta(seconds=1)  # 10 ms precision, allow extra accumulated tolerance
-    pat = time.strftime("%Y%m%d") + "_*"
+    index = frame_index.get(simdir, suffix)
 
-    file_times = []
-    files = list(simdir.glob(pat + suffix))
-    for fn in files:
-        file_times.append(filename2datetime(fn))
-
-    if file_times:
-        afile_times = np.array(file_times)
-        i = abs(afile_times - time).argmin()  # type: ignore
+    fn = index.exact(stem + suffix)
+    if fn is not None:
+        return fn
 
-        if abs(afile_times[i] - time) <= MAX_OFFSET:
-            return files[i]
+    # %% WORKAROUND for real32 file ticks. This will be removed when datetime-fortran is implemented
+    fn = index.nearest(time, tol=MAX_OFFSET)
+    if fn is not None:
+        return fn
 
     raise FileNotFoundError(f"{stem}{suffix} not found in {simdir}")
 
@@ -0,0 +1,263 @@
+"""
+time -> filename index of Gemini3D output (and input) frame directories
+
+Gemini3D writes one HDF5 file per time step, named like 20130220_18000.000000.h5.
+Listing a directory of tens of thousands of such files and parsing each name is
+expensive, so we do it once per directory and keep a sorted time array that is
+searched by bisection.
+
+The index is kept in memory for the life of the process, and also persisted as a
+small JSON sidecar file in the directory so that later sessions start warm.
+The index is revalidated by the directory modification time: when new frames appear,
+only the new filenames are parsed.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timedelta
+import bisect
+import json
+import logging
+import os
+import threading
+import time as _time
+
+from .utils import filename2datetime
+
+SIDECAR = ".gemini3d_frames.json"
+SIDECAR_VERSION = 1
+
+# directories modified within this many seconds are always rescanned,
+# since some filesystems have coarse (1 second or worse) mtime granularity.
+RACY_SECONDS = 2.0
+
+_INDEX: dict[tuple[Path, str], FrameIndex] = {}
+_LOCK = threading.Lock()
+
+
+class FrameIndex:
+    """
+    sorted time -> file index of one directory
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        directory containing frame files
+    suffix: str
+        frame file suffix
+    """
+
+    def __init__(self, path: Path, suffix: str = ".h5"):
+        self.path = Path(path).expanduser()
+        self.suffix = suffix
+        self.times: list[datetime] = []
+        self.names: list[str] = []
+        self._mtime_ns: int | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def refresh(self) -> bool:
+        """
+        bring the index up to date with the directory contents
+
+        Returns
+        -------
+        changed: bool
+            True if the directory was (re)scanned
+        """
+
+        with self._lock:
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError):
+                raise FileNotFoundError(f"{self.path} is not a directory")
+
+            racy = _time.time() - mtime_ns / 1e9 < RACY_SECONDS
+
+            if self._mtime_ns is None:
+                self._load_sidecar()
+
+            if mtime_ns == self._mtime_ns and not racy:
+                return False
+
+            self._scan()
+            self._mtime_ns = mtime_ns
+            self._save_sidecar()
+
+            return True
+
+    def _scan(self) -> None:
+        """
+        list the directory, parsing only filenames not already in the index
+        """
+
+        known = dict(zip(self.names, self.times))
+
+        entries: dict[str, datetime] = {}
+        with os.scandir(self.path) as it:
+            for e in it:
+                name = e.name
+                if not name.endswith(self.suffix):
+                    continue
+                if name in known:
+                    entries[name] = known[name]
+                    continue
+                t = _parse(name)
+                if t is not None:
+                    entries[name] = t
+
+        order = sorted(entries, key=entries.__getitem__)
+        self.names = order
+        self.times = [entries[n] for n in order]
+
+    def _load_sidecar(self):
+        fn = self.path / SIDECAR
+        try:
+            meta = json.loads(fn.read_text())
+            if meta["version"] != SIDECAR_VERSION or meta["suffix"] != self.suffix:
+                return
+            names = meta["names"]
+            times = [datetime.fromisoformat(t) for t in meta["times"]]
+            mtime_ns = int(meta["mtime_ns"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+
+        self.names = names
+        self.times = times
+        self._mtime_ns = mtime_ns
+
+    def _save_sidecar(self):
+        """
+        Best effort: output directories may be read-only.
+        The sidecar is rewritten in place so that updating it does not itself change
+        the directory mtime once it exists.
+        """
+
+        fn = self.path / SIDECAR
+
+        meta = {
+            "version": SIDECAR_VERSION,
+            "suffix": self.suffix,
+            "mtime_ns": self._mtime_ns,
+            "names": self.names,
+            "times": [t.isoformat() for t in self.times],
+        }
+
+        try:
+            fn.write_text(json.dumps(meta))
+        except OSError as e:
+            logging.debug(f"could not write frame index {fn}: {e}")
+
+    def exact(self, name: str) -> Path | None:
+        """
+        look up a frame by filename
+        """
+
+        t = _parse(name)
+        if t is None:
+            return None
+
+        i = bisect.bisect_left(self.times, t)
+        if i < len(self.times) and self.names[i] == name:
+            return self.path / name
+
+        return None
+
+    def nearest(self, time: datetime, tol: timedelta | None = None) -> Path | None:
+        """
+        find the frame closest to time, within optional tolerance
+
+        Parameters
+        ----------
+        time: datetime.datetime
+            requested time
+        tol: datetime.timedelta, optional
+            maximum allowed offset
+
+        Returns
+        -------
+        path: pathlib.Path or None
+            frame file, or None if no frame is within tolerance
+        """
+
+        if not self.times:
+            return None
+
+        i = bisect.bisect_left(self.times, time)
+        cand = [j for j in (i - 1, i) if 0 <= j < len(self.times)]
+        j = min(cand, key=lambda k: abs(self.times[k] - time))
+
+        if tol is not None and abs(self.times[j] - time) > tol:
+            return None
+
+        return self.path / self.names[j]
+
+    def bracket(self, time: datetime) -> tuple[int, int]:
+        """
+        indices of the frames at or before, and at or after, time.
+        Either index is -1 if time is outside the indexed range.
+        """
+
+        i = bisect.bisect_left(self.times, time)
+        if i < len(self.times) and self.times[i] == time:
+            return i, i
+
+        lo = i - 1
+        hi = i if i < len(self.times) else -1
+
+        return lo, hi
+
+
+def get(path: Path, suffix: str = ".h5") -> FrameIndex:
+    """
+    get the up-to-date frame index for a directory, building it on first use
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        directory containing frame files
+    suffix: str
+        frame file suffix
+
+    Returns
+    -------
+    index: FrameIndex
+        index of the frames in this directory
+    """
+
+    path = Path(path).expanduser().resolve()
+    key = (path, suffix)
+
+    with _LOCK:
+        idx = _INDEX.get(key)
+        if idx is None:
+            idx = _INDEX[key] = FrameIndex(path, suffix)
+
+    idx.refresh()
+
+    return idx
+
+
+def clear():
+    """
+    forget all in-memory frame indices (sidecar files are left in place)
+    """
+
+    with _LOCK:
+        _INDEX.clear()
+
+
+def _parse(name: str) -> datetime | None:
+    """
+    parse Gemini3D frame filename to datetime, None if not a frame filename
+    """
+
+    if len(name) < 21 or name[8] != "_" or not name[:8].isdigit():
+        return None
+
+    try:
+        return filename2datetime(Path(name))
+    except ValueError:
+        return None
@@ -3,6 +3,7 @@ cartesian grid
 """
 
 from __future__ import annotations
+import functools
 import logging
 import typing as T
 
@@ -11,6 +12,7 @@ import numpy as np
 from .. import read
 from ..coord import geog2geomag, geomag2geog
 from .uniform import altitude_grid, grid1d
+from .compact import LazyField
 
 
 def cart3d(p: dict[str, T.Any]) -> dict[str, T.Any]:
@@ -120,39 +122,10 @@ def cart3d(p: dict[str, T.Any]) -> dict[str, T.Any]:
     phi = np.broadcast_to(phi[None, :, None], (lx1, phi.size, lx3))
     assert phi.shape == (lx1, lx2, lx3)
 
-    # %% COMPUTE THE GEOGRAPHIC COORDINATES OF EACH GRID POINT
-    glatgrid, glongrid = geomag2geog(theta, phi)
-
-    # %% COMPUTE ECEF CARTESIAN IN CASE THEY ARE NEEDED
-    xECEF = r * np.sin(theta) * np.cos(phi)
-    yECEF = r * np.sin(theta) * np.sin(phi)
-    zECEF = r * np.cos(theta)
-
-    # %% COMPUTE SPHERICAL ECEF UNIT VECTORS - CARTESIAN-ECEF COMPONENTS
-    er = np.empty((lx1, lx2, lx3, 3))
-    etheta = np.empty_like(er)
-    ephi = np.empty_like(er)
-
-    er[:, :, :, 0] = np.sin(theta) * np.cos(phi)
-    # xECEF-component of er
-    er[:, :, :, 1] = np.sin(theta) * np.sin(phi)
-    # yECEF
-    er[:, :, :, 2] = np.cos(theta)
-    # zECEF
-    etheta[:, :, :, 0] = np.cos(theta) * np.cos(phi)
-    etheta[:, :, :, 1] = np.cos(theta) * np.sin(phi)
-    etheta[:, :, :, 2] = -np.sin(theta)
-    ephi[:, :, :, 0] = -np.sin(phi)
-    ephi[:, :, :, 1] = np.cos(phi)
-    ephi[:, :, :, 2] = 0
-
-    # %% UEN UNIT VECTORS IN ECEF COMPONENTS
-    e1 = er
-    # up is the same direction as from ctr of earth
-    e2 = ephi
-    # e2 is same as ephi
-    e3 = -etheta
-    # etheta is positive south, e3 is pos. north
+    # theta varies only along x3 and phi only along x2: the geographic coordinates and unit
+    # vectors, which depend on both, are computed per x3 slab on access, see _field()
+    theta1 = theta[0, 0, :]
+    phi1 = phi[0, :, 0]
 
     # %% STORE RESULTS IN GRID DATA STRUCTURE
     xg = {
@@ -188,23 +161,12 @@ def cart3d(p: dict[str, T.Any]) -> dict[str, T.Any]:
     xg["dx3h"] = xg["x3i"][1:-1] - xg["x3i"][:-2]
     # MIDPOINT DIFFS
 
-    xg["h1"] = np.ones(lx)
-    xg["h2"] = np.ones(lx)
-    xg["h3"] = np.ones(lx)
-    xg["h1x1i"] = np.ones((lx[0] + 1, lx[1], lx[2]))
-    xg["h2x1i"] = np.ones((lx[0] + 1, lx[1], lx[2]))
-    xg["h3x1i"] = np.ones((lx[0] + 1, lx[1], lx[2]))
-    xg["h1x2i"] = np.ones((lx[0], lx[1] + 1, lx[2]))
-    xg["h2x2i"] = np.ones((lx[0], lx[1] + 1, lx[2]))
-    xg["h3x2i"] = np.ones((lx[0], lx[1] + 1, lx[2]))
-    xg["h1x3i"] = np.ones((lx[0], lx[1], lx[2] + 1))
-    xg["h2x3i"] = np.ones((lx[0], lx[1], lx[2] + 1))
-    xg["h3x3i"] = np.ones((lx[0], lx[1], lx[2] + 1))
-
-    # %% Cartesian, ECEF representation of curvilinar coordinates
-    xg["e1"] = e1
-    xg["e2"] = e2
-    xg["e3"] = e3
+    # Cartesian metric factors are all one
+    for i in (1, 2, 3):
+        xg[f"h{i}"] = np.broadcast_to(1.0, lx)
+        xg[f"h{i}x1i"] = np.broadcast_to(1.0, (lx[0] + 1, lx[1], lx[2]))
+        xg[f"h{i}x2i"] = np.broadcast_to(1.0, (lx[0], lx[1] + 1, lx[2]))
+        xg[f"h{i}x3i"] = np.broadcast_to(1.0, (lx[0], lx[1], lx[2] + 1))
 
     # %% ECEF spherical coordinates
     xg["r"] = r
@@ -213,34 +175,21 @@ def cart3d(p: dict[str, T.Any]) -> dict[str, T.Any]:
     # xg.rx1i=[]; xg.thetax1i=[];
     # xg.rx2i=[]; xg.thetax2i=[];
 
-    # %% These are cartesian representations of the ECEF, spherical unit vectors
-    xg["er"] = er
-    xg["etheta"] = etheta
-    xg["ephi"] = ephi
-
     xg["I"] = np.broadcast_to(p["Bincl"], (lx2, lx3))
 
-    # %% Cartesian ECEF coordinates
-    xg["x"] = xECEF
-    xg["z"] = zECEF
-    xg["y"] = yECEF
-    xg["alt"] = xg["r"] - Re
-    # since we need a 3D array use xg.r here...
+    xg["alt"] = np.broadcast_to(r[:, :1, :1] - Re, lx)
 
     xg["gx1"] = gz
-    xg["gx2"] = np.zeros(lx)
-    xg["gx3"] = np.zeros(lx)
+    xg["gx2"] = np.broadcast_to(0.0, lx)
+    xg["gx3"] = np.broadcast_to(0.0, lx)
 
     xg["Bmag"] = np.broadcast_to(-50000e-9, xg["lx"])
     # minus for northern hemisphere...
 
-    xg["glat"] = glatgrid
-    xg["glon"] = glongrid
-
     # xg['xp']=x; xg['zp']=z;
 
     # xg['inull']=[];
-    xg["nullpts"] = np.zeros(lx)
+    xg["nullpts"] = np.broadcast_to(0.0, lx)
 
     # %% TRIM DATA STRUCTURE TO BE THE SIZE FORTRAN EXPECTS
     # note: xgf is xg == True
@@ -293,8 +242,6 @@ def cart3d(p: dict[str, T.Any]) -> dict[str, T.Any]:
     xgf["gx2"] = xgf["gx2"][i1, i2, i3]
     xgf["gx3"] = xgf["gx3"][i1, i2, i3]
 
-    xgf["glat"] = xgf["glat"][i1, i2, i3]
-    xgf["glon"] = xgf["glon"][i1, i2, i3]
     xgf["alt"] = xgf["alt"][i1, i2, i3]
 
     xgf["Bmag"] = xgf["Bmag"][i1, i2, i3]
@@ -303,23 +250,51 @@ def cart3d(p: dict[str, T.Any]) -> dict[str, T.Any]:
 
     xgf["nullpts"] = xgf["nullpts"][i1, i2, i3]
 
-    xgf["e1"] = xgf["e1"][i1, i2, i3, :]
-    xgf["e2"] = xgf["e2"][i1, i2, i3, :]
-    xgf["e3"] = xgf["e3"][i1, i2, i3, :]
-
-    xgf["er"] = xgf["er"][i1, i2, i3, :]
-    xgf["etheta"] = xgf["etheta"][i1, i2, i3, :]
-    xgf["ephi"] = xgf["ephi"][i1, i2, i3, :]
-
     xgf["r"] = xgf["r"][i1, i2, i3]
     xgf["theta"] = xgf["theta"][i1, i2, i3]
     xgf["phi"] = xgf["phi"][i1, i2, i3]
 
-    xgf["x"] = xgf["x"][i1, i2, i3]
-    xgf["y"] = xgf["y"][i1, i2, i3]
-    xgf["z"] = xgf["z"][i1, i2, i3]
+    # %% fields of theta and phi, computed per x3 slab on access
+    # e1, e2, e3 are the UEN unit vectors in ECEF components and er, etheta, ephi the
+    # ECEF spherical unit vectors; x, y, z are the ECEF Cartesian coordinates
+    lxf = tuple(xgf["lx"])
+    args = (theta1[i3], phi1[i2], xgf["r"][:, 0, 0])
+    for k in ("glat", "glon", "x", "y", "z"):
+        xgf[k] = LazyField(functools.partial(_field, k, *args), lxf)
+    for k in ("e1", "e2", "e3", "er", "etheta", "ephi"):
+        xgf[k] = LazyField(functools.partial(_field, k, *args), (*lxf, 3))
 
     xgf["glonctr"] = p["glon"]
     xgf["glatctr"] = p["glat"]
 
     return xgf
+
+
+def _field(name: str, theta: np.ndarray, phi: np.ndarray, r: np.ndarray, s: slice) -> np.ndarray:
+    """
+    grid field for x3 range s, from theta (x3), phi (x2) and r (x1)
+
+    Fields other than x, y, z do not depend on x1 and are broadcast along it.
+    """
+
+    th, ph = np.broadcast_arrays(theta[None, s], phi[:, None])
+
+    if name in {"glat", "glon"}:
+        A = geomag2geog(th, ph)[name == "glon"]
+    elif name in {"x", "y", "z"}:
+        return r[:, None, None] * _field("er", theta, phi, r, s)[0, ..., "xyz".index(name)]
+    else:
+        if name in {"er", "e1"}:
+            c = (np.sin(th) * np.cos(ph), np.sin(th) * np.sin(ph), np.cos(th))
+        elif name == "etheta":
+            c = (np.cos(th) * np.cos(ph), np.cos(th) * np.sin(ph), -np.sin(th))
+        elif name == "e3":
+            # etheta is positive south, e3 is pos. north
+            c = (-np.cos(th) * np.cos(ph), -np.cos(th) * np.sin(ph), np.sin(th))
+        elif name in {"ephi", "e2"}:
+            c = (-np.sin(ph), np.cos(ph), np.zeros_like(th))
+        else:
+            raise ValueError(f"unknown field {name}")
+        A = np.stack(c, axis=-1)
+
+    return np.broadcast_to(A, (r.size, *A.shape))
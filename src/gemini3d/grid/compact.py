@@ -0,0 +1,217 @@
+"""
+compact grid fields
+
+Many grid fields do not vary along one or more axes, e.g. the tilted dipole metric factors
+do not depend on phi. These are held once on the remaining axes and broadcast by view with
+meridional(). Fields that vary along x3 only through a separable factor, such as the
+Cartesian components of the unit vectors, are LazyField: computed for the requested x3
+range on access, so that a writer can stream them slab by slab.
+
+Both behave as read-only numpy arrays; np.asarray() materializes the full field.
+"""
+
+from __future__ import annotations
+import typing as T
+
+import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+__all__ = ["LazyField", "meridional", "is_compact"]
+
+
+def meridional(a, n: int) -> np.ndarray:
+    """
+    broadcast field (x1, x2, ...) along a new x3 axis of length n, by view
+
+    Parameters
+    ----------
+    a: array_like
+        field on the meridional plane, x1, x2 with optional trailing vector axis
+    n: int
+        length of x3
+
+    Returns
+    -------
+    A: np.ndarray
+        read-only view x1, x2, x3, ...
+    """
+
+    a = np.asarray(a)
+
+    return np.broadcast_to(np.expand_dims(a, 2), (*a.shape[:2], n, *a.shape[2:]))
+
+
+def is_compact(a) -> bool:
+    """True if a is a LazyField or a broadcast view, which should not be copied in full"""
+
+    if isinstance(a, LazyField):
+        return True
+
+    return isinstance(a, np.ndarray) and a.size > 1 and 0 in a.strides
+
+
+class LazyField(NDArrayOperatorsMixin):
+    """
+    read-only array computed along one axis on demand
+
+    Parameters
+    ----------
+    fun: callable
+        fun(s) returns the field for index range s (a slice with step 1) along axis,
+        with all other axes full
+    shape: tuple of int
+        shape of the full field
+    axis: int
+        axis that fun is evaluated over, default x3
+    dtype: numpy.dtype
+        data type returned by fun
+    """
+
+    def __init__(
+        self,
+        fun: T.Callable[[slice], np.ndarray],
+        shape: tuple[int, ...],
+        axis: int = 2,
+        dtype=np.float64,
+        *,
+        order: tuple[int, ...] | None = None,
+    ):
+        self._fun = fun
+        self._shape = tuple(int(n) for n in shape)
+        self._axis = axis
+        self.dtype = np.dtype(dtype)
+        # axes of the full field, in the order presented
+        self._order = tuple(range(len(self._shape))) if order is None else tuple(order)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return tuple(self._shape[i] for i in self._order)
+
+    @property
+    def ndim(self) -> int:
+        return len(self._shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self._shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __repr__(self) -> str:
+        return f"LazyField(shape={self.shape}, dtype={self.dtype})"
+
+    def transpose(self, *axes) -> LazyField:
+        if len(axes) == 1 and not isinstance(axes[0], int):
+            axes = tuple(axes[0]) if axes[0] is not None else ()
+        if not axes:
+            axes = tuple(range(self.ndim))[::-1]
+
+        return LazyField(
+            self._fun,
+            self._shape,
+            self._axis,
+            self.dtype,
+            order=tuple(self._order[i] for i in axes),
+        )
+
+    @property
+    def T(self) -> LazyField:
+        return self.transpose()
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        A = self[...]
+
+        return A if dtype is None else A.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(np.asarray(x) if isinstance(x, LazyField) else x for x in inputs)
+
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __getitem__(self, key) -> np.ndarray:
+        basic = self._expand(key)
+        if basic is None:
+            return np.asarray(self)[key]
+        key = basic
+
+        # key on the axes of the full field
+        full: list[T.Any] = [slice(None)] * self.ndim
+        for i, k in zip(self._order, key):
+            full[i] = k
+
+        n = self._shape[self._axis]
+        k = full[self._axis]
+        if isinstance(k, int):
+            k = k + n if k < 0 else k
+            if not 0 <= k < n:
+                raise IndexError(f"index {k} out of range for axis of length {n}")
+            A = self._fun(slice(k, k + 1))
+            full[self._axis] = 0
+        else:
+            start, stop, step = k.indices(n)
+            idx = range(start, stop, step)
+            lo = min(idx) if idx else 0
+            hi = max(idx) + 1 if idx else 0
+            A = self._fun(slice(lo, hi))
+            full[self._axis] = slice(
+                idx.start - lo, idx.stop - lo if idx.stop >= lo else None, step
+            )
+
+        A = A[tuple(full)]
+
+        # present the remaining axes in the requested order
+        kept = [i for i, k in zip(self._order, key) if not isinstance(k, int)]
+        ranks = sorted(kept)
+
+        return A.transpose([ranks.index(i) for i in kept])
+
+    def _expand(self, key) -> tuple | None:
+        """basic indexing to one int or slice per axis, None if not basic indexing"""
+
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        if any(
+            k is None or not isinstance(k, (int, np.integer, slice, type(Ellipsis))) for k in key
+        ):
+            return None
+
+        if Ellipsis in key:
+            i = key.index(Ellipsis)
+            key = (*key[:i], *[slice(None)] * (self.ndim - len(key) + 1), *key[i + 1 :])
+
+        if len(key) > self.ndim:
+            raise IndexError(f"too many indices for array of {self.ndim} dimensions")
+
+        key = (*key, *[slice(None)] * (self.ndim - len(key)))
+
+        return tuple(int(k) if isinstance(k, np.integer) else k for k in key)
+
+    def astype(self, dtype, **kwargs) -> np.ndarray:
+        return np.asarray(self).astype(dtype, **kwargs)
+
+    def copy(self) -> np.ndarray:
+        return np.asarray(self)
+
+    def squeeze(self, *args, **kwargs) -> np.ndarray:
+        return np.asarray(self).squeeze(*args, **kwargs)
+
+    def reshape(self, *args, **kwargs) -> np.ndarray:
+        return np.asarray(self).reshape(*args, **kwargs)
+
+    def min(self, *args, **kwargs):
+        return np.asarray(self).min(*args, **kwargs)
+
+    def max(self, *args, **kwargs):
+        return np.asarray(self).max(*args, **kwargs)
+
+    def mean(self, *args, **kwargs):
+        return np.asarray(self).mean(*args, **kwargs)
+
+    def sum(self, *args, **kwargs):
+        return np.asarray(self).sum(*args, **kwargs)
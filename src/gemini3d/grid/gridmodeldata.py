@@ -80,6 +80,8 @@ def model2geogcoords(
 
     # deal with possible wrapping of longitude coordinates
     if wraplon:
+        # copy to avoid modifying the caller's grid
+        glon = glon.copy()
         glon[glon < 180] += 360
 
     # set some defaults if not provided by user
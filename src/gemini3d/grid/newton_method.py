@@ -5,6 +5,8 @@ These adaptations meant for dipole to spherical coordinate transformation
 
 from __future__ import annotations
 
+import numpy as np
+
 from .convert import calc_theta, Re
 from .convert import objfunr as f, objfunr_derivative as fprime
 
@@ -35,6 +37,81 @@ def qp2rtheta(q: float, p: float, verbose: bool = False) -> tuple[float, float]:
     return r, theta
 
 
+def qp2rtheta_array(q, p) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convert q,p to r,theta coordinates elementwise, as qp2rtheta over broadcast arrays.
+
+    All points take the same Newton iterations at once, each point stopping when it
+    converges, so there is no per-point Python loop.
+    As in qp2rtheta, a point is restarted from a larger starting radius only while it has
+    neither converged nor ended in 0 < r <= 100 Re.
+    """
+
+    tol = 1e-9
+    maxit = 100
+
+    q, p = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(p, dtype=float))
+
+    r = np.zeros(q.shape)
+    todo = np.ones(q.shape, dtype=bool)
+
+    ir0 = 0
+    while todo.any() and ir0 < 400:
+        r0 = ir0 * (0.25 * Re)
+        root, converged = newton_exact_array(
+            f, fprime, np.full(np.count_nonzero(todo), r0), (q[todo], p[todo]), maxit, tol
+        )
+        r[todo] = root
+        todo[todo] = ~converged & ((root <= 0) | (root > 100 * Re))
+        ir0 += 1
+
+    # as calc_theta
+    theta = np.arccos(q * (r / Re) ** 2)
+
+    return r, theta
+
+
+def newton_exact_array(
+    f, fprime, x0: np.ndarray, parms: tuple[np.ndarray, np.ndarray], maxit: int, tol: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    newton_exact over arrays, iterating only the points not yet converged
+    """
+
+    derivtol = 1e-18
+
+    if (abs(fprime(x0, parms)) < derivtol).any():
+        raise ValueError("starting near inflection point, please change initial guess!")
+
+    root = x0.copy()
+    fval = f(root, parms)
+    converged = np.zeros(root.shape, dtype=bool)
+
+    # indices of points still iterating, and their parameters
+    i = np.arange(root.size)
+    a = parms
+    for _ in range(maxit):
+        if i.size == 0:
+            break
+
+        derivative = fprime(root[i], a)
+        if (abs(derivative) < derivtol).any():
+            raise ValueError(
+                "derivative near zero, terminating iterations with failure"
+                "to converge (try a different starting point)!"
+            )
+
+        root[i] = root[i] - fval[i] / derivative
+        fval[i] = f(root[i], a)
+
+        done = abs(fval[i]) < tol
+        converged[i[done]] = True
+        i = i[~done]
+        a = (a[0][~done], a[1][~done])
+
+    return root, converged
+
+
 def newton_exact(
     f, fprime, x0: float, parms: tuple[float, float], maxit: int, tol: float, verbose: bool = False
 ) -> tuple[float, int, bool]:
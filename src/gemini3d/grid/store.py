@@ -0,0 +1,266 @@
+"""
+content-addressed on-disk store of generated grid files
+
+Parameter studies set up many simulations on the same grid. When a store directory is given
+by "grid_store" in config.nml &setup or environment variable GEMINI_GRID_STORE,
+model.setup keys each grid by a hash of the grid-defining parameters and the PyGemini
+version, and reuses simsize.h5 and simgrid.h5 from the store instead of generating the grid.
+
+Files are hard linked from the store when possible, otherwise copied. Stored files are
+read-only, and least recently used grids are evicted beyond MAX_BYTES.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import typing as T
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+
+import numpy as np
+
+from .. import __version__
+
+__all__ = ["directory", "key", "fetch", "put", "evict"]
+
+ENV = "GEMINI_GRID_STORE"
+MAX_BYTES = 16 * 2**30
+
+# store file name: config.nml &files key
+FILES = {"simsize.h5": "indat_size", "simgrid.h5": "indat_grid"}
+
+# config.nml &setup parameters that define the grid files
+CARTESIAN_KEYS = {
+    "lxp",
+    "lyp",
+    "xdist",
+    "ydist",
+    "x2parms",
+    "x3parms",
+    "alt_min",
+    "alt_max",
+    "alt_scale",
+    "lzp",
+    "Bincl",
+    "glat",
+    "glon",
+}
+DIPOLE_KEYS = {
+    "lq",
+    "lp",
+    "lphi",
+    "dtheta",
+    "dphi",
+    "altmin",
+    "gridflag",
+    "grid_openparm",
+    "glat",
+    "glon",
+}
+FILE_KEYS = {"compression"}
+
+
+def directory(cfg: dict[str, T.Any]) -> Path | None:
+    """grid store directory, or None if the store is not enabled"""
+
+    d = cfg.get("grid_store") or os.environ.get(ENV)
+
+    return Path(d).expanduser() if d else None
+
+
+def key(cfg: dict[str, T.Any]) -> str | None:
+    """
+    hash of the grid-defining parameters
+
+    Parameters
+    ----------
+    cfg: dict
+        simulation parameters
+
+    Returns
+    -------
+    key: str
+        hex digest, or None if the grid depends on more than cfg, e.g. a Cartesian
+        altitude grid reused from eq_dir
+    """
+
+    params = _params(cfg)
+
+    if params is None:
+        return None
+
+    js = json.dumps({"version": __version__, "grid": params}, sort_keys=True, default=_json)
+
+    return hashlib.sha256(js.encode("utf8")).hexdigest()
+
+
+def fetch(cfg: dict[str, T.Any]) -> bool:
+    """
+    link or copy stored grid files to cfg["indat_size"], cfg["indat_grid"]
+
+    Returns
+    -------
+    hit: bool
+        True if the grid was in the store
+    """
+
+    root = directory(cfg)
+    k = key(cfg)
+    if root is None or k is None:
+        return False
+
+    entry = root / k
+    if not all((entry / f).is_file() for f in FILES):
+        logging.info(f"grid store miss: {entry}")
+        return False
+
+    for f, name in FILES.items():
+        dest = Path(cfg[name])
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            dest.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(entry / f, dest)
+        except OSError:
+            shutil.copyfile(entry / f, dest)
+
+    # mark as recently used
+    os.utime(entry)
+    logging.info(f"grid store hit: {entry}")
+
+    return True
+
+
+def put(cfg: dict[str, T.Any], max_bytes: int | None = None) -> Path | None:
+    """
+    add the grid files cfg["indat_size"], cfg["indat_grid"] to the store, then evict
+    least recently used grids beyond max_bytes
+
+    Parameters
+    ----------
+    cfg: dict
+        simulation parameters
+    max_bytes: int, optional
+        size of the store, default MAX_BYTES
+
+    Returns
+    -------
+    entry: pathlib.Path
+        store directory of this grid, or None if the store is not enabled
+    """
+
+    root = directory(cfg)
+    k = key(cfg)
+    if root is None or k is None:
+        return None
+
+    entry = root / k
+    if not entry.is_dir():
+        root.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=root, prefix=".tmp-"))
+        try:
+            for f, name in FILES.items():
+                shutil.copyfile(cfg[name], tmp / f)
+                os.chmod(tmp / f, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            (tmp / "grid.json").write_text(
+                json.dumps(
+                    {"version": __version__, "grid": _params(cfg)},
+                    sort_keys=True,
+                    indent=2,
+                    default=_json,
+                )
+            )
+            tmp.rename(entry)
+        except OSError:
+            # another process stored the same grid first
+            if not entry.is_dir():
+                raise
+        finally:
+            if tmp.is_dir():
+                _rmtree(tmp)
+
+    os.utime(entry)
+
+    evict(root, MAX_BYTES if max_bytes is None else max_bytes, keep=entry)
+
+    return entry
+
+
+def evict(root: Path, max_bytes: int, *, keep: Path | None = None) -> list[Path]:
+    """
+    remove least recently used grids until the store is within max_bytes
+
+    Parameters
+    ----------
+    root: pathlib.Path
+        store directory
+    max_bytes: int
+        size of the store
+    keep: pathlib.Path, optional
+        entry not to remove
+
+    Returns
+    -------
+    removed: list of pathlib.Path
+        removed entries
+    """
+
+    entries = [d for d in Path(root).iterdir() if d.is_dir() and not d.name.startswith(".")]
+    size = {d: sum(f.stat().st_size for f in d.iterdir()) for d in entries}
+    total = sum(size.values())
+
+    removed = []
+    for d in sorted(entries, key=lambda d: d.stat().st_mtime_ns):
+        if total <= max_bytes:
+            break
+        if keep is not None and d == keep:
+            continue
+        _rmtree(d)
+        total -= size[d]
+        removed.append(d)
+        logging.info(f"grid store evicted: {d}")
+
+    return removed
+
+
+def _params(cfg: dict[str, T.Any]) -> dict[str, T.Any] | None:
+    if "lxp" in cfg and "lyp" in cfg:
+        if not {"alt_min", "alt_max", "alt_scale", "Bincl"} <= cfg.keys():
+            # like cartesian.cart3d, an eq_dir grid file takes precedence over lzp
+            eq_dir = cfg.get("eq_dir")
+            if eq_dir and Path(eq_dir).is_file():
+                return None
+            if not {"alt_min", "alt_max", "lzp"} <= cfg.keys():
+                return None
+        keys = CARTESIAN_KEYS
+    elif "lq" in cfg and "lp" in cfg and "lphi" in cfg:
+        keys = DIPOLE_KEYS
+    else:
+        return None
+
+    return {k: cfg[k] for k in sorted((keys | FILE_KEYS) & cfg.keys())}
+
+
+def _json(x):
+    if isinstance(x, np.ndarray):
+        return x.tolist()
+    if isinstance(x, np.generic):
+        return x.item()
+
+    return str(x)
+
+
+def _rmtree(path: Path):
+    """remove directory tree including read-only files"""
+
+    def onerror(func, p, exc_info):
+        os.chmod(p, stat.S_IWUSR | stat.S_IRUSR)
+        func(p)
+
+    shutil.rmtree(path, onerror=onerror)
@@ -9,7 +9,8 @@ import logging
 
 import numpy as np
 
-from .newton_method import qp2rtheta
+from .newton_method import qp2rtheta_array
+from .compact import LazyField, meridional
 from .convert import geog2geomag, geomag2geog, Re
 
 
@@ -26,7 +27,8 @@ def tilted_dipole3d(cfg: dict[str, T.Any]) -> dict[str, T.Any]:
     -------
 
     xg: dict
-        simulation grid
+        simulation grid. Fields that do not depend on phi are read-only views of the
+        meridional plane; those that do are LazyField, see gemini3d.grid.compact
     """
 
     # parameter controlling altitude of top of grid in open dipole.
@@ -35,7 +37,7 @@ def tilted_dipole3d(cfg: dict[str, T.Any]) -> dict[str, T.Any]:
     pi = math.pi
 
     # arrange the grid data in a dictionary
-    xg = {"lx": np.array((cfg["lq"], cfg["lp"], cfg["lphi"]))}
+    xg: dict[str, T.Any] = {"lx": np.array((cfg["lq"], cfg["lp"], cfg["lphi"]))}
     # aggregate array shape variable
 
     # mesh size *with* ghost cells added in
@@ -129,185 +131,144 @@ def tilted_dipole3d(cfg: dict[str, T.Any]) -> dict[str, T.Any]:
     phi[-2] = phi[-3] + phistride
     phi[-1] = phi[-3] + 2 * phistride
 
-    # %% allocate meridional slice, including ghost cells - this later gets extended into 3D
-    r = np.empty((lqg, lpg))
-    theta = np.empty((lqg, lpg))
+    # %% meridional slice, including ghost cells - this later gets extended into 3D
     # qtol = 1e-9  # tolerance for declaring "equator"
     logging.info("converting grid centers to r,theta")
 
-    for iq in range(lqg):
-        for ip in range(lpg):
-            r[iq, ip], theta[iq, ip] = qp2rtheta(q[iq], p[ip])
-
-    r = np.broadcast_to(r[:, :, None], (*r.shape, lphig))  # just tile for longitude to save time
-    theta = np.broadcast_to(theta[:, :, None], (*theta.shape, lphig))
-    phispher = np.broadcast_to(phi[None, None, :], (lqg, lpg, phi.size))
+    r, theta = qp2rtheta_array(q[:, None], p[None, :])
 
     # %% define cell interfaces and convert coordinates
     logging.info("converting q interface values to r,theta")
     qi = 1 / 2 * (q[1:-2] + q[2:-1])
-    rqi = np.empty((cfg["lq"] + 1, cfg["lp"]))
-    thetaqi = np.empty((cfg["lq"] + 1, cfg["lp"]))
-    for iq in range(rqi.shape[0]):
-        for ip in range(rqi.shape[1]):
-            rqi[iq, ip], thetaqi[iq, ip] = qp2rtheta(qi[iq], p[ip + 2])
-            # shift by 2 to exclude ghost
-    rqi = np.broadcast_to(rqi[:, :, None], (*rqi.shape, cfg["lphi"]))
-    thetaqi = np.broadcast_to(thetaqi[:, :, None], (*thetaqi.shape, cfg["lphi"]))
+    # p shifted by 2 to exclude ghost
+    rqi, thetaqi = qp2rtheta_array(qi[:, None], p[None, 2:-2])
 
     logging.info("converting p interface values to r,theta")
     pi = 1 / 2 * (p[1:-2] + p[2:-1])
-    rpi = np.empty((cfg["lq"], cfg["lp"] + 1))
-    thetapi = np.empty((cfg["lq"], cfg["lp"] + 1))
-    for iq in range(rpi.shape[0]):
-        for ip in range(rpi.shape[1]):
-            rpi[iq, ip], thetapi[iq, ip] = qp2rtheta(q[iq + 2], pi[ip])
-            # shift non interface index by two to exclude ghost
-    rpi = np.broadcast_to(rpi[:, :, None], (*rpi.shape, cfg["lphi"]))
-    thetapi = np.broadcast_to(thetapi[:, :, None], (*thetapi.shape, cfg["lphi"]))
+    # shift non interface index by two to exclude ghost
+    rpi, thetapi = qp2rtheta_array(q[2:-2, None], pi[None, :])
 
     # phii = 1 / 2 * (phi[1:-2] + phi[2:-1])
 
+    # r, theta and everything derived from them alone do not depend on phi:
+    # these are computed on the meridional (q,p) plane and extended along phi by view.
+    lq, lp, lphi = cfg["lq"], cfg["lp"], cfg["lphi"]
+
     # metric factors at cell centers and interfaces
     logging.info("calculating metric ceoffs")
     denom = np.sqrt(1 + 3 * np.cos(theta) ** 2)  # ghost cells need for these
-    xg["h1"] = r**3 / Re**2 / denom
-    xg["h2"] = Re * np.sin(theta) ** 3 / denom
-    xg["h3"] = r * np.sin(theta)
-
-    xg["h1x3i"] = np.concatenate(
-        (xg["h1"][2:-2, 2:-2, 2:-2], xg["h1"][2:-2, 2:-2, -1][:, :, None]), axis=2
-    )
-    xg["h2x3i"] = np.concatenate(
-        (xg["h2"][2:-2, 2:-2, 2:-2], xg["h2"][2:-2, 2:-2, -1][:, :, None]),
-        axis=2,
-    )
-    xg["h3x3i"] = np.concatenate(
-        (xg["h3"][2:-2, 2:-2, 2:-2], xg["h3"][2:-2, 2:-2, -1][:, :, None]),
-        axis=2,
-    )
+    h1 = r**3 / Re**2 / denom
+    h2 = Re * np.sin(theta) ** 3 / denom
+    h3 = r * np.sin(theta)
+    xg["h1"] = meridional(h1, lphig)
+    xg["h2"] = meridional(h2, lphig)
+    xg["h3"] = meridional(h3, lphig)
+
+    xg["h1x3i"] = meridional(h1[2:-2, 2:-2], lphi + 1)
+    xg["h2x3i"] = meridional(h2[2:-2, 2:-2], lphi + 1)
+    xg["h3x3i"] = meridional(h3[2:-2, 2:-2], lphi + 1)
 
     denomtmp = np.sqrt(1 + 3 * np.cos(thetaqi) ** 2)
-    xg["h1x1i"] = rqi**3 / Re**2 / denomtmp
-    xg["h2x1i"] = Re * np.sin(thetaqi) ** 3 / denomtmp
-    xg["h3x1i"] = rqi * np.sin(thetaqi)
+    xg["h1x1i"] = meridional(rqi**3 / Re**2 / denomtmp, lphi)
+    xg["h2x1i"] = meridional(Re * np.sin(thetaqi) ** 3 / denomtmp, lphi)
+    xg["h3x1i"] = meridional(rqi * np.sin(thetaqi), lphi)
 
     denomtmp = np.sqrt(1 + 3 * np.cos(thetapi) ** 2)
-    xg["h1x2i"] = rpi**3 / Re**2 / denomtmp
-    xg["h2x2i"] = Re * np.sin(thetapi) ** 3 / denomtmp
-    xg["h3x2i"] = rpi * np.sin(thetapi)
+    xg["h1x2i"] = meridional(rpi**3 / Re**2 / denomtmp, lphi)
+    xg["h2x2i"] = meridional(Re * np.sin(thetapi) ** 3 / denomtmp, lphi)
+    xg["h3x2i"] = meridional(rpi * np.sin(thetapi), lphi)
+
+    # meridional plane sans ghost cells
+    r = r[2:-2, 2:-2]
+    theta = theta[2:-2, 2:-2]
+    denom = denom[2:-2, 2:-2]
+    phic = phi[2:-2]
+    st = np.sin(theta)
+    ct = np.cos(theta)
+
+    def azimuthal(a: np.ndarray, trig: T.Callable = np.cos) -> LazyField:
+        """a * trig(phi) computed for the requested phi"""
+
+        return LazyField(lambda s: a[:, :, None] * trig(phic[s]), (lq, lp, lphi))
+
+    def vector(a: np.ndarray, c: np.ndarray) -> LazyField:
+        """(a cos(phi), a sin(phi), c) computed for the requested phi"""
+
+        def fun(s: slice) -> np.ndarray:
+            A = np.empty((lq, lp, len(phic[s]), 3))
+            A[..., 0] = a[:, :, None] * np.cos(phic[s])
+            A[..., 1] = a[:, :, None] * np.sin(phic[s])
+            A[..., 2] = c[:, :, None]
+            return A
+
+        return LazyField(fun, (lq, lp, lphi, 3))
 
     # spherical unit vectors (expressed in a Cartesian basis), these should not have ghost cells
     logging.info("calculating spherical unit vectors")
-    xg["er"] = np.empty((cfg["lq"], cfg["lp"], cfg["lphi"], 3))
-    xg["etheta"] = np.empty((cfg["lq"], cfg["lp"], cfg["lphi"], 3))
-    xg["ephi"] = np.empty((cfg["lq"], cfg["lp"], cfg["lphi"], 3))
-    xg["er"][..., 0] = np.sin(theta[2:-2, 2:-2, 2:-2]) * np.cos(phispher[2:-2, 2:-2, 2:-2])
-    xg["er"][..., 1] = np.sin(theta[2:-2, 2:-2, 2:-2]) * np.sin(phispher[2:-2, 2:-2, 2:-2])
-    xg["er"][..., 2] = np.cos(theta[2:-2, 2:-2, 2:-2])
-    xg["etheta"][..., 0] = np.cos(theta[2:-2, 2:-2, 2:-2]) * np.cos(phispher[2:-2, 2:-2, 2:-2])
-    xg["etheta"][..., 1] = np.cos(theta[2:-2, 2:-2, 2:-2]) * np.sin(phispher[2:-2, 2:-2, 2:-2])
-    xg["etheta"][..., 2] = -np.sin(theta[2:-2, 2:-2, 2:-2])
-    xg["ephi"][..., 0] = -np.sin(phispher[2:-2, 2:-2, 2:-2])
-    xg["ephi"][..., 1] = np.cos(phispher[2:-2, 2:-2, 2:-2])
-    xg["ephi"][..., 2] = 0
+    xg["er"] = vector(st, ct)
+    xg["etheta"] = vector(ct, -st)
+    ephi = np.stack((-np.sin(phic), np.cos(phic), np.zeros(lphi)), axis=1)
+    xg["ephi"] = np.broadcast_to(ephi, (lq, lp, lphi, 3))
 
     # now do the dipole unit vectors
     logging.info("calculating dipole unit vectors")
-    xg["e1"] = np.empty((cfg["lq"], cfg["lp"], cfg["lphi"], 3))
-    xg["e2"] = np.empty((cfg["lq"], cfg["lp"], cfg["lphi"], 3))
-    xg["e3"] = np.empty((cfg["lq"], cfg["lp"], cfg["lphi"], 3))
-    xg["e1"][..., 0] = (
-        -3
-        * np.cos(theta[2:-2, 2:-2, 2:-2])
-        * np.sin(theta[2:-2, 2:-2, 2:-2])
-        * np.cos(phispher[2:-2, 2:-2, 2:-2])
-        / denom[2:-2, 2:-2, 2:-2]
-    )
-    xg["e1"][..., 1] = (
-        -3
-        * np.cos(theta[2:-2, 2:-2, 2:-2])
-        * np.sin(theta[2:-2, 2:-2, 2:-2])
-        * np.sin(phispher[2:-2, 2:-2, 2:-2])
-        / denom[2:-2, 2:-2, 2:-2]
-    )
-    xg["e1"][..., 2] = (1 - 3 * np.cos(theta[2:-2, 2:-2, 2:-2]) ** 2) / denom[2:-2, 2:-2, 2:-2]
-    xg["e2"][..., 0] = (
-        np.cos(phispher[2:-2, 2:-2, 2:-2])
-        * (1 - 3 * np.cos(theta[2:-2, 2:-2, 2:-2]) ** 2)
-        / denom[2:-2, 2:-2, 2:-2]
-    )
-    xg["e2"][..., 1] = (
-        np.sin(phispher[2:-2, 2:-2, 2:-2])
-        * (1 - 3 * np.cos(theta[2:-2, 2:-2, 2:-2]) ** 2)
-        / denom[2:-2, 2:-2, 2:-2]
-    )
-    xg["e2"][..., 2] = (
-        3
-        * np.sin(theta[2:-2, 2:-2, 2:-2])
-        * np.cos(theta[2:-2, 2:-2, 2:-2])
-        / denom[2:-2, 2:-2, 2:-2]
-    )
+    xg["e1"] = vector(-3 * ct * st / denom, (1 - 3 * ct**2) / denom)
+    xg["e2"] = vector((1 - 3 * ct**2) / denom, 3 * st * ct / denom)
     xg["e3"] = xg["ephi"]  # same as in spherical
 
+    # er . e1 = -2 cos(theta) / denom and er . e2 = sin(theta) / denom at any phi
+    proj1 = -2 * ct / denom
+    proj2 = st / denom
+
     # find inclination angle for each field line
     logging.info("calculating average inclination angle for each field line...")
-    proj = np.sum(xg["er"] * xg["e1"], axis=3)
-    Imat = np.arccos(proj)
+    Imat = np.arccos(proj1)
     if cfg["gridflag"] == 0:  # open dipole
-        xg["I"] = Imat.mean(axis=0)
+        Ibar = Imat.mean(axis=0)
     else:  # closed dipole
-        Imathalf = Imat[: cfg["lq"] // 2, :, :]
-        xg["I"] = Imathalf.mean(axis=0)
-    xg["I"] = 90 - np.degrees(np.minimum(xg["I"], math.pi - xg["I"]))
+        Ibar = Imat[: lq // 2, :].mean(axis=0)
+    Ibar = 90 - np.degrees(np.minimum(Ibar, math.pi - Ibar))
+    xg["I"] = np.broadcast_to(Ibar[:, None], (lp, lphi))
     # ignore parallel vs. anti-parallel
 
     # compute gravitational field components, exclude ghost cells
     logging.info("calculating gravitational field over grid...")
     G = 6.67428e-11
     Me = 5.9722e24
-    g = G * Me / r[2:-2, 2:-2, 2:-2] ** 2
-    proj = np.sum(-xg["er"] * xg["e1"], axis=3)
-    xg["gx1"] = g * proj
-    proj = np.sum(-xg["er"] * xg["e2"], axis=3)
-    xg["gx2"] = g * proj
-    xg["gx3"] = np.zeros(xg["gx1"].shape)
+    g = G * Me / r**2
+    xg["gx1"] = meridional(-g * proj1, lphi)
+    xg["gx2"] = meridional(-g * proj2, lphi)
+    xg["gx3"] = np.broadcast_to(0.0, (lq, lp, lphi))
 
     # compute magnetic field strength
     logging.info("calculating magnetic field strength over grid...")
     # simplified (4 * pi * 1e-7)* 7.94e22 / 4 / pi due to precision issues
-    xg["Bmag"] = (
-        7.94e15
-        / (r[2:-2, 2:-2, 2:-2] ** 3)
-        * np.sqrt(3 * (np.cos(theta[2:-2, 2:-2, 2:-2])) ** 2 + 1)
-    )
+    xg["Bmag"] = meridional(7.94e15 / (r**3) * np.sqrt(3 * ct**2 + 1), lphi)
 
     # compute Cartesian coordinates
-    xg["z"] = r[2:-2, 2:-2, 2:-2] * np.cos(theta[2:-2, 2:-2, 2:-2])
-    xg["x"] = (
-        r[2:-2, 2:-2, 2:-2] * np.sin(theta[2:-2, 2:-2, 2:-2]) * np.cos(phispher[2:-2, 2:-2, 2:-2])
-    )
-    xg["y"] = (
-        r[2:-2, 2:-2, 2:-2] * np.sin(theta[2:-2, 2:-2, 2:-2]) * np.sin(phispher[2:-2, 2:-2, 2:-2])
-    )
+    xg["z"] = meridional(r * ct, lphi)
+    xg["x"] = azimuthal(r * st, np.cos)
+    xg["y"] = azimuthal(r * st, np.sin)
 
     # determine grid cells that are "null" - i.e. not included in the computations
-    inull = r[2:-2, 2:-2, 2:-2] < Re + 79.95e3
-    # note addressing of r to produce array sans ghost cells
-
-    xg["nullpts"] = np.zeros((cfg["lq"], cfg["lp"], cfg["lphi"]))
-    xg["nullpts"][inull] = 1
-    # may need to convert inull to linear index?
+    xg["nullpts"] = meridional((r < Re + 79.95e3).astype(float), lphi)
 
     # compute geographic coordinates for the entire grid
-    xg["alt"] = r[2:-2, 2:-2, 2:-2] - Re
-    [xg["glon"], xg["glat"]] = geomag2geog(phispher[2:-2, 2:-2, 2:-2], theta[2:-2, 2:-2, 2:-2])
-
-    # at this point we are done with the works arrays to put them in the structure and deallocate
-    # assign spherical variables to dictionary and clear out work array to save memory
-    xg["r"] = r[2:-2, 2:-2, 2:-2]
-    xg["theta"] = theta[2:-2, 2:-2, 2:-2]
-    xg["phi"] = phispher[2:-2, 2:-2, 2:-2]
+    xg["alt"] = meridional(r - Re, lphi)
+
+    def geog(s: slice) -> np.ndarray:
+        glon, glat = geomag2geog(
+            np.broadcast_to(phic[s], (lq, lp, len(phic[s]))), theta[:, :, None]
+        )
+        return np.stack((glon, glat))
+
+    xg["glon"] = LazyField(lambda s: geog(s)[0], (lq, lp, lphi))
+    xg["glat"] = LazyField(lambda s: geog(s)[1], (lq, lp, lphi))
+
+    # assign spherical variables to dictionary
+    xg["r"] = meridional(r, lphi)
+    xg["theta"] = meridional(theta, lphi)
+    xg["phi"] = np.broadcast_to(phic, (lq, lp, lphi))
 
     # assign primary coordinates to dictionary, clear out temps
     xg["x1"] = q
@@ -6,6 +6,7 @@ from __future__ import annotations
 from pathlib import Path
 import typing as T
 import logging
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 
 import xarray
@@ -15,7 +16,29 @@ import h5py
 from gemini3d.utils import filename2datetime
 
 from .. import find
-from .. import WAVELEN
+from ..config import read_nml
+from ..cache import GridCache, grid_cache
+from .. import WAVELEN, LSP
+
+# Efield and precipitation input variables: name -> (dataset, dims)
+EFIELD_VARS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "flagdirich": ("flagdirich", ()),
+    "Exit": ("Exit", ("mlat", "mlon")),
+    "Eyit": ("Eyit", ("mlat", "mlon")),
+    "Vminx1it": ("Vminx1it", ("mlat", "mlon")),
+    "Vmaxx1it": ("Vmaxx1it", ("mlat", "mlon")),
+    "Vminx2ist": ("Vminx2ist", ("mlat",)),
+    "Vmaxx2ist": ("Vmaxx2ist", ("mlat",)),
+    "Vminx3ist": ("Vminx3ist", ("mlon",)),
+    "Vmaxx3ist": ("Vmaxx3ist", ("mlon",)),
+}
+PRECIP_VARS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "Q": ("Qp", ("mlat", "mlon")),
+    "E0": ("E0p", ("mlat", "mlon")),
+}
+
+# mlon, mlat of input directories, which are read for every input frame
+_INPUT_COORDS = GridCache(max_bytes=2**26)
 
 
 def simsize(path: Path) -> tuple[int, ...]:
@@ -57,10 +80,19 @@ def simsize(path: Path) -> tuple[int, ...]:
     return lx
 
 
-def flagoutput(file: Path, cfg: dict[str, T.Any]) -> int:
-    """detect output type"""
+def flagoutput(file: Path | h5py.File, cfg: dict[str, T.Any] | None = None) -> int:
+    """detect output type
 
-    with h5py.File(file, "r") as f:
+    Parameters
+    ----------
+    file: pathlib.Path or h5py.File
+        filename or already-open file
+    cfg: dict, optional
+        simulation parameters, only read from config.nml if the file itself
+        does not tell the output type
+    """
+
+    with _open(file) as f:
         if "nsall" in f:
             # milestone or full
             flag = 1
@@ -71,6 +103,8 @@ def flagoutput(file: Path, cfg: dict[str, T.Any]) -> int:
         elif "neall" in f:
             flag = 2
         else:
+            if not cfg:
+                cfg = read_nml(Path(f.filename).parent)
             flag = cfg["flagoutput"]
 
     return flag
@@ -133,13 +167,77 @@ def grid(file: Path, *, var: set[str] = None, shape: bool = False) -> dict[str,
     return xg
 
 
+def input_coords(file: Path) -> dict[str, np.ndarray]:
+    """
+    mlon, mlat coordinates of Efield or precipitation inputs.
+    Cached, so simgrid.h5 is read once per input directory.
+
+    Parameters
+    ----------
+    file: pathlib.Path
+        simgrid.h5 of the input directory
+
+    Returns
+    -------
+    coords: dict
+        mlon, mlat read-only
+    """
+
+    def load() -> dict[str, T.Any]:
+        with h5py.File(file, "r") as f:
+            return {"mlon": f["/mlon"][:], "mlat": f["/mlat"][:]}
+
+    cache = grid_cache()
+    if cache is None:
+        cache = _INPUT_COORDS
+
+    return cache.get(file, load, kind="input_coords")
+
+
+def input_frames(
+    files: list[Path], var: dict[str, tuple[str, tuple[str, ...]]]
+) -> dict[str, np.ndarray]:
+    """
+    read Efield or precipitation input frames into (time, ...) arrays,
+    each frame read directly into its slot of the preallocated arrays
+
+    Parameters
+    ----------
+    files: list of pathlib.Path
+        input frame files
+    var: dict
+        name: (dataset, dims) e.g. EFIELD_VARS
+
+    Returns
+    -------
+    dat: dict of np.ndarray
+        time, ... for each variable
+    """
+
+    out: dict[str, np.ndarray] = {}
+
+    for i, file in enumerate(files):
+        with h5py.File(file, "r") as f:
+            if not out:
+                out = {
+                    k: np.empty((len(files), *f[p].shape), dtype=f[p].dtype)
+                    for k, (p, _) in var.items()
+                }
+            for k, (p, _) in var.items():
+                if f[p].ndim == 0:
+                    out[k][i] = f[p][()]
+                else:
+                    f[p].read_direct(out[k][i])
+
+    return out
+
+
 def Efield(file: Path) -> xarray.Dataset:
     """
     load electric field
     """
 
-    with h5py.File(file.with_name("simgrid.h5"), "r") as f:
-        E = xarray.Dataset(coords={"mlon": f["/mlon"][:], "mlat": f["/mlat"][:]})
+    E = xarray.Dataset(coords=input_coords(file.with_name("simgrid.h5")))
 
     with h5py.File(file, "r") as f:
         E["flagdirich"] = f["flagdirich"][()].item()
@@ -158,8 +256,7 @@ def precip(file: Path) -> xarray.Dataset:
     load precipitation
     """
 
-    with h5py.File(file.with_name("simgrid.h5"), "r") as f:
-        dat = xarray.Dataset(coords={"mlon": f["/mlon"][:], "mlat": f["/mlat"][:]})
+    dat = xarray.Dataset(coords=input_coords(file.with_name("simgrid.h5")))
 
     with h5py.File(file, "r") as f:
         for k in {"Q", "E0"}:
@@ -168,35 +265,70 @@ def precip(file: Path) -> xarray.Dataset:
     return dat
 
 
-def frame3d_curvne(file: Path, xg: dict[str, T.Any] = None) -> xarray.Dataset:
+def frame3d_curvne(
+    file: Path | h5py.File,
+    xg: dict[str, T.Any] | None = None,
+    *,
+    x1: slice | None = None,
+    x2: slice | None = None,
+    x3: slice | None = None,
+) -> xarray.Dataset:
     """
     just Ne
+
+    Parameters
+    ----------
+
+    file: pathlib.Path or h5py.File
+        filename or already-open file to read
+    x1, x2, x3: slice, optional
+        read only this sub-volume (hyperslab)
     """
 
     if not xg:
-        xg = grid(file.parent, var={"x1", "x2", "x3"})
+        xg = grid_coords(_filename(file).parent)
+
+    s1, s2, s3 = _hyperslab(xg, x1, x2, x3)
 
-    dat = xarray.Dataset(coords={"x1": xg["x1"][2:-2], "x2": xg["x2"][2:-2], "x3": xg["x3"][2:-2]})
+    dat = xarray.Dataset(coords=_coords(xg, s1, s2, s3))
 
     p3 = (2, 1, 0)
 
-    with h5py.File(file, "r") as f:
-        dat["ne"] = (("x1", "x2", "x3"), f["/ne"][:].transpose(p3))
+    with _open(file) as f:
+        dat["ne"] = (("x1", "x2", "x3"), f["/ne"][s3, s2, s1].transpose(p3))
 
     return dat
 
 
-def frame3d_curv(file: Path, var: set[str], xg: dict[str, T.Any] = None) -> xarray.Dataset:
+def frame3d_curv(
+    file: Path | h5py.File,
+    var: set[str],
+    xg: dict[str, T.Any] | None = None,
+    *,
+    x1: slice | None = None,
+    x2: slice | None = None,
+    x3: slice | None = None,
+) -> xarray.Dataset:
     """
     curvilinear
 
+    Derived variables ne, v1, Ti, Te are computed from the per-species
+    variables, reading only the species planes each one needs.
+    The per-species variables ns, vs1, Ts are returned only if requested.
+
+    Arrays are Fortran-ordered views of the data as stored, not transposed copies.
+    This is not optional: the (x3, x2, x1) datasets are read in one C-order buffer,
+    and a C-order (x1, x2, x3) result would need a full copy of each array.
+
     Parameters
     ----------
 
-    file: pathlib.Path
-        filename to read
+    file: pathlib.Path or h5py.File
+        filename or already-open file to read
     var: set of str
         variable(s) to read
+    x1, x2, x3: slice, optional
+        read only this sub-volume (hyperslab)
     """
 
     if isinstance(var, str):
@@ -204,64 +336,182 @@ def frame3d_curv(file: Path, var: set[str], xg: dict[str, T.Any] = None) -> xarr
     var = set(var)
 
     if not xg:
-        xg = grid(file.parent, var={"x1", "x2", "x3"})
+        xg = grid_coords(_filename(file).parent)
+
+    s1, s2, s3 = _hyperslab(xg, x1, x2, x3)
 
-    dat = xarray.Dataset(coords={"x1": xg["x1"][2:-2], "x2": xg["x2"][2:-2], "x3": xg["x3"][2:-2]})
+    dat = xarray.Dataset(coords=_coords(xg, s1, s2, s3))
 
     lx = xg["lx"]
 
     p4n = (0, 3, 2, 1)
     p3n = (2, 1, 0)
 
-    with h5py.File(file, "r") as f:
+    with _open(file) as f:
 
         p4 = p4n
         p3 = p3n
 
-        if {"ne", "ns", "v1", "Ti"} & var:
-            dat["ns"] = (("species", "x1", "x2", "x3"), f["/nsall"][:].transpose(p4))
+        for k in {"ns", "vs1", "Ts"} & var:
+            dat[k] = (("species", "x1", "x2", "x3"), f[f"/{k}all"][:, s3, s2, s1].transpose(p4))
+
+        # %% derived variables, reading only the species planes each one needs
+        elec = slice(LSP - 1, LSP)
+
+        weights = {k: w for k, w in (("v1", "vs1"), ("Ti", "Ts")) if k in var}
+        if weights:
+            mem = {k: dat[k].data for k in ("ns", "vs1", "Ts") if k in dat}
+            for k, v in _ion_average(f, weights, mem, s1, s2, s3, ne="ne" in var).items():
+                dat[k] = (("x1", "x2", "x3"), v)
 
-        if {"v1", "vs1"} & var:
-            dat["vs1"] = (("species", "x1", "x2", "x3"), f["/vs1all"][:].transpose(p4))
+        if "ne" in var and "ne" not in dat:
+            ns = dat["ns"].data if "ns" in dat else _species(f, "ns", elec, s1, s2, s3)
+            if ns.shape[1:] != tuple(dat.sizes[k] for k in ("x1", "x2", "x3")):
+                raise ValueError(f"may have wrong permutation on read. ns x1,x2,x3: {ns.shape}")
+            dat["ne"] = (("x1", "x2", "x3"), ns[-1])
 
-        if {"Te", "Ti", "Ts"} & var:
-            dat["Ts"] = (("species", "x1", "x2", "x3"), f["/Tsall"][:].transpose(p4))
+        if "Te" in var:
+            Ts = dat["Ts"].data if "Ts" in dat else _species(f, "Ts", elec, s1, s2, s3)
+            dat["Te"] = (("x1", "x2", "x3"), Ts[-1])
 
         for k in {"J1", "J2", "J3"} & var:
-            dat[k] = (("x1", "x2", "x3"), f[f"/{k}all"][:].transpose(p3))
+            dat[k] = (("x1", "x2", "x3"), f[f"/{k}all"][s3, s2, s1].transpose(p3))
 
         for k in {"v2", "v3"} & var:
-            dat[k] = (("x1", "x2", "x3"), f[f"/{k}avgall"][:].transpose(p3))
+            dat[k] = (("x1", "x2", "x3"), f[f"/{k}avgall"][s3, s2, s1].transpose(p3))
 
         if "Phi" in var:
-            Phiall = f["/Phiall"][:]
-
-            if Phiall.ndim == 1:
+            if f["/Phiall"].ndim == 1:
+                Phiall = f["/Phiall"][:]
                 if lx[1] == 1:
                     Phiall = Phiall[None, :]
                 else:
                     Phiall = Phiall[:, None]
+                Phiall = Phiall.transpose()[s2, s3]
+            else:
+                Phiall = f["/Phiall"][s3, s2].transpose()
 
-            dat["Phitop"] = (("x2", "x3"), Phiall.transpose())
+            dat["Phitop"] = (("x2", "x3"), Phiall)
 
     return dat
 
 
-def frame3d_curvavg(file: Path, var: set[str], xg: dict[str, T.Any] = None) -> xarray.Dataset:
+def _species(f: h5py.File, name: str, species: slice, s1: slice, s2: slice, s3: slice):
+    """
+    read only the selected species planes of a hyperslab of /{name}all
+
+    Returns
+    -------
+    A: np.ndarray
+        species, x1, x2, x3
+    """
+
+    return f[f"/{name}all"][species, s3, s2, s1].transpose(0, 3, 2, 1)
+
+
+def _ion_average(
+    f: h5py.File,
+    weights: dict[str, str],
+    mem: dict[str, np.ndarray],
+    s1: slice,
+    s2: slice,
+    s3: slice,
+    *,
+    ne: bool = False,
+) -> dict[str, np.ndarray]:
     """
+    density-weighted ion averages sum_i(ns_i * w_i) / ne, e.g. v1 from vs1 and Ti from Ts.
+
+    The species arrays are read one block of x3 at a time, matching the HDF5 chunking,
+    and each average is accumulated in place into its output.
+    Thus neither the full species arrays nor per-species products are held in memory,
+    and peak memory is about the size of the outputs.
+    The outputs are Fortran-ordered (x1, x2, x3) views, like the other variables read.
 
     Parameters
     ----------
-    file: pathlib.Path
-        filename of this timestep of simulation output
+    f: h5py.File
+        open frame file
+    weights: dict of str: str
+        output name: per-species variable name, e.g. {"v1": "vs1"}
+    mem: dict of str: np.ndarray
+        per-species variables (species, x1, x2, x3) already read, used instead of reading again
+    s1, s2, s3: slice
+        hyperslab from _hyperslab()
+    ne: bool
+        also return "ne", if "ns" was not already read
+
+    Returns
+    -------
+    avg: dict of str: np.ndarray
+        x1, x2, x3
+    """
+
+    dn = f["/nsall"]
+    if dn.shape[0] != LSP:
+        raise ValueError(f"expected {LSP} species in {f.filename}, got {dn.shape[0]}")
+
+    n3, n2, n1 = (len(range(n)[s]) for n, s in zip(dn.shape[1:], (s3, s2, s1)))
+
+    names = list(weights)
+    if ne and "ns" not in mem:
+        names.append("ne")
+    # C-contiguous in file order, so that the transposes returned are views
+    out = {k: np.empty((n3, n2, n1), dtype=dn.dtype) for k in names}
+
+    blk = max(1, dn.chunks[1] // s3.step) if dn.chunks else max(n3, 1)
+
+    for b in range(0, n3, blk):
+        rb = slice(b, min(b + blk, n3))
+        sb = slice(s3.start + rb.start * s3.step, s3.start + rb.stop * s3.step, s3.step)
+
+        ns = mem["ns"].transpose(0, 3, 2, 1)[:, rb] if "ns" in mem else dn[:, sb, s2, s1]
+
+        for k, w in weights.items():
+            if w in mem:
+                ws = mem[w].transpose(0, 3, 2, 1)[: LSP - 1, rb]
+            else:
+                ws = f[f"/{w}all"][: LSP - 1, sb, s2, s1]
+
+            acc = out[k][rb]
+            np.multiply(ns[0], ws[0], out=acc)
+            for i in range(1, LSP - 1):
+                acc += ns[i] * ws[i]
+            acc /= ns[LSP - 1]
+
+        if "ne" in out:
+            out["ne"][rb] = ns[LSP - 1]
+
+    return {k: v.transpose(2, 1, 0) for k, v in out.items()}
+
+
+def frame3d_curvavg(
+    file: Path | h5py.File,
+    var: set[str],
+    xg: dict[str, T.Any] | None = None,
+    *,
+    x1: slice | None = None,
+    x2: slice | None = None,
+    x3: slice | None = None,
+) -> xarray.Dataset:
+    """
+
+    Parameters
+    ----------
+    file: pathlib.Path or h5py.File
+        filename or already-open file of this timestep of simulation output
     var: set of str
         variable(s) to read
+    x1, x2, x3: slice, optional
+        read only this sub-volume (hyperslab)
     """
 
     if not xg:
-        xg = grid(file.parent, var={"x1", "x2", "x3"})
+        xg = grid_coords(_filename(file).parent)
+
+    s1, s2, s3 = _hyperslab(xg, x1, x2, x3)
 
-    dat = xarray.Dataset(coords={"x1": xg["x1"][2:-2], "x2": xg["x2"][2:-2], "x3": xg["x3"][2:-2]})
+    dat = xarray.Dataset(coords=_coords(xg, s1, s2, s3))
 
     p3 = (2, 1, 0)
 
@@ -281,18 +531,61 @@ def frame3d_curvavg(file: Path, var: set[str], xg: dict[str, T.Any] = None) -> x
     if isinstance(var, str):
         var = [var]
 
-    with h5py.File(file, "r") as f:
+    with _open(file) as f:
         var = set(var) if var else f.keys()
 
         for k in var:
             if k == "Phi":
-                dat["Phitop"] = (("x2", "x3"), f[f"/{v2n[k]}"][:].transpose())
+                dat["Phitop"] = (("x2", "x3"), f[f"/{v2n[k]}"][s3, s2].transpose())
             else:
-                dat[k] = (("x1", "x2", "x3"), f[f"/{v2n[k]}"][:].transpose(p3))
+                dat[k] = (("x1", "x2", "x3"), f[f"/{v2n[k]}"][s3, s2, s1].transpose(p3))
 
     return dat
 
 
+def _hyperslab(
+    xg: dict[str, T.Any], x1: slice | None = None, x2: slice | None = None, x3: slice | None = None
+) -> tuple[slice, slice, slice]:
+    """
+    normalize a sub-volume selection to explicit non-negative slices.
+
+    The selection is in (x1, x2, x3) order, sans ghost cells.
+    Readers reverse it to index the HDF5 datasets, which are stored in Fortran order,
+    so that only the selected hyperslab is read from disk.
+    An integer selects a single cell, but keeps that dimension.
+    """
+
+    lx = [xg[k].size - 4 for k in ("x1", "x2", "x3")]
+
+    sel = []
+    for s, n in zip((x1, x2, x3), lx):
+        if s is None:
+            s = slice(None)
+        elif isinstance(s, (int, np.integer)):
+            s = slice(s, s + 1) if s != -1 else slice(s, None)
+        elif not isinstance(s, slice):
+            raise TypeError(f"sub-volume selection must be slice or int, not {type(s)}")
+
+        r = range(n)[s]
+        if r.step < 1:
+            raise ValueError("sub-volume selection must have positive step")
+        sel.append(slice(r.start, max(r.start, r.stop), r.step))
+
+    return sel[0], sel[1], sel[2]
+
+
+def _coords(xg: dict[str, T.Any], s1: slice, s2: slice, s3: slice) -> dict[str, np.ndarray]:
+    """
+    cell-center coordinates of a sub-volume, sans ghost cells
+    """
+
+    return {
+        "x1": xg["x1"][2:-2][s1],
+        "x2": xg["x2"][2:-2][s2],
+        "x3": xg["x3"][2:-2][s3],
+    }
+
+
 def glow_aurmap(file: Path, xg: dict[str, T.Any] = None) -> xarray.Dataset:
     """
     read the auroral output from GLOW
@@ -316,13 +609,18 @@ def glow_aurmap(file: Path, xg: dict[str, T.Any] = None) -> xarray.Dataset:
     return dat
 
 
-def time(file: Path) -> datetime:
+def time(file: Path | h5py.File) -> datetime:
     """
     reads simulation time
+
+    Parameters
+    ----------
+    file: pathlib.Path or h5py.File
+        filename or already-open file
     """
 
     try:
-        with h5py.File(file, "r") as f:
+        with _open(file) as f:
             ymd = datetime(*f["/time/ymd"][:3])
 
             try:
@@ -333,6 +631,117 @@ def time(file: Path) -> datetime:
         t = ymd + timedelta(hours=hour)
     except KeyError:
         logging.error(f"/time group missing from {file}, getting time from filename pattern.")
-        t = filename2datetime(file)
+        t = filename2datetime(_filename(file))
 
     return t
+
+
+def frame(
+    file: Path | h5py.File,
+    var: set[str],
+    *,
+    cfg: dict[str, T.Any] | None = None,
+    xg: dict[str, T.Any] | None = None,
+    x1: slice | None = None,
+    x2: slice | None = None,
+    x3: slice | None = None,
+) -> xarray.Dataset:
+    """
+    read one frame of simulation output, opening the file just once to
+    detect the output type, read the variables and read the time.
+
+    Parameters
+    ----------
+    file: pathlib.Path or h5py.File
+        filename or already-open file of this timestep of simulation output
+    var: set of str
+        variable(s) to read
+    cfg: dict, optional
+        simulation parameters, only used if the file does not tell its output type
+    xg: dict, optional
+        grid coordinates x1, x2, x3, read from simgrid.h5 if not given
+    x1, x2, x3: slice, optional
+        read only this sub-volume (hyperslab)
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        simulation output for this time step
+    """
+
+    sel = {"x1": x1, "x2": x2, "x3": x3}
+
+    if not xg:
+        xg = grid_coords(_filename(file).parent)
+
+    with _open(file) as f:
+        flag = flagoutput(f, cfg)
+
+        if flag == 3:
+            dat = frame3d_curvne(f, xg, **sel)
+        elif flag == 1:
+            dat = frame3d_curv(f, var, xg, **sel)
+        elif flag == 2:
+            dat = frame3d_curvavg(f, var, xg, **sel)
+        else:
+            raise ValueError(f"Unsure how to read {f.filename} with flagoutput {flag}")
+
+        dat.attrs["flagoutput"] = flag
+
+        if "time" not in dat:
+            dat = dat.assign_coords({"time": time(f)})
+
+    return dat
+
+
+def grid_coords(path: Path) -> dict[str, T.Any]:
+    """
+    read just the cell-center coordinates of the simulation grid,
+    opening only simgrid.h5 (the grid size follows from the coordinates)
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        simulation directory or path to simgrid.h5
+
+    Returns
+    -------
+    xg: dict
+        x1, x2, x3 coordinates (with ghost cells) and lx grid size
+    """
+
+    file = find.grid(path)
+
+    def load() -> dict[str, T.Any]:
+        with h5py.File(file, "r") as f:
+            xg: dict[str, T.Any] = {k: f[k][:] for k in ("x1", "x2", "x3")}
+
+        xg["lx"] = np.array([xg[k].size - 4 for k in ("x1", "x2", "x3")])
+        xg["filename"] = file
+
+        return xg
+
+    cache = grid_cache()
+    if cache is None:
+        return load()
+
+    return cache.get(file, load, kind="coords")
+
+
+def _open(file: Path | h5py.File):
+    """
+    context manager yielding an open h5py.File.
+    An already-open file is passed through, and left open for its owner.
+    """
+
+    if isinstance(file, h5py.File):
+        return nullcontext(file)
+
+    return h5py.File(file, "r")
+
+
+def _filename(file: Path | h5py.File) -> Path:
+    if isinstance(file, h5py.File):
+        return Path(file.filename)
+
+    return Path(file)
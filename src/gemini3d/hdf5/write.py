@@ -6,18 +6,61 @@ from __future__ import annotations
 import typing as T
 from pathlib import Path
 from datetime import datetime
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+import functools
+import itertools
 import logging
+import time as _time
+import zlib
 
 import h5py
 import numpy as np
 import xarray
 
-from ..utils import datetime2ymd_hourdec, to_datetime
+from ..utils import datetime2ymd_hourdec, to_datetime, get_cpu_count
+from .. import mpi
+from ..grid.compact import is_compact
 
 CLVL = 3  # GZIP compression level: larger => better compression, slower to write
 
-
-def state(fn: Path, dat: xarray.Dataset):
+# Compression profiles, selected per call or by "compression" in config.nml &setup.
+# Only filters built into libhdf5 are offered, since the Gemini3D Fortran reader must
+# decode every input file: h5py-only filters such as lzf are not readable there.
+PROFILES: dict[str, dict[str, T.Any]] = {
+    "fast": {"compression": None},
+    "balanced": {
+        "compression": "gzip",
+        "compression_opts": CLVL,
+        "shuffle": True,
+        "fletcher32": True,
+    },
+    "archive": {
+        "compression": "gzip",
+        "compression_opts": 9,
+        "shuffle": True,
+        "fletcher32": True,
+    },
+}
+PROFILE = "balanced"
+
+# datasets at least this large have their chunks compressed in a thread pool
+DIRECT_BYTES = 2**22
+
+# chunk layout of full-grid datasets, see chunk_layout()
+LAYOUT = "auto"
+CHUNK_BYTES = 2**22
+# "mpi" chunks are not split below this extent, unless the MPI tile is smaller
+MIN_CHUNK = 8
+
+
+def state(
+    fn: Path,
+    dat: xarray.Dataset,
+    *,
+    compression: str | dict[str, T.Any] | None = None,
+    layout: str | tuple[int, int, int] | None = None,
+):
     """
     write STATE VARIABLE initial conditions
 
@@ -27,22 +70,33 @@ def state(fn: Path, dat: xarray.Dataset):
 
     INPUT ARRAYS SHOULD BE TRIMMED TO THE CORRECT SIZE
     I.E. THEY SHOULD NOT INCLUDE GHOST CELLS
+
+    compression: profile name in PROFILES, or filter settings e.g. from calibrate()
+    layout: chunk layout, see chunk_layout()
     """
 
     logging.info(f"state: {fn}")
 
+    chunks = chunk_layout((dat.sizes["x1"], dat.sizes["x2"], dat.sizes["x3"]), layout)
+
     with h5py.File(fn, "w") as f:
         write_time(f, to_datetime(dat.time))
 
         for k in {"ns", "vs1", "Ts"}:
             if k in dat.data_vars:
-                _write_var(f, f"/{k}all", dat[k])
+                _write_var(f, f"/{k}all", dat[k], compression, chunks)
 
         if "Phitop" in dat.data_vars:
-            _write_var(f, "/Phiall", dat["Phitop"])
+            _write_var(f, "/Phiall", dat["Phitop"], compression, chunks)
 
 
-def _write_var(fid, name: str, A: xarray.DataArray):
+def _write_var(
+    fid,
+    name: str,
+    A: xarray.DataArray,
+    compression: str | dict[str, T.Any] | None = None,
+    layout: tuple[int, int, int] | None = None,
+):
     """
     NOTE: The .transpose() reverses the dimension order.
     The HDF Group never implemented the intended H5T_array_create(..., perm)
@@ -70,18 +124,344 @@ def _write_var(fid, name: str, A: xarray.DataArray):
             f"write_hdf5: unexpected number of dimensions {A.ndim}. Please raise a GitHub Issue."
         )
 
-    fid.create_dataset(
-        name,
-        data=A,
-        dtype=np.float32,  # float32 saves disk space
-        compression="gzip",  # GZIP is universally available with HDF5
-        compression_opts=CLVL,
-        shuffle=True,
-        fletcher32=True,
+    _create_dataset(fid, name, A, compression=compression, layout=layout)
+
+
+def chunk_layout(
+    lx: tuple[int, int, int],
+    layout: str | tuple[int, int, int] | None = None,
+    *,
+    max_cpu: int | None = None,
+) -> tuple[int, int, int] | None:
+    """
+    chunk shape of full-grid datasets
+
+    Parameters
+    ----------
+    lx: tuple of int
+        x1, x2, x3 grid size
+    layout: str or tuple of int, optional
+        "auto" (default LAYOUT): h5py chooses from the dataset shape.
+        "x1": chunks span x2 and x3, for analysis slicing by altitude.
+        "mpi": the x2, x3 tile of each MPI image of the expected decomposition
+        (gemini3d.mpi.partition with max_cpu) is a whole number of chunks, so each image
+        decompresses only its own chunks at simulation startup.
+        x1, x2, x3 tuple: this chunk shape.
+        "mpi" and "x1" chunks are subdivided to at most CHUNK_BYTES of float32,
+        "mpi" chunks along x2, x3 only to divisors of the tile of at least MIN_CHUNK.
+    max_cpu: int, optional
+        MPI image count of the expected decomposition for "mpi". Give the count the
+        simulation will run with: the default, the number of physical CPU cores of this
+        computer, makes the file layout depend on where it was written.
+
+    Returns
+    -------
+    chunks: tuple of int or None
+        x1, x2, x3 chunk shape, None to let h5py choose
+    """
+
+    if layout is None:
+        layout = LAYOUT
+
+    lx = tuple(int(n) for n in lx)
+
+    if not isinstance(layout, str):
+        if len(layout) != 3:
+            raise ValueError("expected x1,x2,x3 chunk shape")
+        return tuple(max(1, min(int(c), n)) for c, n in zip(layout, lx))  # type: ignore
+
+    if layout == "auto" or min(lx) < 1:
+        return None
+    elif layout == "mpi":
+        tile = mpi.tile(lx, max_cpu)
+        c = list(tile)
+        # x1 is always read whole, so need not divide evenly.
+        # x2, x3 step down through divisors of the tile, so it stays a whole number of chunks.
+        while 4 * int(np.prod(c)) > CHUNK_BYTES:
+            smaller = [_next_chunk(n, t, i) for i, (n, t) in enumerate(zip(c, tile))]
+            cand = [i for i, n in enumerate(smaller) if n is not None]
+            if not cand:
+                break
+            i = max(cand, key=lambda j: c[j])
+            c[i] = smaller[i]  # type: ignore
+    elif layout == "x1":
+        c = list(lx)
+        c[0] = max(1, min(lx[0], CHUNK_BYTES // (4 * lx[1] * lx[2])))
+        while 4 * int(np.prod(c)) > CHUNK_BYTES:
+            i = 1 if c[1] >= c[2] else 2
+            c[i] = -(-c[i] // 2)
+    else:
+        raise ValueError(f"unknown chunk layout {layout}")
+
+    return tuple(c)  # type: ignore
+
+
+def _next_chunk(n: int, tile: int, axis: int) -> int | None:
+    """next smaller "mpi" chunk extent, or None if n is as small as allowed"""
+
+    lo = min(MIN_CHUNK, tile)
+    if axis == 0:
+        return max(lo, -(-n // 2)) if n > lo else None
+
+    return max((d for d in range(lo, n) if tile % d == 0), default=None)
+
+
+def filters(compression: str | dict[str, T.Any] | None = None) -> dict[str, T.Any]:
+    """
+    h5py dataset filter settings of a compression profile
+
+    Parameters
+    ----------
+    compression: str or dict, optional
+        profile name in PROFILES (default PROFILE), or filter settings
+        compression, compression_opts, shuffle, fletcher32 e.g. from calibrate()
+
+    Returns
+    -------
+    filters: dict
+        keyword arguments of h5py create_dataset
+    """
+
+    if compression is None:
+        compression = PROFILE
+
+    if isinstance(compression, str):
+        try:
+            return dict(PROFILES[compression])
+        except KeyError:
+            raise ValueError(
+                f"unknown compression profile {compression}, use one of {list(PROFILES)}"
+            )
+
+    out = dict(compression)
+    if not set(out) <= {"compression", "compression_opts", "shuffle", "fletcher32"}:
+        raise ValueError(f"unknown filter settings {out}")
+    if out.get("compression") not in {None, "gzip"}:
+        raise ValueError(f"{out['compression']} cannot be read by Gemini3D, only gzip")
+
+    return out
+
+
+def calibrate(
+    A: np.ndarray,
+    *,
+    ratio: float = 0.5,
+    candidates: list[dict[str, T.Any]] | None = None,
+) -> dict[str, T.Any]:
+    """
+    benchmark filter settings by writing a representative array to an in-memory file,
+    and pick the fastest one whose stored size is at most ratio of the uncompressed float32 size.
+    If no candidate meets ratio, the one with the smallest output is returned.
+
+    Parameters
+    ----------
+    A: np.ndarray
+        representative array, e.g. one species of the initial conditions
+    ratio: float
+        target stored size / float32 size
+    candidates: list of dict, optional
+        filter settings to try, default the profiles and each gzip level with shuffle
+
+    Returns
+    -------
+    filters: dict
+        best filter settings, usable as compression= of the writers
+    """
+
+    if candidates is None:
+        candidates = [filters(p) for p in PROFILES]
+        candidates += [
+            {"compression": "gzip", "compression_opts": i, "shuffle": True, "fletcher32": True}
+            for i in range(1, 10)
+            if i not in {p.get("compression_opts") for p in PROFILES.values()}
+        ]
+
+    A = np.asarray(A, dtype=np.float32)
+
+    best: tuple[bool, float, dict[str, T.Any]] | None = None
+
+    for i, c in enumerate(candidates):
+        c = filters(c)
+        with h5py.File(f"calibrate{i}.h5", "w", driver="core", backing_store=False) as f:
+            tic = _time.perf_counter()
+            _create_dataset(f, "A", A, compression=c)
+            f.flush()
+            elapsed = _time.perf_counter() - tic
+            stored = f["A"].id.get_storage_size() / max(A.nbytes, 1)
+
+        logging.info(f"calibrate: {c}  {elapsed:.3f} s  ratio {stored:.3f}")
+
+        met = stored <= ratio
+        key = elapsed if met else stored
+        if best is None or (met, -key) > (best[0], -best[1]):
+            best = (met, key, c)
+
+    assert best is not None, "no compression candidates"
+
+    return best[2]
+
+
+def _create_dataset(
+    fid,
+    name: str,
+    data,
+    *,
+    shape: tuple[int, ...] | None = None,
+    compression: str | dict[str, T.Any] | None = None,
+    layout: tuple[int, int, int] | None = None,
+):
+    """
+    write float32 dataset with filters read by Gemini3D, by default gzip, shuffle and fletcher32.
+
+    layout is the x1, x2, x3 chunk shape of a full-grid dataset, whose dimensions are
+    (..., x3, x2, x1) or (x3, x2). Leading dimensions such as species are not split.
+
+    Large gzip datasets are split into their HDF5 chunks, which are filtered concurrently in
+    a thread pool (zlib releases the GIL) and stored with write_direct_chunk.
+    The filter pipeline is that of libhdf5, so files are read as usual including by
+    h5fortran, and the stored chunks are identical to those libhdf5 would write.
+
+    Compact grid fields (broadcast views and LazyField, see gemini3d.grid.compact) are not
+    expanded in full: they are converted and written one slab of chunks along the leading
+    dimensions at a time, and constant fields are stored as the dataset fill value.
+    """
+
+    if is_compact(data) and (shape is None or tuple(data.shape) == tuple(shape)):
+        A = data
+    else:
+        A = np.asarray(data, dtype=np.float32)  # float32 saves disk space
+        if shape is not None:
+            A = A.reshape(shape)
+
+    opts = filters(compression)
+
+    if isinstance(A, np.ndarray) and A.size and not any(A.strides):
+        # constant field: stored as the fill value, no data is written
+        fid.create_dataset(name, shape=A.shape, dtype=np.float32, fillvalue=A.flat[0], **opts)
+        return
+
+    if layout is not None and A.ndim >= 2 and any(opts.values()):
+        c = layout[::-1] if A.ndim >= 3 else layout[2:0:-1]
+        n = len(c)
+        opts["chunks"] = (*A.shape[:-n], *(min(a, b) for a, b in zip(c, A.shape[-n:])))
+
+    nbytes = A.size * np.dtype(np.float32).itemsize
+
+    if nbytes < DIRECT_BYTES:
+        fid.create_dataset(name, data=np.asarray(A, dtype=np.float32), **opts)
+        return
+
+    if opts.get("compression") != "gzip":
+        if not is_compact(A):
+            fid.create_dataset(name, data=A, **opts)
+            return
+        dset = fid.create_dataset(name, shape=A.shape, dtype=np.float32, **opts)
+        for sel in _slabs(A.shape, dset.chunks):
+            dset[sel] = np.asarray(A[sel], dtype=np.float32)
+        return
+
+    dset = fid.create_dataset(name, shape=A.shape, dtype=np.float32, **opts)
+
+    fun = functools.partial(
+        _filter_chunk,
+        chunks=dset.chunks,
+        level=dset.compression_opts,
+        shuffle=dset.shuffle,
+        fletcher32=dset.fletcher32,
     )
 
+    chunks = dset.chunks
+    workers = max(1, get_cpu_count())
+
+    pending: deque[tuple[tuple[int, ...], Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for sel in _slabs(A.shape, chunks):
+            slab = np.asarray(A[sel], dtype=np.float32)
+            lead = tuple(s.start for s in sel)
+            inner = (range(0, n, c) for n, c in zip(slab.shape[len(sel) :], chunks[len(sel) :]))
+            for off in itertools.product(*inner):
+                o = (*lead, *off)
+                block = slab[
+                    (Ellipsis,) + tuple(slice(i, i + c) for i, c in zip(off, chunks[len(sel) :]))
+                ]
+                pending.append((o, pool.submit(fun, block)))
+                if len(pending) >= 2 * workers:
+                    oo, fut = pending.popleft()
+                    dset.id.write_direct_chunk(oo, fut.result())
+        while pending:
+            oo, fut = pending.popleft()
+            dset.id.write_direct_chunk(oo, fut.result())
+
+
+def _slabs(shape: tuple[int, ...], chunks: tuple[int, ...] | None) -> T.Iterator[tuple[slice, ...]]:
+    """
+    selections of one chunk along each leading dimension, all but the last two,
+    spanning the last two dimensions in full
+    """
+
+    lead = shape[:-2]
+    step = chunks[: len(lead)] if chunks else (1,) * len(lead)
+
+    for off in itertools.product(*(range(0, n, c) for n, c in zip(lead, step))):
+        yield tuple(slice(o, min(o + c, n)) for o, c, n in zip(off, step, lead))
+
+
+def _filter_chunk(
+    block: np.ndarray, *, chunks: tuple[int, ...], level: int, shuffle: bool, fletcher32: bool
+) -> bytes:
+    """
+    HDF5 shuffle -> deflate -> fletcher32 of one chunk.
+    Edge chunks are stored full size, zero padded.
+    """
+
+    if block.shape != chunks:
+        full = np.zeros(chunks, dtype=block.dtype)
+        full[tuple(slice(0, n) for n in block.shape)] = block
+        block = full
+
+    raw = np.ascontiguousarray(block).view(np.uint8).reshape(-1, block.itemsize)
+    if shuffle:
+        shuffled = np.empty(raw.shape[::-1], dtype=np.uint8)
+        for i in range(block.itemsize):
+            shuffled[i] = raw[:, i]
+        raw = shuffled
+
+    buf = zlib.compress(raw.tobytes(), level)
+
+    if fletcher32:
+        buf += _fletcher32(buf).to_bytes(4, "little")
+
+    return buf
+
+
+def _fletcher32(buf: bytes) -> int:
+    """
+    HDF5 Fletcher-32 checksum (H5_checksum_fletcher32) of big-endian 16-bit words.
+    The sums are taken modulo 65535 in closed form, where HDF5 folds them every 360 words;
+    HDF5 represents a nonzero multiple of 65535 as 65535.
+    """
+
+    if len(buf) % 2:
+        buf += b"\0"
 
-def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
+    w = np.frombuffer(buf, dtype=">u2").astype(np.int64)
+    s1 = int(w.sum())
+    s2 = int(np.cumsum(w).sum())
+
+    def fold(s: int) -> int:
+        return (s - 1) % 65535 + 1 if s else 0
+
+    return (fold(s2) << 16) | fold(s1)
+
+
+def grid(
+    size_fn: Path,
+    grid_fn: Path,
+    xg: dict[str, T.Any],
+    *,
+    compression: str | dict[str, T.Any] | None = None,
+    layout: str | tuple[int, int, int] | None = None,
+):
     """writes grid to disk
 
     Parameters
@@ -93,6 +473,10 @@ def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
         file to write
     xg: dict
         grid values
+    compression: str or dict, optional
+        compression profile, see filters()
+    layout: str or tuple of int, optional
+        chunk layout of full-grid datasets, see chunk_layout()
 
     NOTE: The .transpose() reverses the dimension order.
     The HDF Group never implemented the intended H5T_array_create(..., perm)
@@ -105,6 +489,8 @@ def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
     if "lx" not in xg:
         xg["lx"] = np.array((xg["x1"].shape, xg["x2"].shape, xg["x3"].shape)).astype(np.int32)
 
+    chunks = chunk_layout(xg["lx"], layout)
+
     logging.info(f"write_grid: {size_fn}")
     with h5py.File(size_fn, "w") as h:
         h["/lx"] = np.asarray(xg["lx"]).astype(np.int32)
@@ -127,15 +513,7 @@ def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
                     continue
 
                 if xg[k].ndim >= 2:
-                    h.create_dataset(
-                        f"/{k}",
-                        data=xg[k].transpose(),
-                        dtype=np.float32,
-                        compression="gzip",
-                        compression_opts=CLVL,
-                        shuffle=True,
-                        fletcher32=True,
-                    )
+                    _create_dataset(h, f"/{k}", xg[k].transpose(), compression=compression)
                 else:
                     h[f"/{k}"] = xg[k].astype(np.float32)
 
@@ -160,15 +538,13 @@ def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
                 logging.info(f"SKIP: {k}")
                 continue
 
-            h.create_dataset(
+            _create_dataset(
+                h,
                 f"/{k}",
+                xg[k].transpose(),
                 shape=xg["lx"][::-1],
-                data=xg[k].transpose(),
-                dtype=np.float32,
-                compression="gzip",
-                compression_opts=CLVL,
-                shuffle=True,
-                fletcher32=True,
+                compression=compression,
+                layout=chunks,
             )
 
         # %% 2-D
@@ -177,15 +553,13 @@ def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
                 logging.info(f"SKIP: {k}")
                 continue
 
-            h.create_dataset(
+            _create_dataset(
+                h,
                 f"/{k}",
+                xg[k].transpose(),
                 shape=(xg["lx"][1], xg["lx"][2])[::-1],
-                data=xg[k].transpose(),
-                dtype=np.float32,
-                compression="gzip",
-                compression_opts=CLVL,
-                shuffle=True,
-                fletcher32=True,
+                compression=compression,
+                layout=chunks,
             )
 
         # %% 4-D
@@ -194,15 +568,13 @@ def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
                 logging.info(f"SKIP: {k}")
                 continue
 
-            h.create_dataset(
+            _create_dataset(
+                h,
                 f"/{k}",
+                xg[k].transpose(),
                 shape=(*xg["lx"], 3)[::-1],
-                data=xg[k].transpose(),
-                dtype=np.float32,
-                compression="gzip",
-                compression_opts=CLVL,
-                shuffle=True,
-                fletcher32=True,
+                compression=compression,
+                layout=chunks,
             )
 
         if "glonctr" in xg:
@@ -210,9 +582,33 @@ def grid(size_fn: Path, grid_fn: Path, xg: dict[str, T.Any]):
             h["/glatctr"] = xg["glatctr"]
 
 
-def Efield(outdir: Path, E: xarray.Dataset):
+def Efield(
+    outdir: Path,
+    E: xarray.Dataset,
+    *,
+    workers: int | None = 1,
+    processes: bool = True,
+    compression: str | dict[str, T.Any] | None = None,
+):
     """
-    write Efield to disk
+    write Efield to disk, one file per time step
+
+    Parameters
+    ----------
+    outdir: pathlib.Path
+        directory to write files into
+    E: xarray.Dataset
+        electric field (time, mlon, mlat)
+    workers: int, optional
+        number of workers writing frames, default 1 (serial), None for the number of
+        physical CPU cores
+    processes: bool, optional
+        write in worker processes (default) instead of threads. Where processes are spawned
+        (macOS, Windows), the calling script needs an if __name__ == "__main__" guard.
+        h5py holds the GIL, so worker threads only write in parallel for frames with
+        datasets of at least DIRECT_BYTES, whose chunks are compressed by zlib without it.
+    compression: str or dict, optional
+        compression profile, see filters()
     """
 
     with h5py.File(outdir / "simsize.h5", "w") as f:
@@ -223,30 +619,57 @@ def Efield(outdir: Path, E: xarray.Dataset):
         f["/mlon"] = E.mlon.astype(np.float32)
         f["/mlat"] = E.mlat.astype(np.float32)
 
-    for t in E.time:
-        time: datetime = to_datetime(t)
-        fn = outdir / (datetime2ymd_hourdec(time) + ".h5")
+    writer = functools.partial(_Efield_frame, compression=compression)
 
-        # FOR EACH FRAME WRITE A BC TYPE AND THEN OUTPUT BACKGROUND AND BCs
-        with h5py.File(fn, "w") as f:
-            f["/flagdirich"] = E["flagdirich"].loc[time].astype(np.int32)
-            write_time(f, time)
+    _write_frames(outdir, E, writer, workers, processes)
 
-            for k in {"Exit", "Eyit", "Vminx1it", "Vmaxx1it"}:
-                f.create_dataset(
-                    f"/{k}",
-                    data=E[k].loc[time].transpose(),
-                    dtype=np.float32,
-                    compression="gzip",
-                    compression_opts=CLVL,
-                    shuffle=True,
-                    fletcher32=True,
-                )
-            for k in {"Vminx2ist", "Vmaxx2ist", "Vminx3ist", "Vmaxx3ist"}:
-                f[f"/{k}"] = E[k].loc[time].astype(np.float32)
 
+def _Efield_frame(
+    fn: Path,
+    time: datetime,
+    E: dict[str, np.ndarray],
+    *,
+    compression: str | dict[str, T.Any] | None,
+):
+    # FOR EACH FRAME WRITE A BC TYPE AND THEN OUTPUT BACKGROUND AND BCs
+    with h5py.File(fn, "w") as f:
+        f["/flagdirich"] = E["flagdirich"].astype(np.int32)
+        write_time(f, time)
+
+        for k in ("Exit", "Eyit", "Vminx1it", "Vmaxx1it"):
+            _create_dataset(f, f"/{k}", E[k].transpose(), compression=compression)
+        for k in ("Vminx2ist", "Vmaxx2ist", "Vminx3ist", "Vmaxx3ist"):
+            f[f"/{k}"] = E[k].astype(np.float32)
+
+
+def precip(
+    outdir: Path,
+    P: xarray.Dataset,
+    *,
+    workers: int | None = 1,
+    processes: bool = True,
+    compression: str | dict[str, T.Any] | None = None,
+):
+    """
+    write precipitation to disk, one file per time step
 
-def precip(outdir: Path, P: xarray.Dataset):
+    Parameters
+    ----------
+    outdir: pathlib.Path
+        directory to write files into
+    P: xarray.Dataset
+        precipitation (time, mlon, mlat)
+    workers: int, optional
+        number of workers writing frames, default 1 (serial), None for the number of
+        physical CPU cores
+    processes: bool, optional
+        write in worker processes (default) instead of threads. Where processes are spawned
+        (macOS, Windows), the calling script needs an if __name__ == "__main__" guard.
+        h5py holds the GIL, so worker threads only write in parallel for frames with
+        datasets of at least DIRECT_BYTES, whose chunks are compressed by zlib without it.
+    compression: str or dict, optional
+        compression profile, see filters()
+    """
 
     with h5py.File(outdir / "simsize.h5", "w") as f:
         f.create_dataset("/llon", data=P.mlon.size, dtype=np.int32)
@@ -256,23 +679,67 @@ def precip(outdir: Path, P: xarray.Dataset):
         f["/mlon"] = P.mlon.astype(np.float32)
         f["/mlat"] = P.mlat.astype(np.float32)
 
-    for t in P.time:
-        time: datetime = to_datetime(t)
-        fn = outdir / (datetime2ymd_hourdec(time) + ".h5")
-
-        with h5py.File(fn, "w") as f:
-            write_time(f, to_datetime(time))
-
-            for k in {"Q", "E0"}:
-                f.create_dataset(
-                    f"/{k}p",
-                    data=P[k].loc[time].transpose(),
-                    dtype=np.float32,
-                    compression="gzip",
-                    compression_opts=CLVL,
-                    shuffle=True,
-                    fletcher32=True,
-                )
+    writer = functools.partial(_precip_frame, compression=compression)
+
+    _write_frames(outdir, P, writer, workers, processes)
+
+
+def _precip_frame(
+    fn: Path,
+    time: datetime,
+    P: dict[str, np.ndarray],
+    *,
+    compression: str | dict[str, T.Any] | None,
+):
+    with h5py.File(fn, "w") as f:
+        write_time(f, time)
+
+        for k in ("Q", "E0"):
+            _create_dataset(f, f"/{k}p", P[k].transpose(), compression=compression)
+
+
+def _write_frames(
+    outdir: Path,
+    dat: xarray.Dataset,
+    writer: T.Callable[[Path, datetime, dict[str, np.ndarray]], None],
+    workers: int | None,
+    processes: bool,
+):
+    """
+    write each time step of dat to its own file with writer(filename, time, frame).
+    Frames are submitted in time order, and at most two frames per worker are in flight.
+    The files are independent, so their contents do not depend on the number of workers.
+    """
+
+    times = [to_datetime(t) for t in dat.time]
+
+    if workers is None:
+        workers = get_cpu_count()
+    workers = max(1, min(workers, len(times)))
+
+    def job(time: datetime) -> tuple:
+        frame = {k: np.asarray(v.loc[time].values) for k, v in dat.data_vars.items()}
+        return outdir / (datetime2ymd_hourdec(time) + ".h5"), time, frame
+
+    if workers == 1:
+        for t in times:
+            writer(*job(t))
+        return
+
+    Executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+
+    pending: deque[Future] = deque()
+    with Executor(max_workers=workers) as pool:
+        try:
+            for t in times:
+                pending.append(pool.submit(writer, *job(t)))
+                if len(pending) >= 2 * workers:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+        finally:
+            for fut in pending:
+                fut.cancel()
 
 
 def maggrid(fn: Path, mag: dict[str, T.Any], gridsize: tuple[int, int, int]):
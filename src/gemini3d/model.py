@@ -10,16 +10,21 @@ import typing as T
 import shutil
 
 from .config import read_nml
-from .grid import cartesian, tilted_dipole
+from .grid import cartesian, tilted_dipole, store
 from .plasma import equilibrium_state, equilibrium_resample
 from .efield import Efield_BCs
 from .particles import particles_BCs
-from .utils import str2func
+from .utils import str2func, git_meta
 from . import namelist
+from . import read
 from . import write
 
 __all__ = ["setup", "config"]
 
+# grid variables read by the default setup steps: equilibrium_state, equilibrium_resample,
+# Efield_BCs and particles_BCs
+SETUP_VAR = {"x1", "x2", "x3", "alt", "glat", "glon", "gx1", "h1", "h2", "h3", "r", "theta", "phi"}
+
 
 def config(params: dict[str, T.Any], out_dir: Path):
     """
@@ -145,24 +150,37 @@ def setup(path: Path | dict[str, T.Any], out_dir: Path, root: Path = None):
 
 def equilibrium(cfg: dict[str, T.Any]):
     # %% GRID GENERATION
-
-    if "lxp" in cfg and "lyp" in cfg:
-        xg = cartesian.cart3d(cfg)
-    elif "lq" in cfg and "lp" in cfg and "lphi" in cfg:
-        xg = tilted_dipole.tilted_dipole3d(cfg)
-    else:
-        raise ValueError("grid does not seem to be cartesian or curvilinear")
-
-    write.grid(cfg, xg)
+    xg = grid(cfg)
 
     # %% Equilibrium input generation
     dat = equilibrium_state(cfg, xg)
 
-    write.state(cfg["indat_file"], dat)
+    write.state(cfg["indat_file"], dat, compression=cfg.get("compression"))
 
 
 def interp(cfg: dict[str, T.Any]) -> None:
 
+    xg = grid(cfg)
+
+    equilibrium_resample(cfg, xg, write_grid=False)
+
+    postprocess(cfg, xg)
+
+
+def grid(cfg: dict[str, T.Any]) -> dict[str, T.Any]:
+    """
+    generate and write the simulation grid, or reuse the grid files from the
+    grid store if enabled, see gemini3d.grid.store.
+
+    A generated grid is returned as is, with its compact and lazy fields.
+    A reused grid is read from its file at the float32 precision the simulation uses,
+    only the variables in SETUP_VAR unless &setup setup_functions may need others.
+    """
+
+    if store.fetch(cfg):
+        write.meta(cfg["indat_size"].parent / "setup_grid.json", git_meta(), cfg)
+        return read.grid(cfg["indat_grid"], var=None if "setup_functions" in cfg else SETUP_VAR)
+
     if "lxp" in cfg and "lyp" in cfg:
         xg = cartesian.cart3d(cfg)
     elif "lq" in cfg and "lp" in cfg and "lphi" in cfg:
@@ -170,9 +188,11 @@ def interp(cfg: dict[str, T.Any]) -> None:
     else:
         raise ValueError("grid does not seem to be cartesian or curvilinear")
 
-    equilibrium_resample(cfg, xg)
+    write.grid(cfg, xg)
 
-    postprocess(cfg, xg)
+    store.put(cfg)
+
+    return xg
 
 
 def postprocess(cfg: dict[str, T.Any], xg: dict[str, T.Any]) -> None:
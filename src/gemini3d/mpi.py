@@ -3,7 +3,7 @@ from pathlib import Path
 import math
 
 from .utils import get_cpu_count
-from . import read
+from .hdf5 import read as h5read
 
 
 def count(path: Path, max_cpu: int) -> int:
@@ -20,7 +20,7 @@ def count(path: Path, max_cpu: int) -> int:
         detect number of physical CPU
     """
 
-    return max_mpi(read.simsize(path), max_cpu)
+    return max_mpi(h5read.simsize(path), max_cpu)
 
 
 def max_mpi(size: tuple[int, ...], max_cpu: int) -> int:
@@ -28,23 +28,55 @@ def max_mpi(size: tuple[int, ...], max_cpu: int) -> int:
     goal is to find the highest x2 + x3 to maximum CPU core count
     """
 
+    lid2, lid3 = partition(size, max_cpu)
+
+    return lid2 * lid3
+
+
+def partition(size: tuple[int, ...], max_cpu: int | None) -> tuple[int, int]:
+    """
+    MPI image counts along x2 and x3 that evenly partition the simulation grid,
+    using the most CPU cores up to max_cpu
+
+    Parameters
+    ----------
+    size: tuple of int
+        x1, x2, x3 grid size
+    max_cpu: int
+        maximum number of MPI images, default the number of physical CPU cores
+
+    Returns
+    -------
+    lid2, lid3: int
+        number of MPI images along x2, x3
+    """
+
     if len(size) != 3:
         raise ValueError("expected x1,x2,x3")
 
     if not max_cpu:
-        max_cpu = get_cpu_count()
+        # may be zero on a single core without psutil
+        max_cpu = max(1, get_cpu_count())
 
     if size[2] == 1:
         # 2D sim
-        N = max_gcd(size[1], max_cpu)
+        return max_gcd(size[1], max_cpu), 1
     elif size[1] == 1:
         # 2D sim
-        N = max_gcd(size[2], max_cpu)
-    else:
-        # 3D sim
-        N = max_gcd2(size[1:], max_cpu)
+        return 1, max_gcd(size[2], max_cpu)
 
-    return N
+    # 3D sim
+    return _max_gcd2(size[1:], max_cpu)
+
+
+def tile(size: tuple[int, ...], max_cpu: int | None) -> tuple[int, int, int]:
+    """
+    x1, x2, x3 size of the sub-grid of each MPI image, see partition()
+    """
+
+    lid2, lid3 = partition(size, max_cpu)
+
+    return size[0], size[1] // lid2, size[2] // lid3
 
 
 def max_gcd(s: int, M: int) -> int:
@@ -76,6 +108,16 @@ def max_gcd2(s: tuple[int, ...] | list[int], M: int) -> int:
     2. choose partition that yields highest CPU count usage
     """
 
+    i, j = _max_gcd2(s, M)
+
+    return i * j
+
+
+def _max_gcd2(s: tuple[int, ...] | list[int], M: int) -> tuple[int, int]:
+    """
+    partition of max_gcd2 as x2, x3 factors
+    """
+
     if len(s) != 2:
         raise ValueError("expected x2,x3")
 
@@ -85,10 +127,10 @@ def max_gcd2(s: tuple[int, ...] | list[int], M: int) -> int:
     f2 = [max_gcd(s[0], m) for m in range(M, 0, -1)]
     f3 = [max_gcd(s[1], m) for m in range(M, 0, -1)]
 
-    N = 1
+    N = (1, 1)
     for i in f2:
         for j in f3:
-            if M >= i * j > N:
+            if M >= i * j > N[0] * N[1]:
                 # print(i,j)
-                N = i * j
+                N = (i, j)
     return N
@@ -23,10 +23,10 @@ KB = 1.38e-23
 AMU = 1.67e-27
 
 
-def equilibrium_resample(p: dict[str, T.Any], xg: dict[str, T.Any]):
+def equilibrium_resample(p: dict[str, T.Any], xg: dict[str, T.Any], *, write_grid: bool = True):
     """
     read and interpolate equilibrium simulation data, writing new
-    interpolated grid.
+    interpolated grid unless write_grid is False.
     """
 
     # %% download equilibrium data if needed and specified
@@ -46,7 +46,7 @@ def equilibrium_resample(p: dict[str, T.Any], xg: dict[str, T.Any]):
     t_eq_end = peq["time"][-1]
 
     # %% LOAD THE last equilibrium frame
-    dat = read.frame(p["eq_dir"], t_eq_end)
+    dat = read.frame(p["eq_dir"], t_eq_end, var={"ns", "vs1", "Ts"})
     if not dat:
         raise FileNotFoundError(f"{p['eq_dir']} does not have data for {t_eq_end}")
 
@@ -66,9 +66,10 @@ def equilibrium_resample(p: dict[str, T.Any], xg: dict[str, T.Any]):
     check_temperature(dat_interp["Ts"])
 
     # %% WRITE OUT THE GRID
-    write.grid(p, xg)
+    if write_grid:
+        write.grid(p, xg)
 
-    write.state(p["indat_file"], dat_interp)
+    write.state(p["indat_file"], dat_interp, compression=p.get("compression"))
 
 
 def model_resample(
@@ -4,6 +4,7 @@ import typing as T
 from datetime import datetime
 import logging
 import numpy as np
+import xarray
 import matplotlib as mpl
 
 from .. import read
@@ -57,9 +58,9 @@ def plot_all(direc: Path, var: set[str] = None, saveplot_fmt: str = ""):
     plotfun = grid2plotfun(xg)
     cfg = read.config(direc)
 
-    # %% loop over files / time
-    for t in cfg["time"]:
-        frame(direc, time=t, var=var, saveplot_fmt=saveplot_fmt, xg=xg, cfg=cfg, plotfun=plotfun)
+    # %% loop over files / time, reading the next frames while plotting this one
+    for dat in read.iter_frames(direc, var, times=cfg["time"]):
+        frame(direc, dat=dat, var=var, saveplot_fmt=saveplot_fmt, xg=xg, cfg=cfg, plotfun=plotfun)
 
 
 def frame(
@@ -71,6 +72,7 @@ def frame(
     var: set[str] = None,
     xg: dict[str, T.Any] = None,
     cfg: dict[str, T.Any] = None,
+    dat: xarray.Dataset | None = None,
 ):
     """
     Parameters
@@ -80,6 +82,8 @@ def frame(
         filename or directory + time to plot
     time: datetime.datetime, optional
         if path is a directory, time is required
+    dat: xarray.Dataset, optional
+        data already read for this frame, with path the simulation directory
     """
 
     if not var:
@@ -89,12 +93,13 @@ def frame(
     if not cfg:
         cfg = read.config(path)
 
-    if time is None:
-        # read a specific filename
-        dat = read.data(path, var)
-        path = path.parent
-    else:
-        dat = read.frame(path, time, var=var)
+    if dat is None:
+        if time is None:
+            # read a specific filename
+            dat = read.data(path, var)
+            path = path.parent
+        else:
+            dat = read.frame(path, time, var=var)
 
     if not xg:
         xg = read.grid(path)
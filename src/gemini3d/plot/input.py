@@ -1,5 +1,6 @@
 from __future__ import annotations
 from pathlib import Path
+from datetime import datetime
 import typing as T
 import logging
 
@@ -70,15 +71,9 @@ def Efield(direc: Path):
     path = find.inputs(direc, cfg.get("E0dir"))
 
     time = datetime_range(cfg["time"][0], cfg["time"][0] + cfg["tdur"], cfg["dtE0"])
-    for t in time:
-        try:
-            file = find.frame(path, t)
-        except FileNotFoundError:
-            logging.error(f"no E-field data found at {t} in {path}")
-            continue
-
-        dat = read.Efield(file)
+    files = _input_files(path, time, "E-field")
 
+    for t, dat in zip(files, read.iter_data(files.values(), read.Efield)):
         for k in {"Exit", "Eyit", "Vminx1it", "Vmaxx1it", "Vminx2ist", "Vmaxx2ist"}:
             if dat[k].ndim == 1:
                 fg = plot2d_input(dat[k], cfg)
@@ -106,16 +101,9 @@ def precip(direc: Path):
     precip_path = find.inputs(direc, cfg.get("precdir"))
 
     time = datetime_range(cfg["time"][0], cfg["time"][0] + cfg["tdur"], cfg["dtprec"])
+    files = _input_files(precip_path, time, "precipitation")
 
-    for t in time:
-        try:
-            file = find.frame(precip_path, t)
-        except FileNotFoundError:
-            logging.error(f"no precipitation data found at {t} in {precip_path}")
-            continue
-
-        dat = read.precip(file)
-
+    for t, dat in zip(files, read.iter_data(files.values(), read.precip)):
         for k in {"E0", "Q"}:
             if dat[k].ndim == 1:
                 fg = plot2d_input(dat[k], cfg)
@@ -127,6 +115,21 @@ def precip(direc: Path):
             save_fig(fg, direc, name=f"precip-{k}", time=t)
 
 
+def _input_files(path: Path, time: list[datetime], name: str) -> dict[datetime, Path]:
+    """
+    input files at each time, skipping times without a file
+    """
+
+    files = {}
+    for t in time:
+        try:
+            files[t] = find.frame(path, t)
+        except FileNotFoundError:
+            logging.error(f"no {name} data found at {t} in {path}")
+
+    return files
+
+
 def plot2d_input(A, cfg: dict[str, T.Any]) -> Figure:
     fg = Figure()
     ax = fg.gca()
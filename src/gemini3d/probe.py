@@ -0,0 +1,464 @@
+"""
+virtual probes: time series of simulation output at points or along trajectories
+
+A probe sample is a (time, glat, glon, alt). Each sample is interpolated linearly in space
+from the eight grid cells around it, and linearly in time between the two bracketing
+output frames. Only the cells the samples need are read from each frame,
+so the cost scales with the number of samples rather than the grid volume.
+
+Example: a satellite track
+
+    dat = gemini3d.probe.track(simdir, time, glat, glon, alt, var={"ne", "Ti"})
+
+Example: fixed radar beam gates at every output time
+
+    dat = gemini3d.probe.points(simdir, glat, glon, alt, var="ne")
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+import typing as T
+
+import h5py
+import numpy as np
+import xarray
+
+from . import read
+from . import find
+from .hdf5 import read as h5read
+from .grid.gridmodeldata import geog2dipole, geog2UENgeog
+
+__all__ = ["track", "iter_track", "points", "model_coords", "Stencil"]
+
+# samples are grouped so that each group's bounding hyperslab is no more than
+# this many cells per sample, and each frame is read one hyperslab per group
+BOX_CELLS_PER_SAMPLE = 64
+
+
+def track(
+    simdir: Path,
+    time: T.Sequence[datetime],
+    glat,
+    glon,
+    alt,
+    var: set[str] | None = None,
+) -> xarray.Dataset:
+    """
+    interpolate simulation output to samples along a trajectory
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    time: sequence of datetime.datetime
+        time of each sample
+    glat, glon: array_like
+        geographic latitude, longitude [degrees] of each sample
+    alt: array_like
+        altitude [meters] of each sample
+    var: set of str, optional
+        3-D variable(s) to probe, default {"ne"}
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        probed variables, NaN where the sample is outside the simulation grid or run.
+        Empty if there are no samples.
+    """
+
+    time = list(time)
+
+    if not time:
+        return xarray.Dataset(
+            {k: ("sample", np.empty(0)) for k in _variables(var)},
+            coords={k: ("sample", np.empty(0)) for k in ("time", "glat", "glon", "alt")},
+        )
+
+    dat: dict[str, np.ndarray] = {}
+    for part in iter_track(simdir, time, glat, glon, alt, var):
+        for k, v in part.data_vars.items():
+            if k not in dat:
+                dat[k] = np.full(len(time), np.nan, dtype=v.dtype)
+            dat[k][part.sample.values] = v.values
+
+    out = xarray.Dataset(
+        {k: ("sample", v) for k, v in dat.items()},
+        coords={
+            "time": ("sample", time),
+            "glat": ("sample", np.broadcast_to(glat, len(time))),
+            "glon": ("sample", np.broadcast_to(glon, len(time))),
+            "alt": ("sample", np.broadcast_to(alt, len(time))),
+        },
+    )
+
+    return out
+
+
+def iter_track(
+    simdir: Path,
+    time: T.Sequence[datetime],
+    glat,
+    glon,
+    alt,
+    var: set[str] | None = None,
+) -> T.Iterator[xarray.Dataset]:
+    """
+    stream interpolated samples along a trajectory, see track().
+
+    Frames are read in time order, one at a time. Samples are yielded as soon as their
+    later bracketing frame has been read, so results for early samples are available
+    before the whole run is read.
+
+    Yields
+    ------
+    dat: xarray.Dataset
+        the samples completed by the latest frame, indexed by the "sample" coordinate
+    """
+
+    simdir = Path(simdir).expanduser()
+
+    xg = _grid(simdir)
+    stencil = Stencil(xg, *model_coords(xg, alt, glon, glat))
+
+    time = list(time)
+    if stencil.size == 1 and len(time) > 1:
+        stencil = stencil.take(np.zeros(len(time), dtype=int))
+    elif stencil.size != len(time):
+        raise ValueError(f"{len(time)} sample times but {stencil.size} sample positions")
+
+    yield from _stream(simdir, time, stencil, np.arange(len(time)), var, xg)
+
+
+def points(
+    simdir: Path,
+    glat,
+    glon,
+    alt,
+    var: set[str] | None = None,
+    *,
+    times: list[datetime] | None = None,
+) -> xarray.Dataset:
+    """
+    time series at fixed points. The interpolation stencil is computed once.
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    glat, glon: array_like
+        geographic latitude, longitude [degrees] of each point
+    alt: array_like
+        altitude [meters] of each point
+    var: set of str, optional
+        3-D variable(s) to probe, default {"ne"}
+    times: list of datetime.datetime, optional
+        times to probe, default all output times in config.nml
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        probed variables (time, point)
+    """
+
+    simdir = Path(simdir).expanduser()
+
+    if times is None:
+        times = read.config(simdir)["time"]
+
+    xg = _grid(simdir)
+    stencil = Stencil(xg, *model_coords(xg, alt, glon, glat))
+    M = stencil.size
+
+    # sample j is time j // M at point j % M, all sharing the M stencils
+    sample_time = [t for t in times for _ in range(M)]
+    sidx = np.tile(np.arange(M), len(times))
+
+    dat: dict[str, np.ndarray] = {}
+    for part in _stream(simdir, sample_time, stencil, sidx, var, xg):
+        for k, v in part.data_vars.items():
+            if k not in dat:
+                dat[k] = np.full(len(sample_time), np.nan, dtype=v.dtype)
+            dat[k][part.sample.values] = v.values
+
+    return xarray.Dataset(
+        {k: (("time", "point"), v.reshape(len(times), M)) for k, v in dat.items()},
+        coords={
+            "time": times,
+            "glat": ("point", np.broadcast_to(glat, M)),
+            "glon": ("point", np.broadcast_to(glon, M)),
+            "alt": ("point", np.broadcast_to(alt, M)),
+        },
+    )
+
+
+def model_coords(xg: dict[str, T.Any], alt, glon, glat) -> tuple:
+    """
+    geographic coordinates to the model coordinates x1, x2, x3 of the grid,
+    as in gemini3d.grid.gridmodeldata.model2pointsgeogcoords.
+
+    For Cartesian grids, the UEN coordinates are referenced to the center of the grid.
+    """
+
+    alt, glon, glat = (np.atleast_1d(np.asarray(a, dtype=float)) for a in (alt, glon, glat))
+    alt, glon, glat = np.broadcast_arrays(alt, glon, glat)
+
+    if _curvilinear(xg):
+        return geog2dipole(alt, glon, glat)
+
+    ref_lat = (xg["glat"].min() + xg["glat"].max()) / 2
+    ref_lon = (xg["glon"].min() + xg["glon"].max()) / 2
+
+    return geog2UENgeog(alt, glon, glat, ref_lat=ref_lat, ref_lon=ref_lon)
+
+
+class Stencil:
+    """
+    trilinear interpolation stencils of points in the model grid:
+    for each point and dimension, the index of the lower cell and the weight of the upper cell.
+
+    Parameters
+    ----------
+    xg: dict
+        grid, with x1, x2, x3 including ghost cells
+    x1i, x2i, x3i: array_like
+        model coordinates of the points
+    """
+
+    def __init__(self, xg: dict[str, T.Any], x1i=None, x2i=None, x3i=None):
+        self.lx = np.array([xg[k].size - 4 for k in ("x1", "x2", "x3")])
+
+        if x1i is None:
+            return
+
+        xi = [np.asarray(x, dtype=float).ravel() for x in (x1i, x2i, x3i)]
+
+        index = []
+        weight = []
+        valid = np.ones(xi[0].size, dtype=bool)
+        for k, x in zip(("x1", "x2", "x3"), xi):
+            i, w, ok = _axis(xg[k][2:-2], x)
+            index.append(i)
+            weight.append(w)
+            valid &= ok
+
+        self.index = np.array(index)
+        self.weight = np.array(weight)
+        self.valid = valid
+
+    @property
+    def size(self) -> int:
+        return self.valid.size
+
+    def take(self, ids: np.ndarray) -> Stencil:
+        """subset of the stencils"""
+
+        st = Stencil.__new__(Stencil)
+        st.lx = self.lx
+        st.index = self.index[:, ids]
+        st.weight = self.weight[:, ids]
+        st.valid = self.valid[ids]
+
+        return st
+
+    def interp(self, A: np.ndarray, lo: np.ndarray) -> np.ndarray:
+        """
+        interpolate the points of this stencil from A, the (x1, x2, x3) hyperslab
+        of a variable starting at cell index lo
+        """
+
+        out = np.zeros(self.size, dtype=np.result_type(A.dtype, np.float32))
+        for corner in np.ndindex(2, 2, 2):
+            c = np.array(corner)[:, None]
+            # singleton dimensions have weight 0 on the (nonexistent) upper cell
+            idx = np.minimum(self.index + c, self.lx[:, None] - 1) - lo[:, None]
+            w = np.prod(np.where(c == 1, self.weight, 1 - self.weight), axis=0)
+            out += w * A[idx[0], idx[1], idx[2]]
+
+        return out
+
+
+def _axis(x: np.ndarray, xi: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    lower cell index, upper cell weight and in-bounds flag along one grid dimension,
+    which may be ascending or descending
+    """
+
+    n = x.size
+    if n == 1:
+        return np.zeros(xi.size, dtype=int), np.zeros(xi.size), np.ones(xi.size, dtype=bool)
+
+    descending = x[0] > x[-1]
+    xa = x[::-1] if descending else x
+
+    ok = (xi >= xa[0]) & (xi <= xa[-1])
+    k = np.clip(np.searchsorted(xa, xi, side="right") - 1, 0, n - 2)
+    i = n - 2 - k if descending else k
+
+    w = (xi - x[i]) / (x[i + 1] - x[i])
+
+    return i, np.where(ok, w, 0.0), ok
+
+
+def _curvilinear(xg: dict[str, T.Any]) -> bool:
+    h1 = xg["h1"]
+    return abs(h1.min() - 1) > 1e-4 or abs(h1.max() - 1) > 1e-4
+
+
+def _grid(simdir: Path) -> dict[str, T.Any]:
+    """
+    only the grid variables needed for the coordinate transform, and the cell coordinates
+    """
+
+    xg = read.grid(simdir, var={"x1", "x2", "x3", "h1"})
+    if not _curvilinear(xg):
+        xg.update(read.grid(simdir, var={"glat", "glon"}))
+
+    return xg
+
+
+def _stream(
+    simdir: Path,
+    time: list[datetime],
+    stencil: Stencil,
+    sidx: np.ndarray,
+    var: set[str] | None,
+    xg: dict[str, T.Any],
+) -> T.Iterator[xarray.Dataset]:
+    """
+    interpolate samples at time[j], stencil sidx[j], reading the frames in time order
+    """
+
+    var = _variables(var)
+
+    cfg = read.config(simdir)
+    ft = np.array(cfg["time"], dtype="datetime64[us]")
+    st = np.array(time, dtype="datetime64[us]")
+    nt = ft.size
+    N = st.size
+
+    # %% bracketing frames and time weights
+    in_run = (st >= ft[0]) & (st <= ft[-1])
+    if nt > 1:
+        k = np.clip(np.searchsorted(ft, st, side="right") - 1, 0, nt - 2)
+        a = (st - ft[k]) / (ft[k + 1] - ft[k])
+    else:
+        k = np.zeros(N, dtype=int)
+        a = np.zeros(N)
+    a = np.where(in_run, a, 0.0)
+
+    valid = in_run & stencil.valid[sidx]
+    last = np.where(a > 0, k + 1, k)
+
+    # samples outside the grid or run are done before any frame is read
+    if not valid.all():
+        yield _samples(np.flatnonzero(~valid), {v: np.full((~valid).sum(), np.nan) for v in var})
+
+    acc: dict[str, np.ndarray] = {}
+
+    coords = h5read.grid_coords(simdir)
+
+    for f in range(nt):
+        lower = valid & (k == f)
+        upper = valid & (k + 1 == f) & (a > 0)
+        if not (lower.any() or upper.any()):
+            continue
+
+        # stencils needed for this frame, each read once
+        need = np.unique(sidx[lower | upper])
+        vals = _read_stencils(
+            find.frame(simdir, cfg["time"][f]), var, stencil.take(need), cfg, coords
+        )
+        pos = np.searchsorted(need, sidx)
+
+        for v, x in vals.items():
+            if v not in acc:
+                acc[v] = np.zeros(N, dtype=x.dtype)
+            acc[v][lower] += (1 - a[lower]) * x[pos[lower]]
+            acc[v][upper] += a[upper] * x[pos[upper]]
+
+        done = np.flatnonzero(valid & (last == f))
+        if done.size:
+            yield _samples(done, {v: x[done] for v, x in acc.items()})
+
+
+def _variables(var: set[str] | str | None) -> set[str]:
+    """variables to probe, default {"ne"}"""
+
+    if not var:
+        var = {"ne"}
+    if isinstance(var, str):
+        var = [var]
+    var = set(var)
+    if var & {"ns", "vs1", "Ts", "Phi"}:
+        raise ValueError("only 3-D variables can be probed")
+
+    return var
+
+
+def _read_stencils(
+    file: Path,
+    var: set[str],
+    stencil: Stencil,
+    cfg: dict[str, T.Any],
+    xg: dict[str, T.Any],
+) -> dict[str, np.ndarray]:
+    """
+    interpolate the stencils in one frame, reading the bounding hyperslab of each group
+    of stencils, see _groups()
+    """
+
+    groups = _groups(stencil)
+
+    out: dict[str, np.ndarray] = {}
+
+    with h5py.File(file, "r") as f:
+        for ids, glo, ghi in groups:
+            sel = {f"x{d+1}": slice(glo[d], ghi[d] + 1) for d in range(3)}
+            dat = h5read.frame(f, var, cfg=cfg, xg=xg, **sel)
+            sub = stencil.take(ids)
+            for v in var:
+                if v not in dat:
+                    continue
+                if v not in out:
+                    out[v] = np.empty(stencil.size, dtype=np.result_type(dat[v].dtype, np.float32))
+                out[v][ids] = sub.interp(dat[v].values, glo)
+
+    return out
+
+
+def _groups(stencil: Stencil) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    split the stencils into groups whose bounding hyperslab is at most
+    BOX_CELLS_PER_SAMPLE cells per stencil, by bisecting the longest side at the median.
+    Nearby stencils thus share one read, and a dense set of stencils is one group.
+
+    Returns
+    -------
+    groups: list of tuple
+        stencil indices, lower and upper cell index of the hyperslab
+    """
+
+    budget = max(8, BOX_CELLS_PER_SAMPLE)
+
+    groups = []
+    todo = [np.arange(stencil.size)]
+    while todo:
+        ids = todo.pop()
+        if ids.size == 0:
+            continue
+        idx = stencil.index[:, ids]
+        lo = idx.min(axis=1)
+        hi = np.minimum(idx.max(axis=1) + 1, stencil.lx - 1)
+        if ids.size == 1 or np.prod(hi - lo + 1) <= budget * ids.size:
+            groups.append((ids, lo, hi))
+            continue
+        d = int(np.argmax(hi - lo))
+        order = np.argsort(idx[d], kind="stable")
+        todo += [ids[order[: ids.size // 2]], ids[order[ids.size // 2 :]]]
+
+    return groups
+
+
+def _samples(ids: np.ndarray, values: dict[str, np.ndarray]) -> xarray.Dataset:
+    return xarray.Dataset({k: ("sample", v) for k, v in values.items()}, coords={"sample": ids})
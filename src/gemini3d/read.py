@@ -6,17 +6,39 @@ https://docs.python.org/3/library/struct.html#struct-format-strings
 from __future__ import annotations
 from pathlib import Path
 from datetime import datetime
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+import bisect
+import functools
+import threading
 import typing as T
 
 import numpy as np
 import xarray
+from xarray.backends import BackendArray
+from xarray.core import indexing
 
 from .config import read_nml
+from .utils import get_cpu_count
+from .cache import grid_cache
 from . import find
-from . import LSP
+from . import frame_index
+from . import store
 
 from .hdf5 import read as h5read
 
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8: results are pickled back from the worker processes
+    shared_memory = None  # type: ignore
+
+# decoded frames kept for read.frame(..., interp="linear")
+FRAME_CACHE_SIZE = 4
+
+_FRAMES: OrderedDict[tuple, xarray.Dataset] = OrderedDict()
+_FRAMES_LOCK = threading.Lock()
+
 
 # do NOT use lru_cache--can have weird unexpected effects with complicated setups
 def config(path: Path) -> dict[str, T.Any]:
@@ -45,7 +67,7 @@ def simsize(path: Path) -> tuple[int, ...]:
     return h5read.simsize(find.simsize(path))
 
 
-def grid(path: Path, *, var: set[str] = None, shape: bool = False) -> dict[str, T.Any]:
+def grid(path: Path, *, var: set[str] | None = None, shape: bool = False) -> dict[str, T.Any]:
     """
     get simulation grid
 
@@ -58,23 +80,37 @@ def grid(path: Path, *, var: set[str] = None, shape: bool = False) -> dict[str,
         read only these grid variables
     shape: bool, optional
         read only the shape of the grid instead of the data iteslf
+
+    If the grid cache is enabled (gemini3d.cache.enable_grid_cache),
+    the grid is read from disk only when the file has changed, and arrays are read-only.
     """
 
     fn = find.grid(path)
 
-    xg = h5read.grid(fn, var=var, shape=shape)
+    if isinstance(var, str):
+        var = {var}
+
+    def load() -> dict[str, T.Any]:
+        xg = h5read.grid(fn, var=var, shape=shape)
+        xg["filename"] = fn
+        return xg
 
-    xg["filename"] = fn
+    cache = grid_cache()
+    if cache is None:
+        return load()
 
-    return xg
+    return cache.get(fn, load, var=var, kind="shape" if shape else "grid")
 
 
 def data(
     fn: Path,
-    var: set[str] = None,
+    var: set[str] | None = None,
     *,
     cfg: dict[str, T.Any] = None,
     xg: dict[str, T.Any] = None,
+    x1: slice | None = None,
+    x2: slice | None = None,
+    x3: slice | None = None,
 ) -> xarray.Dataset:
     """
     knowing the filename for a simulation time step, read the data for that time step
@@ -86,14 +122,19 @@ def data(
     var: set of set
         variables to use
     cfg: dict
-        to avoid reading config.nml
+        to avoid reading config.nml, which is only needed if the file does not
+        tell its output type
     xg: dict
         to avoid reading simgrid.*, useful to save time when reading data files in a loop
+    x1, x2, x3: slice, optional
+        read only this sub-volume, indexed sans ghost cells.
+        Only the selected hyperslab is read from disk.
 
     Returns
     -------
     dat: xarray.Dataset
-        simulation outputs
+        simulation outputs. Arrays are Fortran-ordered (x1, x2, x3) views of the data
+        as read, not C-contiguous copies; use np.ascontiguousarray() where C order is needed.
     """
 
     if not var:
@@ -105,53 +146,17 @@ def data(
 
     fn = Path(fn).expanduser()
 
-    if not cfg:
-        cfg = config(fn.parent)
+    # the file is opened once for output type detection, data and time
+    dat = h5read.frame(fn, var, cfg=cfg, xg=xg, x1=x1, x2=x2, x3=x3)
 
-    flag = h5read.flagoutput(fn, cfg)
-
-    if flag == 3:
-        dat = h5read.frame3d_curvne(fn, xg)
-    elif flag == 1:
-        dat = h5read.frame3d_curv(fn, var, xg)
-    elif flag == 2:
-        dat = h5read.frame3d_curvavg(fn, var, xg)
-    else:
-        raise ValueError(f"Unsure how to read {fn} with flagoutput {flag}")
-
-    lx = (dat.dims["x1"], dat.dims["x2"], dat.dims["x3"])
-
-    # %% Derived variables
-    if flag == 1:
-        if {"ne", "v1", "Ti"} & var:
-            dat["ne"] = (("x1", "x2", "x3"), dat["ns"][LSP - 1, :, :, :].data)
-            # np.any() in case neither is an np.ndarray
-            if dat["ns"].shape[0] != LSP or not np.array_equal(dat["ns"].shape[1:], lx):
-                raise ValueError(
-                    f"may have wrong permutation on read. lx: {lx}  ns x1,x2,x3: {dat['ns'].shape}"
-                )
-        if "v1" in var:
-            dat["v1"] = (
-                ("x1", "x2", "x3"),
-                (dat["ns"][:6, :, :, :] * dat["vs1"][:6, :, :, :]).sum(axis=0).data
-                / dat["ne"].data,
-            )
-        if "Ti" in var:
-            dat["Ti"] = (
-                ("x1", "x2", "x3"),
-                (dat["ns"][:6, :, :, :] * dat["Ts"][:6, :, :, :]).sum(axis=0).data / dat["ne"].data,
-            )
-        if "Te" in var:
-            dat["Te"] = (("x1", "x2", "x3"), dat["Ts"][LSP - 1, :, :, :].data)
+    lx = (dat.sizes["x1"], dat.sizes["x2"], dat.sizes["x3"])
 
+    if dat.attrs["flagoutput"] == 1:
         if "J1" in var:
             # np.any() in case neither is an np.ndarray
             if np.any(dat["J1"].shape != lx):
                 raise ValueError("J1 may have wrong permutation on read")
 
-    if "time" not in dat:
-        dat = dat.assign_coords({"time": time(fn)})
-
     return dat
 
 
@@ -198,10 +203,101 @@ def precip(fn: Path) -> xarray.Dataset:
     return h5read.precip(fn)
 
 
-def frame(simdir: Path, time: datetime, *, var: set[str] = None) -> xarray.Dataset:
+def Efield_series(
+    path: Path, *, times: list[datetime] | None = None, workers: int = 1
+) -> xarray.Dataset:
+    """load all Efield input frames of a directory, as taken by gemini3d.write.Efield
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        Efield input directory
+    times: list of datetime.datetime, optional
+        times to load, default all frames in the directory
+    workers: int, optional
+        number of worker processes reading frames
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        electric field (time, mlon, mlat)
+    """
+
+    return _input_series(path, h5read.EFIELD_VARS, times, workers)
+
+
+def precip_series(
+    path: Path, *, times: list[datetime] | None = None, workers: int = 1
+) -> xarray.Dataset:
+    """load all precipitation input frames of a directory, as taken by gemini3d.write.precip
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        precipitation input directory
+    times: list of datetime.datetime, optional
+        times to load, default all frames in the directory
+    workers: int, optional
+        number of worker processes reading frames
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        precipitation (time, mlon, mlat)
+    """
+
+    return _input_series(path, h5read.PRECIP_VARS, times, workers)
+
+
+def _input_series(
+    path: Path,
+    var: dict[str, tuple[str, tuple[str, ...]]],
+    times: list[datetime] | None,
+    workers: int,
+) -> xarray.Dataset:
+    """
+    read input frames into one Dataset, with the coordinates read once
+    """
+
+    path = Path(path).expanduser().resolve(strict=True)
+
+    if times is None:
+        index = frame_index.get(path)
+        times = index.times
+        files = [path / n for n in index.names]
+    else:
+        files = [find.frame(path, t) for t in times]
+
+    if not files:
+        raise FileNotFoundError(f"no input frames in {path}")
+
+    coords = h5read.input_coords(path / "simgrid.h5")
+
+    workers = max(1, min(workers, len(files)))
+    if workers == 1:
+        out = h5read.input_frames(files, var)
+    else:
+        parts = [[files[i] for i in g] for g in np.array_split(np.arange(len(files)), workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            res = list(pool.map(h5read.input_frames, parts, [var] * workers))
+        out = {k: np.concatenate([r[k] for r in res]) for k in var}
+
+    dat = xarray.Dataset(
+        {k: (("time", *dims), out[k]) for k, (_, dims) in var.items()},
+        coords={"time": list(times), **coords},
+    )
+
+    return dat.transpose("time", "mlon", "mlat")
+
+
+def frame(
+    simdir: Path, time: datetime, *, var: set[str] | None = None, interp: str | None = None
+) -> xarray.Dataset:
     """
     load a frame of simulation data, automatically selecting the correct
-    functions based on simulation parameters
+    functions based on simulation parameters.
+    A consolidated store (gemini3d.store) is read if it has this time and var,
+    and the frame file is not newer than the store.
 
     Parameters
     ----------
@@ -211,6 +307,11 @@ def frame(simdir: Path, time: datetime, *, var: set[str] = None) -> xarray.Datas
         time to load from simulation output
     var: set of str
         variable(s) to read
+    interp: str, optional
+        None: time must be an output time (within find.MAX_OFFSET)
+        "linear": blend the two output frames bracketing time.
+        Decoded frames are kept in a small LRU cache, so a monotonic sequence
+        of times reads each file once.
 
     Returns
     -------
@@ -218,12 +319,532 @@ def frame(simdir: Path, time: datetime, *, var: set[str] = None) -> xarray.Datas
         simulation output for this time step
     """
 
+    if interp is not None:
+        if interp != "linear":
+            raise ValueError(f"unknown interp {interp}, use 'linear'")
+        return _interp_frame(Path(simdir).expanduser(), time, var)
+
+    st = store.current(simdir, var, [time])
+    if st is not None:
+        return st.frame(time, var)
+
     return data(
         find.frame(simdir, time),
         var=var,
     )
 
 
+def clear_frame_cache():
+    """
+    forget decoded frames cached by read.frame(..., interp="linear")
+    """
+
+    with _FRAMES_LOCK:
+        _FRAMES.clear()
+
+
+def _interp_frame(simdir: Path, time: datetime, var: set[str] | None) -> xarray.Dataset:
+    """
+    linear interpolation in time between the bracketing output frames
+    """
+
+    st = store.current(simdir, var)
+    times = st.times if st is not None else frame_index.get(simdir).times
+
+    i = bisect.bisect_left(times, time)
+    near = [j for j in (i - 1, i) if 0 <= j < len(times)]
+    if near:
+        j = min(near, key=lambda k: abs(times[k] - time))
+        if abs(times[j] - time) <= find.MAX_OFFSET:
+            return _cached_frame(simdir, times[j], var).copy(deep=True)
+
+    if not 0 < i < len(times):
+        raise ValueError(f"{time} is outside the output times of {simdir}")
+
+    t0, t1 = times[i - 1], times[i]
+    w = (time - t0) / (t1 - t0)
+
+    a = _cached_frame(simdir, t0, var)
+    b = _cached_frame(simdir, t1, var)
+
+    dat = a.drop_vars("time", errors="ignore") * (1 - w) + b.drop_vars("time", errors="ignore") * w
+    dat.attrs = a.attrs.copy()
+
+    return dat.assign_coords(time=time)
+
+
+def _cached_frame(simdir: Path, time: datetime, var: set[str] | None) -> xarray.Dataset:
+    """
+    decoded output frame from the LRU cache. Callers must not modify the result.
+    """
+
+    key = (simdir.resolve(), time, frozenset([var] if isinstance(var, str) else var or ()))
+
+    with _FRAMES_LOCK:
+        dat = _FRAMES.get(key)
+        if dat is not None:
+            _FRAMES.move_to_end(key)
+            return dat
+
+    dat = frame(simdir, time, var=var)
+
+    with _FRAMES_LOCK:
+        _FRAMES[key] = dat
+        while len(_FRAMES) > FRAME_CACHE_SIZE:
+            _FRAMES.popitem(last=False)
+
+    return dat
+
+
+class FrameReader:
+    """
+    reusable handle for reading many frames of one simulation.
+    Configuration and grid coordinates are read once, then each frame is read
+    with a single file open.
+
+    Example
+    -------
+
+        with gemini3d.read.FrameReader(simdir) as reader:
+            for t in reader.times:
+                dat = reader.frame(t, var={"ne", "Te"})
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    cfg: dict, optional
+        to avoid reading config.nml
+    xg: dict, optional
+        to avoid reading simgrid.h5
+    """
+
+    def __init__(
+        self,
+        simdir: Path,
+        *,
+        cfg: dict[str, T.Any] | None = None,
+        xg: dict[str, T.Any] | None = None,
+    ):
+        self.simdir = Path(simdir).expanduser()
+        self.cfg = cfg if cfg else config(self.simdir)
+        self.xg = xg if xg else h5read.grid_coords(self.simdir)
+
+    def __enter__(self) -> FrameReader:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.xg = {}
+
+    @property
+    def times(self) -> list[datetime]:
+        """output times of the simulation"""
+        return self.cfg["time"]
+
+    def file(self, time: datetime) -> Path:
+        """filename of the frame at this time"""
+        return find.frame(self.simdir, time)
+
+    def data(self, fn: Path, var: set[str] | None = None, **sel) -> xarray.Dataset:
+        """
+        read a frame by filename, see gemini3d.read.data
+        """
+
+        if not self.xg:
+            raise ValueError(f"FrameReader for {self.simdir} is closed")
+
+        return data(fn, var, cfg=self.cfg, xg=self.xg, **sel)
+
+    def frame(self, time: datetime, var: set[str] | None = None, **sel) -> xarray.Dataset:
+        """
+        read a frame by time, see gemini3d.read.frame
+        """
+
+        return self.data(self.file(time), var, **sel)
+
+
+def iter_frames(
+    simdir: Path,
+    var: set[str] | None = None,
+    *,
+    times: list[datetime] | None = None,
+    prefetch: int = 2,
+    processes: bool = True,
+) -> T.Iterator[xarray.Dataset]:
+    """
+    iterate over the frames of a simulation in time order, decoding upcoming frames
+    in the background while the caller works on the current one.
+
+    Example
+    -------
+
+        for dat in gemini3d.read.iter_frames(simdir, var={"ne", "Te"}):
+            plot(dat)
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    var: set of str
+        variable(s) to read
+    times: list of datetime.datetime, optional
+        times to load, default all output times in config.nml
+    prefetch: int
+        number of frames to decode ahead. 0 reads each frame when it is requested.
+    processes: bool
+        decode in worker processes. h5py holds the GIL while decompressing,
+        so worker threads (processes=False) only overlap with consumers that release the GIL.
+
+    Yields
+    ------
+    dat: xarray.Dataset
+        simulation output for each time step
+    """
+
+    simdir = Path(simdir).expanduser()
+
+    cfg = config(simdir)
+    if times is None:
+        times = cfg["time"]
+
+    xg = h5read.grid_coords(simdir)
+
+    files = [find.frame(simdir, t) for t in times]
+
+    yield from iter_data(files, prefetch=prefetch, processes=processes, var=var, cfg=cfg, xg=xg)
+
+
+def iter_data(
+    files: T.Iterable[Path],
+    reader: T.Callable[..., xarray.Dataset] | None = None,
+    *,
+    prefetch: int = 2,
+    processes: bool = True,
+    **kwargs,
+) -> T.Iterator[xarray.Dataset]:
+    """
+    read files in order, decoding upcoming files in the background.
+    See iter_frames.
+
+    Parameters
+    ----------
+    files: iterable of pathlib.Path
+        files to read
+    reader: callable, optional
+        module-level function reading one file, default gemini3d.read.data.
+        For example gemini3d.read.Efield or gemini3d.read.precip.
+    prefetch: int
+        number of files to decode ahead. 0 reads each file when it is requested.
+    processes: bool
+        decode in worker processes rather than threads
+    kwargs:
+        passed to reader
+
+    Yields
+    ------
+    dat: xarray.Dataset
+        data of each file
+    """
+
+    fun = functools.partial(reader if reader else data, **kwargs)
+
+    if prefetch < 1:
+        yield from map(fun, files)
+        return
+
+    Executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+
+    pending: deque[Future] = deque()
+
+    with Executor(max_workers=prefetch) as pool:
+        try:
+            for file in files:
+                pending.append(pool.submit(fun, file))
+                if len(pending) > prefetch:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # consumer stopped early or a read failed: don't decode frames nobody will use
+            for fut in pending:
+                fut.cancel()
+
+
+def series(
+    simdir: Path,
+    var: set[str] | None = None,
+    *,
+    times: list[datetime] | None = None,
+    chunks: dict[str, int] | None = None,
+) -> xarray.Dataset:
+    """
+    lazily load a time series of simulation output as one Dataset with a "time" dimension
+
+    No frame data is read until a variable is indexed or computed, and then only
+    the frames touched by the selection are read.
+    Taking a time series at one grid cell thus never holds more than one frame in RAM.
+    For out-of-core reductions such as a temporal mean, request Dask chunks,
+    for example chunks={"time": 1}.
+    To read a whole run into memory in parallel, see batch().
+    If the simulation has a consolidated store (gemini3d.store) covering these times and var,
+    and no frame file is newer than the store, it is read instead of the frame files.
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    var: set of str
+        variable(s) to read
+    times: list of datetime.datetime, optional
+        times to load, default all output times in config.nml
+    chunks: dict, optional
+        if given, return Dask-backed arrays with these chunk sizes (requires Dask)
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        lazily-loaded simulation output over time
+    """
+
+    st = store.current(simdir, var, times)
+    if st is not None:
+        dat = st.series(var, times=times)
+        return dat if chunks is None else dat.chunk(chunks)
+
+    cfg, xg, files, dat, probe = _series_setup(simdir, var, times)
+
+    for k, v in probe.data_vars.items():
+        shape = tuple(dat.sizes[d] if d in dat.coords else v.sizes[d] for d in v.dims)
+        arr = _FrameSeriesArray(files, k, v.dims, shape, v.dtype, cfg=cfg, xg=xg)
+        dat[k] = xarray.Variable(("time", *v.dims), indexing.LazilyIndexedArray(arr))
+
+    if chunks is not None:
+        dat = dat.chunk(chunks)
+
+    return dat
+
+
+def batch(
+    simdir: Path,
+    var: set[str] | None = None,
+    *,
+    times: list[datetime] | None = None,
+    workers: int | None = None,
+) -> xarray.Dataset:
+    """
+    read a time series of simulation output into memory, decoding the frames
+    in parallel worker processes.
+
+    HDF5 decompression is single-threaded, so for whole-run reads of large outputs
+    this scales with the number of workers until disk bandwidth is saturated.
+    Workers write each frame directly into shared memory, so the decoded arrays are
+    not pickled back to this process.
+    To read only part of a run, or one frame at a time, see series() and iter_frames().
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    var: set of str
+        variable(s) to read
+    times: list of datetime.datetime, optional
+        times to load, default all output times in config.nml
+    workers: int, optional
+        number of worker processes, default the number of physical CPU cores
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        simulation output over time
+    """
+
+    cfg, xg, files, dat, probe = _series_setup(simdir, var, times)
+
+    if workers is None:
+        workers = get_cpu_count()
+    workers = max(1, min(workers, len(files)))
+
+    layout = {}
+    for k, v in probe.data_vars.items():
+        shape = tuple(dat.sizes[d] if d in dat.coords else v.sizes[d] for d in v.dims)
+        layout[k] = ((len(files), *shape), v.dtype.str)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if shared_memory is None:
+            out = {k: np.empty(shape, dtype) for k, (shape, dtype) in layout.items()}
+            fun = functools.partial(data, var=var, cfg=cfg, xg=xg)
+            for i, d in enumerate(pool.map(fun, files)):
+                for k in out:
+                    out[k][i] = d[k].data
+        else:
+            out = _batch_shared(pool, files, var, cfg, xg, layout)
+
+    for k, v in probe.data_vars.items():
+        dat[k] = (("time", *v.dims), out[k])
+
+    return dat
+
+
+def _batch_shared(
+    pool: ProcessPoolExecutor,
+    files: list[Path],
+    var: set[str] | None,
+    cfg: dict[str, T.Any],
+    xg: dict[str, T.Any],
+    layout: dict[str, tuple[tuple[int, ...], str]],
+) -> dict[str, np.ndarray]:
+    """
+    decode frames in the pool, into one shared memory block per variable
+    """
+
+    blocks: dict[str, T.Any] = {}
+    try:
+        for k, (shape, dtype) in layout.items():
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            blocks[k] = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+
+        buf = {k: (blocks[k].name, shape, dtype) for k, (shape, dtype) in layout.items()}
+
+        futures = [
+            pool.submit(_batch_read, file, i, var, cfg, xg, buf) for i, file in enumerate(files)
+        ]
+        for fut in futures:
+            fut.result()
+
+        # copy out, so that the shared memory can be released
+        return {
+            k: np.ndarray(shape, dtype, buffer=blocks[k].buf).copy()
+            for k, (shape, dtype) in layout.items()
+        }
+    finally:
+        for b in blocks.values():
+            b.close()
+            b.unlink()
+
+
+def _batch_read(
+    file: Path,
+    it: int,
+    var: set[str] | None,
+    cfg: dict[str, T.Any],
+    xg: dict[str, T.Any],
+    buf: dict[str, tuple[str, tuple[int, ...], str]],
+):
+    """
+    worker: read one frame into time index "it" of the shared memory blocks
+    """
+
+    dat = data(file, var, cfg=cfg, xg=xg)
+
+    for k, (name, shape, dtype) in buf.items():
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            np.ndarray(shape, dtype, buffer=shm.buf)[it] = dat[k].data
+        finally:
+            shm.close()
+
+
+def _series_setup(simdir: Path, var: set[str] | None, times: list[datetime] | None):
+    """
+    config, grid coordinates, frame files, coordinates-only Dataset and a
+    one-cell probe of the first frame, which tells the variable names, dimensions
+    and data types
+    """
+
+    simdir = Path(simdir).expanduser()
+
+    if isinstance(var, str):
+        var = [var]
+
+    cfg = config(simdir)
+    if times is None:
+        times = cfg["time"]
+    if not times:
+        raise ValueError(f"no output times requested for {simdir}")
+
+    xg = h5read.grid_coords(simdir)
+
+    files = [find.frame(simdir, t) for t in times]
+
+    probe = data(files[0], var, cfg=cfg, xg=xg, x1=slice(0, 1), x2=slice(0, 1), x3=slice(0, 1))
+
+    dat = xarray.Dataset(coords={k: xg[k][2:-2] for k in ("x1", "x2", "x3")})
+    dat = dat.assign_coords({"time": list(times)})
+
+    return cfg, xg, files, dat, probe
+
+
+class _FrameSeriesArray(BackendArray):
+    """
+    one variable across many frame files, read frame-by-frame on indexing
+    """
+
+    def __init__(
+        self,
+        files: list[Path],
+        name: str,
+        dims: tuple[str, ...],
+        shape: tuple[int, ...],
+        dtype,
+        *,
+        cfg: dict[str, T.Any],
+        xg: dict[str, T.Any],
+    ):
+        self.files = files
+        self.name = name
+        self.dims = dims
+        self.shape = (len(files), *shape)
+        self.dtype = np.dtype(dtype)
+        self.cfg = cfg
+        self.xg = xg
+
+    def __getitem__(self, key: indexing.ExplicitIndexer) -> np.ndarray:
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self._getitem
+        )
+
+    def _getitem(self, key: tuple) -> np.ndarray:
+        it = key[0]
+        if isinstance(it, slice):
+            frames = range(len(self.files))[it]
+        else:
+            frames = range(it, it + 1)
+
+        out = np.empty((len(frames), *_sliced_shape(self.shape[1:], key[1:])), dtype=self.dtype)
+        for j, i in enumerate(frames):
+            out[j] = self._read(self.files[i], key[1:])
+
+        return out if isinstance(it, slice) else out[0]
+
+    def _read(self, file: Path, key: tuple) -> np.ndarray:
+        """
+        read one frame, pushing the spatial selection down to a hyperslab read
+        """
+
+        req = {"Phi"} if self.name == "Phitop" else {self.name}
+
+        sel = {}
+        rest = []
+        for d, k in zip(self.dims, key):
+            if d in {"x1", "x2", "x3"}:
+                sel[d] = k
+                rest.append(0 if isinstance(k, (int, np.integer)) else slice(None))
+            else:
+                rest.append(k)
+
+        return data(file, req, cfg=self.cfg, xg=self.xg, **sel)[self.name].data[tuple(rest)]
+
+
+def _sliced_shape(shape: tuple[int, ...], key: tuple) -> tuple[int, ...]:
+    """shape resulting from basic (int / slice) indexing"""
+
+    return tuple(len(range(n)[k]) for n, k in zip(shape, key) if isinstance(k, slice))
+
+
 def time(file: Path) -> datetime:
     """
     read simulation time of a file
@@ -0,0 +1,478 @@
+"""
+single-pass statistics of simulation output over a run
+
+Frames are streamed once, and several reductions are accumulated together,
+per grid cell or per column (reduced along x1 within each frame):
+
+* mean, std: running moments (Welford)
+* min, max and the time of each
+* approximate quantiles: relative-error log-bucket sketch per cell (as DDSketch)
+
+Memory is bounded by the size of the accumulators, not the length of the run.
+Moments and extrema take a few numbers per cell. Quantiles take up to 8 * max_bins bytes
+per cell, so they are computed only on request, best with column= on large grids.
+All accumulators are mergeable, so a run can be split across worker processes
+whose partial results are merged.
+
+Example
+-------
+
+    dat = gemini3d.stats.summarize(simdir, var={"ne", "Te"}, workers=8)
+    dat["ne_max"], dat["ne_time_max"]
+
+    dat = gemini3d.stats.summarize(simdir, var="Te", stats={"quantile"}, column="max")
+    dat["Te_quantile"].sel(quantile=0.95)
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import math
+import typing as T
+
+import numpy as np
+import xarray
+
+from . import read
+
+__all__ = ["summarize", "Summary", "Moments", "Extrema", "Quantiles"]
+
+STATS = {"mean", "std", "min", "max", "quantile"}
+# quantile sketches are large, so they are opt-in
+DEFAULT_STATS = {"mean", "std", "min", "max"}
+QUANTILES = (0.05, 0.5, 0.95)
+COLUMN: dict[str, T.Callable[..., np.ndarray]] = {
+    "max": np.nanmax,
+    "min": np.nanmin,
+    "mean": np.nanmean,
+    "sum": np.nansum,
+}
+
+
+class Moments:
+    """running count, mean and sum of squared deviations per cell, skipping NaN"""
+
+    def __init__(self):
+        # allocated on the first update
+        self.n = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    def update(self, x: np.ndarray, time: datetime | None = None):
+        if self.n.size == 0:
+            self.n = np.zeros(x.shape, dtype=np.int64)
+            self.mean = np.zeros(x.shape)
+            self.m2 = np.zeros(x.shape)
+
+        ok = ~np.isnan(x)
+        self.n += ok
+        delta = np.where(ok, x - self.mean, 0.0)
+        self.mean += delta / np.maximum(self.n, 1)
+        self.m2 += delta * np.where(ok, x - self.mean, 0.0)
+
+    def merge(self, other: Moments):
+        if other.n.size == 0:
+            return
+        if self.n.size == 0:
+            self.n, self.mean, self.m2 = other.n.copy(), other.mean.copy(), other.m2.copy()
+            return
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        f = np.divide(other.n, n, out=np.zeros(n.shape), where=n > 0)
+        self.mean += delta * f
+        self.m2 += other.m2 + delta**2 * self.n * f
+        self.n = n
+
+    def result(self) -> dict[str, np.ndarray]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(self.n > 0, self.mean, np.nan)
+            std = np.sqrt(self.m2 / self.n)
+
+        return {"count": self.n, "mean": mean, "std": std}
+
+
+class Extrema:
+    """running min, max and the time at which each occurred, per cell"""
+
+    def __init__(self):
+        # allocated on the first update
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+        self.time_min = np.zeros(0, dtype="datetime64[ns]")
+        self.time_max = np.zeros(0, dtype="datetime64[ns]")
+
+    def update(self, x: np.ndarray, time: datetime):
+        t = np.datetime64(time, "ns")
+
+        if self.min.size == 0:
+            self.min = np.full(x.shape, np.inf)
+            self.max = np.full(x.shape, -np.inf)
+            self.time_min = np.full(x.shape, np.datetime64("NaT", "ns"))
+            self.time_max = np.full(x.shape, np.datetime64("NaT", "ns"))
+
+        i = x < self.min
+        self.min[i] = x[i]
+        self.time_min[i] = t
+
+        i = x > self.max
+        self.max[i] = x[i]
+        self.time_max[i] = t
+
+    def merge(self, other: Extrema):
+        """merge a later part of the run, so ties keep the earlier time"""
+
+        if other.min.size == 0:
+            return
+        if self.min.size == 0:
+            self.__dict__.update({k: v.copy() for k, v in other.__dict__.items()})
+            return
+
+        i = other.min < self.min
+        self.min[i] = other.min[i]
+        self.time_min[i] = other.time_min[i]
+
+        i = other.max > self.max
+        self.max[i] = other.max[i]
+        self.time_max[i] = other.time_max[i]
+
+    def result(self) -> dict[str, np.ndarray]:
+        return {
+            "min": np.where(np.isfinite(self.min), self.min, np.nan),
+            "max": np.where(np.isfinite(self.max), self.max, np.nan),
+            "time_min": self.time_min,
+            "time_max": self.time_max,
+        }
+
+
+class Quantiles:
+    """
+    approximate quantiles per cell, by counting values in logarithmic buckets
+    whose width bounds the relative error, as in DDSketch.
+
+    Positive and negative values are counted separately, and exact zeros on their own.
+    Each cell has at most max_bins buckets per sign. All cells share one bucket range,
+    which slides up as larger values appear, collapsing the smallest buckets,
+    so the largest values keep the stated accuracy.
+
+    Parameters
+    ----------
+    q: sequence of float
+        quantiles to estimate, 0 <= q <= 1
+    rel_accuracy: float
+        relative accuracy of the quantile estimates
+    max_bins: int
+        buckets per sign per cell, which bounds memory to 8 * max_bins bytes per cell
+    """
+
+    def __init__(
+        self, q: T.Sequence[float] = QUANTILES, rel_accuracy: float = 0.01, max_bins: int = 512
+    ):
+        self.q = np.asarray(q, dtype=float)
+        self.gamma = (1 + rel_accuracy) / (1 - rel_accuracy)
+        self.lng = math.log(self.gamma)
+        self.max_bins = max_bins
+        # allocated on the first update
+        self.zero = np.zeros(0, dtype=np.uint32)
+        # keys kmax - max_bins + 1 ... kmax of each sign
+        self.stores: dict[int, tuple[int, np.ndarray] | None] = {1: None, -1: None}
+
+    def update(self, x: np.ndarray, time: datetime | None = None):
+        if self.zero.size == 0:
+            self.zero = np.zeros(x.shape, dtype=np.uint32)
+
+        flat = x.ravel()
+        self.zero.ravel()[flat == 0] += 1
+
+        for sign in (1, -1):
+            cells = np.flatnonzero(sign * flat > 0)
+            if cells.size == 0:
+                continue
+            keys = np.ceil(np.log(sign * flat[cells]) / self.lng).astype(np.int64)
+            kmax, counts = self._store(sign, int(keys.max()), x.shape)
+            col = np.clip(keys - (kmax - self.max_bins + 1), 0, self.max_bins - 1)
+            # each cell has one value per frame, so indices are unique
+            counts[cells, col] += 1
+
+    def _store(self, sign: int, kmax: int, shape: tuple[int, ...]) -> tuple[int, np.ndarray]:
+        """bucket store of this sign, slid up to hold key kmax"""
+
+        st = self.stores[sign]
+        if st is None:
+            st = (kmax, np.zeros((int(np.prod(shape)), self.max_bins), dtype=np.uint32))
+        elif kmax > st[0]:
+            st = (kmax, _slide(st[1], kmax - st[0]))
+        self.stores[sign] = st
+
+        return st
+
+    def merge(self, other: Quantiles):
+        if other.zero.size == 0:
+            return
+        if self.zero.size == 0:
+            self.zero = other.zero.copy()
+            self.stores = {
+                s: None if st is None else (st[0], st[1].copy()) for s, st in other.stores.items()
+            }
+            return
+
+        self.zero += other.zero
+        for sign, st in other.stores.items():
+            if st is None:
+                continue
+            mine = self.stores[sign]
+            if mine is None:
+                self.stores[sign] = (st[0], st[1].copy())
+                continue
+
+            kmax = max(mine[0], st[0])
+            self.stores[sign] = (
+                kmax,
+                _slide(mine[1], kmax - mine[0]) + _slide(st[1], kmax - st[0]),
+            )
+
+    def result(self) -> dict[str, np.ndarray]:
+        shape = self.zero.shape
+        ncell = self.zero.size
+
+        # buckets in increasing value: negatives by decreasing magnitude, zero, positives
+        parts = []
+        values = []
+        for sign in (-1, 1):
+            st = self.stores[sign]
+            if st is None:
+                parts.append(np.zeros((ncell, 0), dtype=np.uint32))
+                values.append(np.empty(0))
+                continue
+            kmax, counts = st
+            keys = np.arange(kmax - self.max_bins + 1, kmax + 1)
+            v = sign * 2 * self.gamma ** keys.astype(float) / (self.gamma + 1)
+            if sign == -1:
+                counts = counts[:, ::-1]
+                v = v[::-1]
+            parts.append(counts)
+            values.append(v)
+
+        counts = np.concatenate((parts[0], self.zero.reshape(ncell, 1), parts[1]), axis=1)
+        values = np.concatenate((values[0], [0.0], values[1]))
+
+        cum = np.cumsum(counts, axis=1, dtype=np.int64)
+        n = cum[:, -1]
+
+        out = np.full((self.q.size, ncell), np.nan)
+        for j, q in enumerate(self.q):
+            rank = np.floor(q * (n - 1))
+            i = np.argmax(cum > rank[:, None], axis=1)
+            out[j] = np.where(n > 0, values[i], np.nan)
+
+        return {"quantile": out.reshape((self.q.size, *shape))}
+
+
+def _slide(counts: np.ndarray, shift: int) -> np.ndarray:
+    """move bucket range up by shift keys, collapsing the lowest buckets into the first"""
+
+    if shift == 0:
+        return counts
+
+    nb = counts.shape[1]
+    out = np.zeros_like(counts)
+    if shift >= nb:
+        out[:, 0] = counts.sum(axis=1)
+    else:
+        out[:, 0] = counts[:, : shift + 1].sum(axis=1)
+        out[:, 1 : nb - shift] = counts[:, shift + 1 :]
+
+    return out
+
+
+class Summary:
+    """
+    accumulate several statistics of several variables over the frames of a run
+
+    Parameters
+    ----------
+    var: set of str
+        variable(s) to summarize
+    stats: set of str, optional
+        any of "mean", "std", "min", "max", "quantile", default DEFAULT_STATS.
+        "quantile" needs up to 8 * max_bins bytes per cell (or column).
+    q: sequence of float
+        quantiles to estimate
+    column: str, optional
+        summarize a column reduction along x1 of each frame: "max", "min", "mean" or "sum",
+        instead of each cell
+    rel_accuracy: float
+        relative accuracy of quantile estimates
+    max_bins: int
+        quantile sketch buckets per sign per cell
+    """
+
+    def __init__(
+        self,
+        var: set[str],
+        *,
+        stats: set[str] | None = None,
+        q: T.Sequence[float] = QUANTILES,
+        column: str | None = None,
+        rel_accuracy: float = 0.01,
+        max_bins: int = 512,
+    ):
+        if isinstance(var, str):
+            var = [var]
+        self.var = set(var)
+
+        self.stats = set(stats) if stats else DEFAULT_STATS
+        if self.stats - STATS:
+            raise ValueError(f"unknown statistics {self.stats - STATS}")
+        if column is not None and column not in COLUMN:
+            raise ValueError(f"column reduction must be one of {set(COLUMN)}")
+        self.column = column
+        self.q = q
+
+        self.dims: dict[str, tuple[T.Hashable, ...]] = {}
+        self.coords: dict[T.Hashable, np.ndarray] = {}
+        self.acc: dict[str, list] = {}
+        for k in self.var:
+            acc: list = []
+            if {"mean", "std"} & self.stats:
+                acc.append(Moments())
+            if {"min", "max"} & self.stats:
+                acc.append(Extrema())
+            if "quantile" in self.stats:
+                acc.append(Quantiles(q, rel_accuracy, max_bins))
+            self.acc[k] = acc
+
+    def update(self, dat: xarray.Dataset):
+        """add one frame"""
+
+        time = dat.time.values
+
+        for k, acc in self.acc.items():
+            name = "Phitop" if k == "Phi" else k
+            if name not in dat:
+                continue
+            v = dat[name]
+            if self.column and "x1" in v.dims:
+                v = xarray.DataArray(
+                    COLUMN[self.column](v.values, axis=v.dims.index("x1")),
+                    dims=[d for d in v.dims if d != "x1"],
+                )
+            if k not in self.dims:
+                self.dims[k] = v.dims
+                self.coords.update({d: dat[d].values for d in v.dims if d in dat.coords})
+
+            x = np.asarray(v.values, dtype=float)
+            for a in acc:
+                a.update(x, time)
+
+    def merge(self, other: Summary) -> Summary:
+        """merge the summary of a later part of the run"""
+
+        for k, acc in self.acc.items():
+            for a, b in zip(acc, other.acc[k]):
+                a.merge(b)
+            if k not in self.dims and k in other.dims:
+                self.dims[k] = other.dims[k]
+        self.coords.update(other.coords)
+
+        return self
+
+    def result(self) -> xarray.Dataset:
+        """
+        Returns
+        -------
+        dat: xarray.Dataset
+            for each variable v: v_mean, v_std, v_min, v_max, v_time_min, v_time_max, v_quantile
+        """
+
+        out = xarray.Dataset(coords=self.coords)
+
+        for k, acc in self.acc.items():
+            if k not in self.dims:
+                continue
+            dims = self.dims[k]
+            for a in acc:
+                for name, r in a.result().items():
+                    if {"time_min": "min", "time_max": "max"}.get(name, name) not in self.stats:
+                        continue
+                    if name == "quantile":
+                        out[f"{k}_quantile"] = (("quantile", *dims), r)
+                    else:
+                        out[f"{k}_{name}"] = (dims, r)
+
+        if "quantile" in self.stats:
+            out = out.assign_coords(quantile=np.asarray(self.q, dtype=float))
+
+        return out
+
+
+def summarize(
+    simdir: Path,
+    var: set[str] | None = None,
+    *,
+    times: list[datetime] | None = None,
+    workers: int = 1,
+    **kwargs,
+) -> xarray.Dataset:
+    """
+    statistics of simulation output over a run, streaming each frame once
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    var: set of str, optional
+        variable(s) to summarize, default {"ne"}
+    times: list of datetime.datetime, optional
+        times to include, default all output times in config.nml
+    workers: int
+        split the run into this many contiguous parts, summarized in parallel processes
+        and then merged
+    kwargs:
+        passed to Summary: stats, q, column, rel_accuracy, max_bins
+
+    Returns
+    -------
+    dat: xarray.Dataset
+        see Summary.result
+    """
+
+    if not var:
+        var = {"ne"}
+    if isinstance(var, str):
+        var = {var}
+
+    simdir = Path(simdir).expanduser()
+
+    if times is None:
+        times = read.config(simdir)["time"]
+
+    workers = max(1, min(workers, len(times)))
+
+    if workers == 1:
+        return _summarize(simdir, var, times, kwargs, prefetch=2).result()
+
+    parts = [list(p) for p in np.array_split(np.array(times, dtype=object), workers)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summaries = list(
+            pool.map(_summarize, [simdir] * workers, [var] * workers, parts, [kwargs] * workers)
+        )
+
+    total = summaries[0]
+    for s in summaries[1:]:
+        total.merge(s)
+
+    return total.result()
+
+
+def _summarize(
+    simdir: Path, var: set[str], times: list[datetime], kwargs: dict[str, T.Any], prefetch: int = 0
+) -> Summary:
+    summary = Summary(var, **kwargs)
+
+    for dat in read.iter_frames(simdir, var, times=times, prefetch=prefetch):
+        summary.update(dat)
+
+    return summary
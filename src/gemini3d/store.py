@@ -0,0 +1,532 @@
+"""
+consolidated time-series store of simulation output
+
+Gemini3D writes one HDF5 file per output time. Reading a time series at a point then
+opens every file of the run, and large runs use many inodes.
+consolidate() packs an output directory into one chunked store,
+an HDF5 file or optionally a Zarr directory store.
+Each variable is one array (time, ..., x1, x2, x3), chunked across both time and space,
+so that reading either a spatial slice at one time or a time series at one cell
+touches only a few chunks.
+
+gemini3d.read.frame() and gemini3d.read.series() read the store transparently
+when it is present in the simulation directory, keeping it open between calls,
+as long as it holds the requested variables and times and no frame file is newer.
+
+Command line usage:
+
+    python -m gemini3d.store ~/sims/arcs
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timedelta
+import argparse
+import bisect
+import os
+import shutil
+import threading
+
+import h5py
+import numpy as np
+import xarray
+from xarray.backends import BackendArray
+from xarray.core import indexing
+
+from . import read
+from . import frame_index
+from .find import MAX_OFFSET
+from .hdf5.write import CLVL
+
+__all__ = ["consolidate", "find_store", "open_store", "current", "Store"]
+
+STORE_H5 = "gemini3d_series.h5"
+STORE_ZARR = "gemini3d_series.zarr"
+STORE_VERSION = 1
+
+# target uncompressed chunk size
+CHUNK_BYTES = 2**20
+# at most this many output times per chunk
+TIME_CHUNK = 16
+# frames are buffered to write whole chunks along time
+BUFFER_BYTES = 2**30
+
+SPATIAL = ("x1", "x2", "x3")
+
+_OPEN: dict[tuple[int, Path], Store] = {}
+_LOCK = threading.Lock()
+
+
+def consolidate(
+    simdir: Path,
+    *,
+    zarr: bool = False,
+    var: set[str] | None = None,
+    times: list[datetime] | None = None,
+    chunk_bytes: int = CHUNK_BYTES,
+    buffer_bytes: int = BUFFER_BYTES,
+) -> Path:
+    """
+    pack the output frames of a simulation into one chunked store
+
+    The store is written under a temporary name and renamed when complete,
+    so a partial store is never read.
+    The frame files are left in place.
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    zarr: bool, optional
+        write simdir/gemini3d_series.zarr (requires zarr) instead of simdir/gemini3d_series.h5
+    var: set of str, optional
+        variable(s) to store, default as gemini3d.read.data
+    times: list of datetime.datetime, optional
+        times to store, default all output times in config.nml
+    chunk_bytes: int
+        target uncompressed chunk size
+    buffer_bytes: int
+        memory for buffering frames, which limits the time length of chunks
+
+    Returns
+    -------
+    out: pathlib.Path
+        store written
+    """
+
+    simdir = Path(simdir).expanduser().resolve(strict=True)
+    out = simdir / (STORE_ZARR if zarr else STORE_H5)
+
+    if times is None:
+        times = read.config(simdir)["time"]
+    if not times:
+        raise ValueError(f"no output times requested for {simdir}")
+    nt = len(times)
+
+    frames = read.iter_frames(simdir, var, times=times)
+    first = next(frames)
+
+    frame_bytes = sum(v.nbytes for v in first.data_vars.values())
+    ct = int(min(nt, TIME_CHUNK, max(1, buffer_bytes // max(frame_bytes, 1))))
+
+    part = out.with_name(out.name + ".part")
+    _remove(part)
+
+    with _create(part, zarr=zarr) as root:
+        root.attrs["version"] = STORE_VERSION
+        root.attrs["flagoutput"] = int(first.attrs["flagoutput"])
+        # the default variables of gemini3d.read.data, so it may stand in for var=None
+        root.attrs["all_var"] = var is None
+
+        root.create_dataset("time/ymd", data=np.array([(t.year, t.month, t.day) for t in times]))
+        root.create_dataset(
+            "time/UTsec",
+            data=np.array([(t - datetime(t.year, t.month, t.day)).total_seconds() for t in times]),
+        )
+        for k in SPATIAL:
+            root.create_dataset(k, data=first[k].values)
+
+        arrays = {}
+        buffer = {}
+        for k, v in first.data_vars.items():
+            shape = (nt, *v.shape)
+            arrays[k] = _create_array(
+                root, k, shape, _chunks(v.dims, shape, ct, v.dtype.itemsize, chunk_bytes), v.dtype
+            )
+            arrays[k].attrs["dims"] = ["time", *v.dims]
+            buffer[k] = np.empty((ct, *v.shape), v.dtype)
+
+        dat = first
+        for i in range(nt):
+            if i > 0:
+                dat = next(frames)
+
+            j = i % ct
+            for k in arrays:
+                buffer[k][j] = dat[k].data
+
+            if j == ct - 1 or i == nt - 1:
+                for k in arrays:
+                    arrays[k][i - j : i + 1] = buffer[k][: j + 1]
+
+    _remove(out)
+    os.replace(part, out)
+
+    return out
+
+
+def _chunks(
+    dims: tuple, shape: tuple[int, ...], ct: int, itemsize: int, chunk_bytes: int
+) -> tuple[int, ...]:
+    """
+    ct times per chunk, one index of non-spatial dimensions such as species,
+    and spatial dimensions halved largest-first until the chunk is about chunk_bytes,
+    keeping chunks compact for both spatial slices and per-cell time series.
+    """
+
+    nspace = [n for d, n in zip(dims, shape[1:]) if d in SPATIAL]
+
+    budget = max(1, chunk_bytes // (itemsize * ct))
+    c = list(nspace)
+    while int(np.prod(c)) > budget:
+        i = int(np.argmax(c))
+        c[i] = (c[i] + 1) // 2
+
+    spatial = iter(c)
+
+    return (ct, *(next(spatial) if d in SPATIAL else 1 for d in dims))
+
+
+def _create(path: Path, zarr: bool):
+    if zarr:
+        try:
+            import zarr as _zarr
+        except ImportError as e:
+            raise ImportError(f"writing {path} requires zarr:  pip install zarr") from e
+        return _ZarrRoot(_zarr.open_group(str(path), mode="w"))
+
+    return h5py.File(path, "w")
+
+
+def _create_array(root, name: str, shape: tuple[int, ...], chunks: tuple[int, ...], dtype):
+    if isinstance(root, h5py.File):
+        return root.create_dataset(
+            name,
+            shape=shape,
+            chunks=chunks,
+            dtype=dtype,
+            compression="gzip",
+            compression_opts=CLVL,
+            shuffle=True,
+        )
+
+    return root.create_dataset(name, shape=shape, chunks=chunks, dtype=dtype)
+
+
+class _ZarrRoot:
+    """Zarr group as a context manager, like h5py.File"""
+
+    def __init__(self, group):
+        self.group = group
+        self.attrs = group.attrs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def create_dataset(self, name: str, **kwargs):
+        return self.group.create_dataset(name, **kwargs)
+
+
+def _remove(path: Path):
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def find_store(path: Path) -> Path | None:
+    """
+    find the consolidated store of a simulation
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        simulation directory, or the store itself
+
+    Returns
+    -------
+    store: pathlib.Path or None
+        consolidated store, or None if there is none
+    """
+
+    path = Path(path).expanduser()
+
+    if path.name in (STORE_H5, STORE_ZARR) and path.exists():
+        return path
+
+    for name in (STORE_H5, STORE_ZARR):
+        if (path / name).exists():
+            return path / name
+
+    return None
+
+
+def open_store(path: Path) -> Store:
+    """
+    open a consolidated store for reading.
+    The store is kept open for the life of the process, and reopened if it changes on disk.
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        consolidated store
+
+    Returns
+    -------
+    store: Store
+        open store
+    """
+
+    path = Path(path).expanduser().resolve()
+    mtime_ns = os.stat(path).st_mtime_ns
+    # h5py handles must not be shared across fork()
+    key = (os.getpid(), path)
+
+    with _LOCK:
+        st = _OPEN.get(key)
+        if st is None or st.mtime_ns != mtime_ns:
+            if st is not None:
+                st.close()
+            st = _OPEN[key] = Store(path)
+
+    return st
+
+
+def current(
+    simdir: Path, var: set[str] | None = None, times: list[datetime] | None = None
+) -> Store | None:
+    """
+    the consolidated store of a simulation, if it can stand in for the frame files
+
+    The store is used only if it holds every requested variable and time,
+    and no frame file at those times is newer than the store.
+    With times=None, every frame file in the directory must be in the store.
+
+    Parameters
+    ----------
+    simdir: pathlib.Path
+        top-level directory of simulation output
+    var: set of str, optional
+        variable(s) to read, default as gemini3d.read.data
+    times: list of datetime.datetime, optional
+        times to read, default all output frames
+
+    Returns
+    -------
+    store: Store or None
+        open store, or None if the frame files must be read
+    """
+
+    path = find_store(simdir)
+    if path is None:
+        return None
+
+    st = open_store(path)
+    if not st.covers(var):
+        return None
+
+    index = frame_index.get(path.parent)
+    if times is None:
+        if any(st.index(t) is None for t in index.times):
+            return None
+        files = [index.path / n for n in index.names]
+    else:
+        if any(st.index(t) is None for t in times):
+            return None
+        files = [f for f in (index.nearest(t, tol=MAX_OFFSET) for t in times) if f is not None]
+
+    for f in files:
+        try:
+            if os.stat(f).st_mtime_ns > st.mtime_ns:
+                return None
+        except FileNotFoundError:
+            pass
+
+    return st
+
+
+class Store:
+    """
+    read-only consolidated store
+
+    Parameters
+    ----------
+    path: pathlib.Path
+        consolidated store
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+
+        if self.path.suffix == ".zarr":
+            import zarr
+
+            self.root = zarr.open_group(str(self.path), mode="r")
+        else:
+            self.root = h5py.File(self.path, "r")
+
+        ymd = self.root["time/ymd"][:]
+        UTsec = self.root["time/UTsec"][:]
+        self.times = [
+            datetime(int(d[0]), int(d[1]), int(d[2])) + timedelta(seconds=float(s))
+            for d, s in zip(ymd, UTsec)
+        ]
+
+        self.flagoutput = int(self.root.attrs["flagoutput"])
+        self.all_var = bool(self.root.attrs.get("all_var", False))
+        self.coords = {k: self.root[k][:] for k in SPATIAL}
+        self.names = [k for k in self.root.keys() if k != "time" and k not in SPATIAL]
+
+    def close(self):
+        if isinstance(self.root, h5py.File):
+            self.root.close()
+
+    def covers(self, var: set[str] | None) -> bool:
+        """True if the store holds all of var, where var=None means the default variables"""
+
+        if not var:
+            return self.all_var
+        if isinstance(var, str):
+            var = [var]
+
+        return {"Phitop" if k == "Phi" else k for k in var} <= set(self.names)
+
+    def index(self, time: datetime) -> int | None:
+        """time index of the output at time, or None if not in the store"""
+
+        i = bisect.bisect_left(self.times, time)
+        cand = [j for j in (i - 1, i) if 0 <= j < len(self.times)]
+        for j in cand:
+            if abs(self.times[j] - time) <= MAX_OFFSET:
+                return j
+
+        return None
+
+    def frame(
+        self,
+        time: datetime,
+        var: set[str] | None = None,
+        *,
+        x1: slice | None = None,
+        x2: slice | None = None,
+        x3: slice | None = None,
+    ) -> xarray.Dataset:
+        """
+        read one output time, like gemini3d.read.data
+
+        Parameters
+        ----------
+        time: datetime.datetime
+            time to read
+        var: set of str
+            variable(s) to read
+        x1, x2, x3: slice, optional
+            read only this sub-volume
+
+        Returns
+        -------
+        dat: xarray.Dataset
+            simulation output for this time step
+        """
+
+        i = self.index(time)
+        if i is None:
+            raise FileNotFoundError(f"{time} not found in {self.path}")
+
+        sel = {k: _slice(s) for k, s in zip(SPATIAL, (x1, x2, x3))}
+
+        dat = xarray.Dataset(coords={k: self.coords[k][sel[k]] for k in SPATIAL})
+
+        for k in self._names(var):
+            dims = self._dims(k)
+            key = (i, *(sel.get(d, slice(None)) for d in dims[1:]))
+            dat[k] = (dims[1:], self.root[k][key])
+
+        dat.attrs["flagoutput"] = self.flagoutput
+
+        return dat.assign_coords(time=self.times[i])
+
+    def series(
+        self, var: set[str] | None = None, *, times: list[datetime] | None = None
+    ) -> xarray.Dataset:
+        """
+        lazily load a time series, like gemini3d.read.series
+
+        Parameters
+        ----------
+        var: set of str
+            variable(s) to read
+        times: list of datetime.datetime, optional
+            times to load, default all times in the store
+
+        Returns
+        -------
+        dat: xarray.Dataset
+            lazily-loaded simulation output over time
+        """
+
+        dat = xarray.Dataset(coords=self.coords)
+        dat = dat.assign_coords(time=self.times)
+
+        for k in self._names(var):
+            arr = indexing.LazilyIndexedArray(_StoreArray(self.root[k]))
+            dat[k] = xarray.Variable(self._dims(k), arr)
+
+        dat.attrs["flagoutput"] = self.flagoutput
+
+        if times is not None:
+            idx = [self.index(t) for t in times]
+            missing = [t for t, i in zip(times, idx) if i is None]
+            if missing:
+                raise FileNotFoundError(f"{missing} not found in {self.path}")
+            dat = dat.isel(time=idx)
+
+        return dat
+
+    def _names(self, var: set[str] | None) -> list[str]:
+        if not var:
+            return self.names
+        if isinstance(var, str):
+            var = [var]
+        var = {"Phitop" if k == "Phi" else k for k in var}
+
+        return [k for k in self.names if k in var]
+
+    def _dims(self, name: str) -> tuple[str, ...]:
+        return tuple(str(d) for d in self.root[name].attrs["dims"])
+
+
+class _StoreArray(BackendArray):
+    """one variable of the store, read on indexing"""
+
+    def __init__(self, array):
+        self.array = array
+        self.shape = tuple(array.shape)
+        self.dtype = np.dtype(array.dtype)
+
+    def __getitem__(self, key: indexing.ExplicitIndexer) -> np.ndarray:
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self.array.__getitem__
+        )
+
+
+def _slice(s: slice | int | None) -> slice:
+    """sub-volume selection as a slice, keeping the dimension for an int"""
+
+    if s is None:
+        return slice(None)
+    if isinstance(s, (int, np.integer)):
+        return slice(s, s + 1) if s != -1 else slice(s, None)
+
+    return s
+
+
+def cli():
+    p = argparse.ArgumentParser(
+        description="pack simulation output frames into one chunked time-series store"
+    )
+    p.add_argument("simdir", help="top-level simulation output directory")
+    p.add_argument("-zarr", help="write a Zarr store instead of HDF5", action="store_true")
+    p.add_argument("-var", help="variable names to store", nargs="+")
+    P = p.parse_args()
+
+    out = consolidate(P.simdir, zarr=P.zarr, var=P.var)
+    print(out)
+
+
+if __name__ == "__main__":
+    cli()
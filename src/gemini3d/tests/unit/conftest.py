@@ -0,0 +1,98 @@
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pytest
+import numpy as np
+import xarray
+import h5py
+
+from gemini3d.hdf5 import write as h5write
+from gemini3d.utils import datetime2ymd_hourdec
+from gemini3d import LSP
+from gemini3d.grid.convert import Re
+
+T0 = datetime(2013, 2, 20, 5)
+DTOUT = 60.0
+NT = 4
+LX = (6, 4, 3)
+GLAT = 65.0
+GLON = 212.0
+
+NML = f"""
+&base
+ymd = {T0.year},{T0.month},{T0.day}
+UTsec0 = {T0.hour * 3600.0}
+tdur = {(NT - 1) * DTOUT}
+dtout = {DTOUT}
+activ = 108.9, 111.0, 5
+tcfl = 0.9
+Teinf = 1500.0
+/
+
+&flags
+potsolve = 1
+flagoutput = 1
+/
+
+&files
+indat_size = 'inputs/simsize.h5'
+indat_grid = 'inputs/simgrid.h5'
+indat_file = 'inputs/initial_conditions.h5'
+/
+"""
+
+
+def frame_values(it: int) -> xarray.Dataset:
+    """
+    synthetic flagoutput=1 frame, distinct per species, cell and time index
+    """
+
+    lx = LX
+    n = np.arange(LSP * np.prod(lx), dtype=np.float32).reshape((LSP, *lx))
+
+    dims4 = ("species", "x1", "x2", "x3")
+    dims3 = ("x1", "x2", "x3")
+
+    dat = xarray.Dataset()
+    dat["ns"] = (dims4, 1e10 * (1 + n + 100 * it))
+    dat["vs1"] = (dims4, 1 + n / 10 + it)
+    dat["Ts"] = (dims4, 1000 + n + it)
+    for i, k in enumerate(("J1", "J2", "J3", "v2", "v3")):
+        dat[k] = (dims3, n[i] + it)
+    dat["Phitop"] = (("x2", "x3"), n[0, 0] + it)
+
+    return dat
+
+
+@pytest.fixture
+def sim_dir(tmp_path: Path) -> Path:
+    """
+    tiny synthetic flagoutput=1 simulation output directory
+    """
+
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    (inputs / "config.nml").write_text(NML)
+
+    xg = {f"x{i+1}": (np.arange(-2, lx + 2) - (lx - 1) / 2) * 1e3 for i, lx in enumerate(LX)}
+    xg["lx"] = np.array(LX)
+    xg["h1"] = np.ones([lx + 4 for lx in LX])
+    # Cartesian x2 east, x3 north, centered on GLAT, GLON
+    X2, X3 = np.meshgrid(xg["x2"][2:-2], xg["x3"][2:-2], indexing="ij")
+    xg["glat"] = np.broadcast_to(GLAT + np.degrees(X3 / Re), LX)
+    xg["glon"] = np.broadcast_to(GLON + np.degrees(X2 / (Re * np.cos(np.radians(GLAT)))), LX)
+    h5write.grid(inputs / "simsize.h5", inputs / "simgrid.h5", xg)
+
+    for it in range(NT):
+        t = T0 + timedelta(seconds=it * DTOUT)
+        dat = frame_values(it)
+        with h5py.File(tmp_path / (datetime2ymd_hourdec(t) + ".h5"), "w") as f:
+            h5write.write_time(f, t)
+            for k in ("ns", "vs1", "Ts", "J1", "J2", "J3"):
+                h5write._write_var(f, f"/{k}all", dat[k])
+            for k in ("v2", "v3"):
+                h5write._write_var(f, f"/{k}avgall", dat[k])
+            h5write._write_var(f, "/Phiall", dat["Phitop"])
+
+    return tmp_path
@@ -6,6 +6,7 @@ from pathlib import Path
 import gemini3d
 import gemini3d.find as find
 import gemini3d.web
+import gemini3d.frame_index
 
 
 def test_config(tmp_path):
@@ -67,3 +68,29 @@ def test_frame(name, tmp_path):
 
     fn = find.frame(test_dir, t)
     assert fn.name == "20130220_18000.000000.h5"
+
+
+def test_frame_index(tmp_path):
+
+    t0 = datetime(2013, 2, 20, 5)
+    names = ["20130220_18000.000000.h5", "20130220_18060.000000.h5", "20130220_18119.999990.h5"]
+    for n in names:
+        (tmp_path / n).touch()
+    (tmp_path / "simgrid.h5").touch()
+
+    assert find.frame(tmp_path, t0).name == names[0]
+    # real32 tick workaround
+    assert find.frame(tmp_path, datetime(2013, 2, 20, 5, 2)).name == names[2]
+
+    with pytest.raises(FileNotFoundError):
+        find.frame(tmp_path, datetime(2013, 2, 20, 5, 3))
+
+    idx = gemini3d.frame_index.get(tmp_path)
+    assert idx.names == names
+    assert (tmp_path / gemini3d.frame_index.SIDECAR).is_file()
+
+    # new frames are picked up incrementally, also by a fresh process reading the sidecar
+    (tmp_path / "20130220_18180.000000.h5").touch()
+    gemini3d.frame_index.clear()
+    assert find.frame(tmp_path, datetime(2013, 2, 20, 5, 3)).name == "20130220_18180.000000.h5"
+    assert len(gemini3d.frame_index.get(tmp_path)) == 4
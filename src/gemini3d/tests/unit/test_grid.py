@@ -0,0 +1,233 @@
+import os
+import tracemalloc
+
+import h5py
+import numpy as np
+import pytest
+from pytest import approx
+
+import gemini3d.grid.cartesian as cartesian
+import gemini3d.grid.store as store
+import gemini3d.grid.tilted_dipole as dipole
+import gemini3d.hdf5.write as h5write
+import gemini3d.model as model
+import gemini3d.write as write
+from gemini3d.grid.compact import LazyField, is_compact
+from gemini3d.grid.newton_method import qp2rtheta, qp2rtheta_array
+
+PARM = {
+    "lq": 24,
+    "lp": 16,
+    "lphi": 3,
+    "dtheta": 7.5,
+    "dphi": 12.0,
+    "altmin": 80e3,
+    "glon": 143.4,
+    "glat": 42.45,
+}
+
+CART = {
+    "xdist": 200e3,
+    "ydist": 300e3,
+    "lxp": 10,
+    "lyp": 12,
+    "alt_min": 80e3,
+    "alt_max": 900e3,
+    "alt_scale": [10e3, 8e3, 500e3, 150e3],
+    "Bincl": 90,
+    "glat": 65.0,
+    "glon": 213.0,
+}
+
+
+@pytest.mark.parametrize("gridflag", [0, 1])
+def test_qp2rtheta_array(gridflag):
+    xg = dipole.tilted_dipole3d({**PARM, "gridflag": gridflag})
+
+    # the grid's q, p are recovered from r, theta: check all points against the scalar path
+    r = xg["r"]
+    theta = xg["theta"]
+    q = np.cos(theta) / (r / dipole.Re) ** 2
+    p = r / dipole.Re / np.sin(theta) ** 2
+
+    r_vec, theta_vec = qp2rtheta_array(q, p)
+    for i in np.ndindex(q.shape[:2]):
+        rs, ts = qp2rtheta(q[i][0], p[i][0])
+        assert r_vec[i][0] == approx(rs, rel=1e-12)
+        assert theta_vec[i][0] == approx(ts, rel=1e-12, abs=1e-12)
+
+    assert r_vec == approx(r, rel=1e-9)
+
+
+def test_qp2rtheta_equator():
+    r, theta = qp2rtheta_array([0.0, 0.5], 2.0)
+
+    assert r[0] == approx(2 * dipole.Re)
+    assert theta[0] == approx(np.pi / 2)
+    assert r[1] == approx(qp2rtheta(0.5, 2.0)[0], rel=1e-12)
+
+
+def test_compact_dipole():
+    xg = dipole.tilted_dipole3d({**PARM, "gridflag": 1})
+
+    theta = np.asarray(xg["theta"])
+    phi = np.asarray(xg["phi"])
+    er = np.stack((np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)), axis=3)
+
+    assert xg["h1"].shape == tuple(xg["lx"] + 4)
+    assert not xg["h1"].flags.writeable
+    assert isinstance(xg["er"], LazyField)
+    assert np.asarray(xg["er"]) == approx(er, rel=1e-12)
+    # gravity projections are computed in closed form on the meridional plane
+    g = xg["gx1"] / np.sum(-er * xg["e1"], axis=3)
+    assert xg["gx2"] == approx(g * np.sum(-er * xg["e2"], axis=3), rel=1e-9)
+
+    # indexing a transposed field matches the expanded array
+    e1 = xg["e1"].transpose()
+    full = np.asarray(xg["e1"]).transpose()
+    assert e1.shape == full.shape
+    assert np.array_equal(e1[1, ::-2, 3:], full[1, ::-2, 3:])
+    assert np.array_equal(e1[..., -1], full[..., -1])
+
+
+def test_compact_write(tmp_path, monkeypatch):
+    xg = dipole.tilted_dipole3d({**PARM, "gridflag": 0})
+    full = {k: np.array(v) if np.ndim(v) else v for k, v in xg.items()}
+
+    # stream every dataset through the chunk-by-chunk path
+    monkeypatch.setattr(h5write, "DIRECT_BYTES", 1)
+
+    for profile in ("fast", "balanced"):
+        h5write.grid(tmp_path / "s0.h5", tmp_path / "g0.h5", full, compression=profile)
+        h5write.grid(tmp_path / "s1.h5", tmp_path / "g1.h5", xg, compression=profile)
+
+        with h5py.File(tmp_path / "g0.h5", "r") as f0, h5py.File(tmp_path / "g1.h5", "r") as f1:
+            assert f0.keys() == f1.keys()
+            for k in f0:
+                assert np.array_equal(f0[k][()], f1[k][()]), k
+
+
+def test_compact_cartesian(tmp_path):
+    xg = cartesian.cart3d(CART)
+
+    lx = tuple(xg["lx"])
+    assert xg["h2x1i"].shape == (lx[0] + 1, *lx[1:])
+    assert xg["h1"].strides == (0, 0, 0)
+    assert isinstance(xg["e3"], LazyField)
+    assert xg["e3"].shape == (*lx, 3)
+    assert np.asarray(xg["z"]) == approx(xg["r"] * np.cos(xg["theta"]), rel=1e-12)
+
+    h5write.grid(tmp_path / "simsize.h5", tmp_path / "simgrid.h5", xg)
+
+    with h5py.File(tmp_path / "simgrid.h5", "r") as f:
+        # constant fields are the dataset fill value, with no chunks stored
+        assert f["h1"].shape == tuple(n + 4 for n in lx[::-1])
+        assert f["h1"].id.get_storage_size() == 0
+        assert (f["h1"][()] == 1).all()
+        assert (f["gx2"][()] == 0).all()
+        assert f["e3"][()] == approx(np.asarray(xg["e3"]).transpose(), rel=1e-6)
+        assert f["y"][()] == approx(np.asarray(xg["y"]).transpose(), rel=1e-6)
+
+
+def test_streamed_write(tmp_path, monkeypatch):
+    """peak memory of grid generation and writing does not grow with lphi"""
+
+    monkeypatch.setattr(h5write, "DIRECT_BYTES", 1)
+
+    peak = {}
+    for lphi in (16, 256):
+        tracemalloc.start()
+        xg = dipole.tilted_dipole3d({**PARM, "lq": 48, "lp": 32, "lphi": lphi, "gridflag": 1})
+        h5write.grid(tmp_path / "simsize.h5", tmp_path / "simgrid.h5", xg, layout=(48, 32, 8))
+        peak[lphi] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    # one 4-D float64 field at lphi=256
+    assert peak[256] < 48 * 32 * 256 * 3 * 8 / 2
+    assert peak[256] < 1.5 * peak[16]
+
+    with h5py.File(tmp_path / "simgrid.h5", "r") as f:
+        assert f["er"].shape == (3, 256, 32, 48)
+        assert f["er"][:, -1, 3, 5] == approx(xg["er"][5, 3, -1], rel=1e-6)
+
+
+def test_store(tmp_path, monkeypatch):
+    monkeypatch.delenv(store.ENV, raising=False)
+
+    cfg = {
+        **PARM,
+        "gridflag": 1,
+        "Qprecip": 1.0,
+        "indat_size": tmp_path / "a/inputs/simsize.h5",
+        "indat_grid": tmp_path / "a/inputs/simgrid.h5",
+    }
+    assert store.directory(cfg) is None
+    assert not store.fetch(cfg)
+
+    # only grid-defining parameters are part of the key
+    assert store.key(cfg) == store.key({**cfg, "Qprecip": 2.0})
+    assert store.key(cfg) != store.key({**cfg, "lphi": 4})
+
+    monkeypatch.setenv(store.ENV, str(tmp_path / "store"))
+    assert not store.fetch(cfg)
+
+    write.grid(cfg, dipole.tilted_dipole3d(cfg))
+    entry = store.put(cfg)
+    assert entry.name == store.key(cfg)
+
+    other = {
+        **cfg,
+        "indat_size": tmp_path / "b/inputs/simsize.h5",
+        "indat_grid": tmp_path / "b/inputs/simgrid.h5",
+    }
+    assert store.fetch(other)
+    for k in ("indat_size", "indat_grid"):
+        assert other[k].read_bytes() == cfg[k].read_bytes()
+
+    # a generated grid is used as is, a reused grid is read back for the setup variables only
+    new = {
+        **cfg,
+        "lphi": 4,
+        "indat_size": tmp_path / "c/inputs/simsize.h5",
+        "indat_grid": tmp_path / "c/inputs/simgrid.h5",
+    }
+    xg = model.grid(new)
+    assert is_compact(xg["h1"])
+    assert xg["x1"].dtype == np.float64
+    xg2 = model.grid({**new, "indat_size": other["indat_size"], "indat_grid": other["indat_grid"]})
+    assert xg2.keys() == model.SETUP_VAR | {"lx", "filename"}
+    for k in model.SETUP_VAR:
+        assert np.allclose(xg2[k], xg[k], rtol=1e-6, atol=0), k
+
+    # regenerating a fetched grid replaces the link, leaving the store intact
+    stored = (entry / "simgrid.h5").read_bytes()
+    write.grid(other, cartesian.cart3d(CART))
+    assert (entry / "simgrid.h5").read_bytes() == stored
+
+
+def test_store_eq_dir(tmp_path):
+    cfg = {**CART, "lzp": 20}
+    del cfg["alt_scale"]
+
+    assert store.key(cfg) is not None
+    assert store.key({**cfg, "eq_dir": tmp_path / "missing.h5"}) == store.key(cfg)
+
+    # cart3d takes the altitudes from an eq_dir grid file, which is not part of the key
+    eq_grid = tmp_path / "simgrid.h5"
+    eq_grid.write_bytes(bytes(8))
+    assert store.key({**cfg, "eq_dir": eq_grid}) is None
+    assert store.key({**CART, "eq_dir": eq_grid}) is not None
+
+
+def test_store_evict(tmp_path):
+    root = tmp_path / "store"
+    for i, name in enumerate(("old", "mid", "new")):
+        d = root / name
+        d.mkdir(parents=True)
+        (d / "simgrid.h5").write_bytes(bytes(100))
+        os.utime(d, ns=(i * 10**9, i * 10**9))
+
+    removed = store.evict(root, 250, keep=root / "old")
+
+    assert removed == [root / "mid"]
+    assert sorted(d.name for d in root.iterdir()) == ["new", "old"]
@@ -0,0 +1,56 @@
+import numpy as np
+from pytest import approx
+
+import gemini3d.cache
+import gemini3d.read as read
+import gemini3d.integrate as integrate
+
+from .conftest import NT, LX, GLAT, GLON
+
+
+def test_column(sim_dir, monkeypatch):
+    ref = read.series(sim_dir, var={"ne", "J1"}).load()
+
+    # x1 cells are 1 km apart
+    w = integrate.x1_weights(sim_dir)
+    assert w.shape == LX
+    assert w == approx(1e3)
+    assert integrate.x1_weights(sim_dir) is w
+
+    # several x3 blocks per frame
+    monkeypatch.setattr(integrate, "BLOCK_BYTES", 2 * 8 * LX[0] * LX[1])
+
+    dat = integrate.column(sim_dir, var={"ne", "J1"})
+    for k in ("ne", "J1"):
+        assert dat[k].shape == (NT, LX[1], LX[2])
+        assert dat[k].values == approx(1e3 * ref[k].sum(dim="x1").values, rel=1e-6)
+
+    dat = integrate.column(sim_dir, var="ne", x1=slice(1, 4))
+    assert dat["ne"].values == approx(1e3 * ref["ne"][:, 1:4].sum(dim="x1").values, rel=1e-6)
+
+
+def test_weights_grid_cache(sim_dir):
+    # an enabled global cache is used even while still empty
+    cache = gemini3d.cache.enable_grid_cache()
+    try:
+        w = integrate.x1_weights(sim_dir)
+        # the grid and the weights
+        assert len(cache) == 2
+        assert integrate.x1_weights(sim_dir) is w
+    finally:
+        gemini3d.cache.disable_grid_cache()
+
+
+def test_line(sim_dir):
+    ref = read.series(sim_dir, var="J1").load()
+
+    # vertical line through the x2 = x3 = 0 cell centers, as the Cartesian grid is vertical
+    x1 = ref.x1.values
+    lon = GLON + np.degrees(ref.x2.values[1] / (integrate.Re * np.cos(np.radians(GLAT))))
+    alt = np.linspace(x1[0], x1[-1], 11)
+
+    dat = integrate.line(sim_dir, GLAT, lon, alt, var="J1")
+
+    expect = ref["J1"][:, :, 1, 1]
+    expect = np.trapz(expect.values, x1, axis=1)
+    assert dat["J1"].values == approx(expect, rel=1e-3)
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+import numpy as np
+import scipy.interpolate
+import pytest
+from pytest import approx
+
+import gemini3d.read as read
+import gemini3d.probe as probe
+from gemini3d.grid.convert import Re
+from gemini3d import LSP
+
+from .conftest import T0, DTOUT, NT, GLAT, GLON, frame_values
+
+
+def _geog(x1, x2, x3):
+    """model coordinates of the Cartesian test grid to geographic"""
+
+    glat = GLAT + np.degrees(x3 / Re)
+    glon = GLON + np.degrees(x2 / (Re * np.cos(np.radians(GLAT))))
+
+    return glat, glon, x1
+
+
+def _ref(xg, name: str, it: float, x1, x2, x3):
+    """trilinear in space, linear in time"""
+
+    def values(i):
+        dat = frame_values(i)
+        return dat["ns"][LSP - 1].values if name == "ne" else dat[name].values
+
+    pts = tuple(xg[k][2:-2] for k in ("x1", "x2", "x3"))
+    xi = np.column_stack((x1, x2, x3))
+
+    i = int(it)
+    a = it - i
+    v = (1 - a) * scipy.interpolate.interpn(pts, values(i), xi)
+    if a > 0:
+        v += a * scipy.interpolate.interpn(pts, values(i + 1), xi)
+
+    return v
+
+
+def test_track(sim_dir):
+    xg = read.grid(sim_dir)
+
+    x1 = np.array([-1800.0, 0.0, 1200.0, 2400.0, 9e9])
+    x2 = np.array([-1400.0, -300.0, 0.0, 1000.0, 0.0])
+    x3 = np.array([-900.0, 250.0, 0.0, 400.0, 0.0])
+    # in frame units: between frames, on a frame, between frames, last frame, after the run
+    it = np.array([0.25, 1.0, 2.5, NT - 1, NT + 1])
+    time = [T0 + timedelta(seconds=i * DTOUT) for i in it]
+
+    dat = probe.track(sim_dir, time, *_geog(x1, x2, x3), var={"ne", "J2"})
+
+    for k in ("ne", "J2"):
+        for j in range(4):
+            ref = _ref(xg, k, it[j], x1[j : j + 1], x2[j : j + 1], x3[j : j + 1])
+            assert dat[k][j].item() == approx(ref.item(), rel=1e-4)
+        # outside the grid and after the run
+        assert np.isnan(dat[k][4])
+
+
+def test_points(sim_dir, monkeypatch):
+    xg = read.grid(sim_dir)
+
+    x1 = np.array([-2000.0, 500.0])
+    x2 = np.array([1200.0, -100.0])
+    x3 = np.array([0.0, -500.0])
+
+    # read each point's cells separately
+    monkeypatch.setattr(probe, "BOX_CELLS_PER_SAMPLE", 1)
+
+    dat = probe.points(sim_dir, *_geog(x1, x2, x3), var="J1")
+
+    assert dat["J1"].shape == (NT, 2)
+    for i in range(NT):
+        assert dat["J1"][i].values == approx(_ref(xg, "J1", i, x1, x2, x3), rel=1e-4)
+
+
+def test_track_empty(sim_dir):
+    dat = probe.track(sim_dir, [], [], [], [], var={"ne", "J2"})
+
+    assert set(dat.data_vars) == {"ne", "J2"}
+    assert dat.sizes["sample"] == 0
+
+
+def test_grouped_reads(sim_dir, monkeypatch):
+    xg = read.grid(sim_dir)
+
+    # two pairs of points in neighboring cells, at opposite corners of the grid
+    x1 = np.array([-2400.0, -1400.0, 1400.0, 2400.0])
+    x2 = np.array([-1400.0, -1300.0, 1300.0, 1400.0])
+    x3 = np.array([-900.0, -900.0, 900.0, 900.0])
+
+    monkeypatch.setattr(probe, "BOX_CELLS_PER_SAMPLE", 4)
+    calls = []
+    frame = probe.h5read.frame
+
+    def counted(*args, **kwargs):
+        calls.append(kwargs)
+        return frame(*args, **kwargs)
+
+    monkeypatch.setattr(probe.h5read, "frame", counted)
+
+    dat = probe.points(sim_dir, *_geog(x1, x2, x3), var="J1")
+
+    # one hyperslab per pair per frame
+    assert len(calls) == 2 * NT
+    for i in range(NT):
+        assert dat["J1"][i].values == approx(_ref(xg, "J1", i, x1, x2, x3), rel=1e-4)
+
+
+def test_probe_2d_var(sim_dir):
+    with pytest.raises(ValueError):
+        probe.points(sim_dir, GLAT, GLON, 0.0, var="Phi")
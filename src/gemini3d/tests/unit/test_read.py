@@ -0,0 +1,288 @@
+from pathlib import Path
+from datetime import timedelta
+import os
+
+import h5py
+import numpy as np
+import pytest
+import xarray
+from pytest import approx
+
+import gemini3d.cache
+import gemini3d.store
+import gemini3d.find as find
+import gemini3d.read as read
+import gemini3d.hdf5.read as h5read
+import gemini3d.hdf5.write as h5write
+from gemini3d.utils import to_datetime
+from gemini3d import LSP
+
+from .conftest import T0, DTOUT, NT, LX, frame_values
+
+
+def test_frame(sim_dir):
+    dat = read.frame(sim_dir, T0 + timedelta(seconds=DTOUT), var={"ne", "Te", "J1", "Phi"})
+    ref = frame_values(1)
+
+    assert dat["ne"].shape == LX
+    assert dat["ne"].values == approx(ref["ns"][LSP - 1].values)
+    assert dat["Te"].values == approx(ref["Ts"][LSP - 1].values)
+    assert dat["J1"].values == approx(ref["J1"].values)
+    assert dat["Phitop"].values == approx(ref["Phitop"].values)
+
+
+def test_frame_interp(sim_dir, monkeypatch):
+    read.clear_frame_cache()
+
+    opened = []
+    data = read.data
+    monkeypatch.setattr(read, "data", lambda fn, **kw: opened.append(fn) or data(fn, **kw))
+
+    # monotonic times decode each bracketing frame once
+    for s in (15.0, 30.0, 60.0, 90.0, 150.0):
+        t = T0 + timedelta(seconds=s)
+        dat = read.frame(sim_dir, t, var={"ne", "J1"}, interp="linear")
+        i = int(s // DTOUT)
+        w = s / DTOUT - i
+        for k, ref in (("ne", "ns"), ("J1", "J1")):
+            a = frame_values(i)[ref]
+            b = frame_values(i + 1)[ref]
+            if k == "ne":
+                a = a[LSP - 1]
+                b = b[LSP - 1]
+            assert dat[k].values == approx((1 - w) * a.values + w * b.values, rel=1e-6)
+        assert to_datetime(dat.time) == t
+        assert dat.attrs["flagoutput"] == 1
+
+    assert len(opened) == NT
+    assert len(set(opened)) == NT
+
+    with pytest.raises(ValueError):
+        read.frame(sim_dir, T0 + timedelta(seconds=DTOUT * NT), interp="linear")
+
+
+def test_series(sim_dir):
+    dat = read.series(sim_dir, var={"ne", "v1"})
+
+    assert dat["ne"].shape == (NT, *LX)
+    assert dat.time.size == NT
+
+    # a single-cell time series
+    ts = dat["ne"][:, 1, 2, 0].values
+    assert ts == approx([frame_values(i)["ns"][LSP - 1, 1, 2, 0].item() for i in range(NT)])
+
+    ref = read.frame(sim_dir, T0 + timedelta(seconds=2 * DTOUT), var="v1")
+    assert dat["v1"].isel(time=2).values == approx(ref["v1"].values)
+
+
+def test_hyperslab(sim_dir):
+    file = sim_dir / "20130220_18060.000000.h5"
+    full = read.data(file, var={"ne", "v1", "Ti", "J2", "Phi"})
+    sub = read.data(
+        file, var={"ne", "v1", "Ti", "J2", "Phi"}, x1=slice(1, 5, 2), x2=2, x3=slice(1, None)
+    )
+
+    sel = {"x1": slice(1, 5, 2), "x2": slice(2, 3), "x3": slice(1, None)}
+    for k in ("ne", "v1", "Ti", "J2"):
+        assert sub[k].shape == (2, 1, 2)
+        assert sub[k].values == approx(full[k].isel(sel).values)
+    assert sub["Phitop"].values == approx(full["Phitop"].isel(x2=sel["x2"], x3=sel["x3"]).values)
+    assert sub.x1.values == approx(full.x1[sel["x1"]].values)
+
+
+@pytest.mark.parametrize("var", [{"ne"}, {"Te"}, {"Ti"}, {"v1"}, {"Ti", "Te", "v1"}, {"ns", "Te"}])
+def test_species_select(sim_dir, var):
+    file = sim_dir / "20130220_18120.000000.h5"
+    ref = frame_values(2)
+    ns = ref["ns"].values
+    ne = ns[LSP - 1]
+
+    dat = read.data(file, var=var)
+
+    assert not {"ns", "vs1", "Ts"} - var & set(dat.data_vars)
+
+    if "ne" in var:
+        assert dat["ne"].values == approx(ne)
+    if "Te" in var:
+        assert dat["Te"].values == approx(ref["Ts"][LSP - 1].values)
+    if "Ti" in var:
+        Ti = (ns[:-1] * ref["Ts"].values[:-1]).sum(axis=0) / ne
+        assert dat["Ti"].values == approx(Ti, rel=1e-5)
+    if "v1" in var:
+        v1 = (ns[:-1] * ref["vs1"].values[:-1]).sum(axis=0) / ne
+        assert dat["v1"].values == approx(v1, rel=1e-5)
+    if "ns" in var:
+        assert dat["ns"].values == approx(ns)
+
+
+def test_frame_reader_single_open(sim_dir, monkeypatch):
+    opened = []
+
+    class CountingFile(h5py.File):
+        def __init__(self, name, *args, **kwargs):
+            opened.append(Path(name).name)
+            super().__init__(name, *args, **kwargs)
+
+    with read.FrameReader(sim_dir) as reader:
+        monkeypatch.setattr(h5read.h5py, "File", CountingFile)
+        for i, t in enumerate(reader.times):
+            dat = reader.frame(t, var={"ne", "Ti"})
+            assert to_datetime(dat.time) == t
+            assert dat["ne"].values == approx(frame_values(i)["ns"][LSP - 1].values)
+
+    assert opened == [reader.file(t).name for t in reader.times]
+
+
+def test_grid_cache(sim_dir):
+    cache = gemini3d.cache.enable_grid_cache()
+    try:
+        xg = read.grid(sim_dir)
+        xg2 = read.grid(sim_dir)
+        assert cache.hits == 1 and cache.misses == 1
+        assert xg2["x1"] is xg["x1"]
+        assert xg2 is not xg
+
+        with pytest.raises(ValueError):
+            xg["x1"][0] = 0
+
+        # different variable set is a different entry
+        read.grid(sim_dir, var={"x1", "x2"})
+        assert len(cache) == 2
+
+        # byte budget evicts least recently used
+        cache.resize(cache.nbytes - 1)
+        assert len(cache) == 1
+    finally:
+        gemini3d.cache.disable_grid_cache()
+
+    assert read.grid(sim_dir)["x1"].flags.writeable
+
+
+def test_ion_average_blockwise(sim_dir):
+    """
+    v1, Ti accumulated a chunk of x3 at a time, without transposed copies
+    """
+
+    file = sim_dir / "20130220_18180.000000.h5"
+    ref = frame_values(3)
+
+    with h5py.File(file, "r+") as f:
+        for k in ("ns", "vs1", "Ts"):
+            A = f[f"/{k}all"][:]
+            del f[f"/{k}all"]
+            f.create_dataset(f"/{k}all", data=A, chunks=(LSP, 1, *A.shape[2:]))
+
+    dat = read.data(file, var={"ne", "v1", "Ti"}, x3=slice(0, None, 2))
+
+    ns = ref["ns"].values[..., ::2]
+    for k, w in (("v1", "vs1"), ("Ti", "Ts")):
+        assert dat[k].data.flags.f_contiguous
+        avg = (ns[:-1] * ref[w].values[:-1, ..., ::2]).sum(axis=0) / ns[-1]
+        assert dat[k].values == approx(avg, rel=1e-5)
+    assert dat["ne"].values == approx(ns[-1])
+
+
+@pytest.mark.parametrize("prefetch,processes", [(0, True), (2, False), (2, True)])
+def test_iter_frames(sim_dir, prefetch, processes):
+    frames = read.iter_frames(sim_dir, var={"ne", "J1"}, prefetch=prefetch, processes=processes)
+
+    for i, dat in enumerate(frames):
+        assert to_datetime(dat.time) == T0 + timedelta(seconds=i * DTOUT)
+        assert dat["J1"].values == approx(frame_values(i)["J1"].values)
+    assert i == NT - 1
+
+    # stopping early cancels the frames read ahead
+    frames = read.iter_frames(sim_dir, var="ne", prefetch=prefetch, processes=processes)
+    assert next(frames)["ne"].shape == LX
+    frames.close()
+
+
+def test_batch(sim_dir):
+    dat = read.batch(sim_dir, var={"ne", "Ti", "Phi"}, workers=2)
+    ref = read.series(sim_dir, var={"ne", "Ti", "Phi"}).load()
+
+    assert dat.time.size == NT
+    for k in ("ne", "Ti", "Phitop"):
+        assert dat[k].dims == ref[k].dims
+        assert dat[k].values == approx(ref[k].values)
+
+
+def test_store(sim_dir):
+    ref = read.series(sim_dir, var={"ne", "v1", "Phi"}).load()
+
+    out = gemini3d.store.consolidate(sim_dir, var={"ne", "v1", "Phi"}, chunk_bytes=32)
+    assert out == sim_dir / gemini3d.store.STORE_H5
+    with h5py.File(out, "r") as f:
+        assert f["ne"].shape == (NT, *LX)
+        assert f["ne"].chunks[0] == NT
+        assert f.attrs["flagoutput"] == 1
+
+    t = T0 + timedelta(seconds=2 * DTOUT)
+    assert gemini3d.store.current(sim_dir, {"ne", "Phi"}) is not None
+    # variables not in the store, or frames newer than the store, are read from the frame files
+    assert gemini3d.store.current(sim_dir) is None
+    assert gemini3d.store.current(sim_dir, {"ne", "Te"}) is None
+    assert "Te" in read.frame(sim_dir, t, var={"ne", "Te"})
+
+    file = find.frame(sim_dir, t)
+    mtime = file.stat().st_mtime + 10
+    os.utime(file, (mtime, mtime))
+    assert gemini3d.store.current(sim_dir, {"ne"}) is None
+    assert gemini3d.store.current(sim_dir, {"ne"}, [t]) is None
+    assert gemini3d.store.current(sim_dir, {"ne"}, [T0]) is not None
+
+    # the store is read transparently, without the frame files
+    for file in sim_dir.glob("2013*.h5"):
+        file.unlink()
+
+    dat = read.frame(sim_dir, t, var={"ne", "Phi"})
+    assert set(dat.data_vars) == {"ne", "Phitop"}
+    assert to_datetime(dat.time) == t
+    assert dat["ne"].values == approx(ref["ne"].isel(time=2).values)
+    assert dat["Phitop"].values == approx(ref["Phitop"].isel(time=2).values)
+
+    dat = read.series(sim_dir, var="v1")
+    assert dat["v1"][:, 1, 2, 0].values == approx(ref["v1"][:, 1, 2, 0].values)
+    assert dat.time.size == NT
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_Efield_series(tmp_path, workers):
+    time = [T0 + timedelta(seconds=i * DTOUT) for i in range(NT)]
+    mlon = np.linspace(-10, 10, 5)
+    mlat = np.linspace(60, 70, 3)
+    rng = np.random.default_rng(0)
+
+    E = xarray.Dataset(coords={"time": time, "mlon": mlon, "mlat": mlat})
+    E["flagdirich"] = ("time", np.arange(NT) % 2)
+    for k in ("Exit", "Eyit", "Vminx1it", "Vmaxx1it"):
+        E[k] = (("time", "mlon", "mlat"), rng.random((NT, mlon.size, mlat.size)))
+    for k in ("Vminx2ist", "Vmaxx2ist"):
+        E[k] = (("time", "mlat"), rng.random((NT, mlat.size)))
+    for k in ("Vminx3ist", "Vmaxx3ist"):
+        E[k] = (("time", "mlon"), rng.random((NT, mlon.size)))
+
+    h5write.Efield(tmp_path, E)
+
+    dat = read.Efield_series(tmp_path, workers=workers)
+    assert [to_datetime(t) for t in dat.time] == time
+    assert dat["flagdirich"].values.tolist() == E["flagdirich"].values.tolist()
+    for k in ("Exit", "Vminx2ist", "Vmaxx3ist"):
+        assert dat[k].dims == E[k].dims
+        assert dat[k].values == approx(E[k].values, rel=1e-6)
+
+    dat = read.Efield_series(tmp_path, times=time[1:3])
+    assert dat["Eyit"].values == approx(E["Eyit"][1:3].values, rel=1e-6)
+
+    # per-frame reader agrees, with coordinates from the cache
+    frame = read.Efield(find.frame(tmp_path, time[2]))
+    assert frame["Exit"].values == approx(dat["Exit"][1].values.T)
+    assert h5read._INPUT_COORDS.hits > 0
+
+    # an enabled global cache is used even while still empty
+    cache = gemini3d.cache.enable_grid_cache()
+    try:
+        h5read.input_coords(tmp_path / "simgrid.h5")
+        assert len(cache) == 1
+    finally:
+        gemini3d.cache.disable_grid_cache()
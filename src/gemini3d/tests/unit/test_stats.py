@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from pytest import approx
+
+import gemini3d.read as read
+import gemini3d.stats as stats
+from gemini3d.utils import to_datetime
+
+from .conftest import T0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_summarize(sim_dir, workers):
+    ref = read.series(sim_dir, var={"ne", "J1"}).load()
+
+    dat = stats.summarize(
+        sim_dir, var={"ne", "J1"}, stats=stats.STATS, q=(0.0, 0.5, 1.0), workers=workers
+    )
+
+    for k in ("ne", "J1"):
+        x = ref[k].values
+        assert dat[f"{k}_mean"].values == approx(x.mean(axis=0), rel=1e-6)
+        assert dat[f"{k}_std"].values == approx(x.std(axis=0), rel=1e-4)
+        assert dat[f"{k}_min"].values == approx(x.min(axis=0))
+        assert dat[f"{k}_max"].values == approx(x.max(axis=0))
+        assert dat[f"{k}_quantile"].sel(quantile=1.0).values == approx(x.max(axis=0), rel=0.02)
+        assert dat[f"{k}_quantile"].sel(quantile=0.0).values == approx(x.min(axis=0), rel=0.02)
+
+    # the synthetic frames increase with time
+    assert (dat["ne_time_max"] == np.datetime64(ref.time[-1].values)).all()
+    assert to_datetime(dat["ne_time_min"][0, 0, 0]) == T0
+
+
+def test_summarize_column(sim_dir):
+    ref = read.series(sim_dir, var="Te").load()
+
+    dat = stats.summarize(sim_dir, var="Te", stats={"max"}, column="max")
+
+    assert set(dat.data_vars) == {"Te_max", "Te_time_max"}
+    assert dat["Te_max"].dims == ("x2", "x3")
+    assert dat["Te_max"].values == approx(ref["Te"].max(dim=("time", "x1")).values)
+
+
+def test_summarize_default(sim_dir):
+    dat = stats.summarize(sim_dir, var="ne")
+
+    assert set(dat.data_vars) == {
+        "ne_mean",
+        "ne_std",
+        "ne_min",
+        "ne_max",
+        "ne_time_min",
+        "ne_time_max",
+    }
+    assert "quantile" not in dat.coords
+
+
+def test_quantile_sketch():
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(0, 3, size=(2000, 3)) * np.array([1, -1, 1])
+    x[:100, 2] = 0
+
+    a = stats.Quantiles((0.1, 0.5, 0.9), rel_accuracy=0.01, max_bins=2048)
+    b = stats.Quantiles((0.1, 0.5, 0.9), rel_accuracy=0.01, max_bins=2048)
+    for i, row in enumerate(x):
+        (a if i < 1000 else b).update(row)
+    a.merge(b)
+
+    q = a.result()["quantile"]
+    for j, p in enumerate((0.1, 0.5, 0.9)):
+        assert q[j] == approx(np.quantile(x, p, axis=0, method="lower"), rel=0.021)
@@ -57,6 +57,59 @@ def test_grid1d():
     )
 
 
+def _march(x: float, xmax: float, step) -> np.ndarray:
+    """reference: one point at a time"""
+
+    xs = [x]
+    while xs[-1] < xmax:
+        xs.append(xs[-1] + step(xs[-1]))
+
+    return np.array(xs)
+
+
+def test_non_uniform1d_batch(monkeypatch):
+    # several blocks, and a transition much shorter than a block
+    monkeypatch.setattr(grid, "BLOCK", 64)
+    parms = [[200, 0.5, 9.5, 10], [1e4, 1.0, 20.0, 50.0], [1e3, 2.0, 5.0, 1e3]]
+    xmax = [50.0, 3e4, 1e4]
+
+    x = grid.non_uniform1d_batch(xmax, parms)
+
+    for xm, (degdist, dx0, dxincr, ell), xb in zip(xmax, parms, x):
+        ref = _march(
+            dx0 / 2, xm, lambda v: dx0 + dxincr * (0.5 + 0.5 * math.tanh((v - xm + degdist) / ell))
+        )
+        assert xb[ref.size :] == approx(ref, rel=1e-12)
+        assert np.array_equal(grid.non_uniform1d(xm, [degdist, dx0, dxincr, ell]), xb)
+
+
+def test_non_uniform1d_large():
+    # tanh rounding differences accumulate along a long grid
+    xmax, degdist, dx0, dxincr, ell = 2e5, 1e5, 10.0, 5.0, 2e4
+
+    x = grid.non_uniform1d(xmax, [degdist, dx0, dxincr, ell])
+
+    ref = _march(
+        dx0 / 2, xmax, lambda v: dx0 + dxincr * (0.5 + 0.5 * math.tanh((v - xmax + degdist) / ell))
+    )
+    assert x.size == 2 * ref.size > 30000
+    assert x[ref.size :] == approx(ref, rel=1e-12)
+
+
+def test_altitude_grid_batch():
+    d = [[10e3, 8e3, 500e3, 150e3], [100, 50, 500e3, 150e3]]
+
+    z = grid.altitude_grid_batch(80e3, 1000e3, [90, 70], d)
+
+    for (d0, d1, d2, d3), incl, zb in zip(d, [90, 70], z):
+        ref = _march(80e3, 1000e3, lambda a: d0 + d1 * math.tanh((a - d2) / d3))
+        assert zb[2:-2] == approx(ref / math.sin(math.radians(incl)), rel=1e-12)
+        assert zb.size == ref.size + 4
+
+    with pytest.raises(ValueError):
+        grid.altitude_grid_batch(80e3, 1000e3, 90, [[-10, 1, 0, 1]])
+
+
 @pytest.mark.parametrize(
     "size,N,M",
     [
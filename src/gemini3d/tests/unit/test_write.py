@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+import h5py
+import numpy as np
+import pytest
+import xarray
+
+import gemini3d.mpi
+import gemini3d.write as write
+import gemini3d.hdf5.write as h5write
+
+from gemini3d import LSP
+
+from .conftest import T0, DTOUT
+
+NT = 5
+
+
+def _frames(kind: str) -> xarray.Dataset:
+    time = [T0 + timedelta(seconds=i * DTOUT) for i in range(NT)]
+    mlon = np.linspace(-10, 10, 7)
+    mlat = np.linspace(60, 70, 5)
+    rng = np.random.default_rng(0)
+
+    dat = xarray.Dataset(coords={"time": time, "mlon": mlon, "mlat": mlat})
+    if kind == "precip":
+        for k in ("Q", "E0"):
+            dat[k] = (("time", "mlon", "mlat"), rng.random((NT, mlon.size, mlat.size)))
+        return dat
+
+    dat["flagdirich"] = ("time", np.arange(NT) % 2)
+    for k in ("Exit", "Eyit", "Vminx1it", "Vmaxx1it"):
+        dat[k] = (("time", "mlon", "mlat"), rng.random((NT, mlon.size, mlat.size)))
+    for k in ("Vminx2ist", "Vmaxx2ist"):
+        dat[k] = (("time", "mlat"), rng.random((NT, mlat.size)))
+    for k in ("Vminx3ist", "Vmaxx3ist"):
+        dat[k] = (("time", "mlon"), rng.random((NT, mlon.size)))
+
+    return dat
+
+
+@pytest.mark.parametrize("kind", ["Efield", "precip"])
+def test_frames_parallel(tmp_path, monkeypatch, kind):
+    dat = _frames(kind)
+    writer = getattr(write, kind)
+
+    # serial by default, without worker pools
+    with monkeypatch.context() as m:
+        m.setattr(h5write, "ProcessPoolExecutor", None)
+        m.setattr(h5write, "ThreadPoolExecutor", None)
+        writer(dat, tmp_path / "serial")
+    writer(dat, tmp_path / "processes", workers=3)
+    writer(dat, tmp_path / "threads", workers=3, processes=False)
+
+    files = sorted(f.name for f in (tmp_path / "serial").iterdir())
+    assert len(files) == NT + 2
+    # output is byte-identical whatever the workers
+    for d in ("processes", "threads"):
+        assert sorted(f.name for f in (tmp_path / d).iterdir()) == files
+        for name in files:
+            assert (tmp_path / d / name).read_bytes() == (tmp_path / "serial" / name).read_bytes()
+
+
+@pytest.mark.parametrize("shape", [(37, 50, 21), (3, 300, 301), (1000,)])
+def test_direct_chunks(tmp_path, monkeypatch, shape):
+    A = np.random.default_rng(0).random(shape) * 1e3
+
+    fn = tmp_path / "a.h5"
+    with h5py.File(fn, "w") as f:
+        h5write._create_dataset(f, "/libhdf5", A)
+        monkeypatch.setattr(h5write, "DIRECT_BYTES", 0)
+        h5write._create_dataset(f, "/direct", A)
+
+    with h5py.File(fn, "r") as f:
+        ref = f["/libhdf5"]
+        new = f["/direct"]
+        assert new.chunks == ref.chunks
+        assert new.compression == "gzip"
+        assert new.shuffle and new.fletcher32
+        # reading verifies the checksums
+        assert np.array_equal(new[()], A.astype(np.float32))
+        # the first chunk is always full size
+        origin = (0,) * A.ndim
+        assert new.id.read_direct_chunk(origin) == ref.id.read_direct_chunk(origin)
+
+
+def test_compression_profiles(tmp_path):
+    A = np.tile(np.linspace(0, 1, 200), (100, 1))
+
+    fn = tmp_path / "a.h5"
+    with h5py.File(fn, "w") as f:
+        for p in h5write.PROFILES:
+            h5write._create_dataset(f, p, A, compression=p)
+
+    with h5py.File(fn, "r") as f:
+        assert f["fast"].compression is None
+        assert f["balanced"].compression_opts == h5write.CLVL
+        assert f["archive"].compression_opts == 9
+        for p in h5write.PROFILES:
+            assert np.array_equal(f[p][()], A.astype(np.float32))
+
+    with pytest.raises(ValueError):
+        h5write.filters("nonsense")
+    with pytest.raises(ValueError):
+        h5write.filters({"compression": "lzf"})
+
+
+def test_calibrate():
+    A = np.tile(np.linspace(0, 1, 200), (100, 1))
+
+    # uncompressed output does not meet this ratio
+    best = h5write.calibrate(A, ratio=0.5, candidates=["fast", "balanced"])
+    assert best == h5write.PROFILES["balanced"]
+
+    # smallest output if no candidate meets ratio
+    best = h5write.calibrate(A, ratio=0.0, candidates=["fast", "archive"])
+    assert best == h5write.PROFILES["archive"]
+
+
+@pytest.mark.parametrize("lx, cpu", [((64, 48, 40), 12), ((30, 90, 1), 9), ((20, 1, 35), 5)])
+def test_chunk_layout_mpi(monkeypatch, lx, cpu):
+    monkeypatch.setattr(h5write, "CHUNK_BYTES", 4 * 2000)
+
+    lid2, lid3 = gemini3d.mpi.partition(lx, cpu)
+    c1, c2, c3 = h5write.chunk_layout(lx, "mpi", max_cpu=cpu)
+
+    assert 4 * c1 * c2 * c3 <= h5write.CHUNK_BYTES
+    # each MPI image tile is a whole number of chunks
+    assert (lx[1] // lid2) % c2 == 0
+    assert (lx[2] // lid3) % c3 == 0
+
+
+def test_chunk_layout_prime(monkeypatch):
+    monkeypatch.setattr(h5write, "CHUNK_BYTES", 4 * 2000)
+
+    # a prime tile extent is kept whole rather than cut to 1-wide chunks
+    assert h5write.chunk_layout((64, 97, 1), "mpi", max_cpu=1) == (16, 97, 1)
+    # extents do not fall below MIN_CHUNK
+    assert min(h5write.chunk_layout((64, 96, 96), "mpi", max_cpu=1)[1:]) >= h5write.MIN_CHUNK
+
+    # the layout does not depend on the CPU count of this computer unless asked
+    monkeypatch.setattr(gemini3d.mpi, "get_cpu_count", lambda: 7)
+    assert h5write.chunk_layout((64, 14, 14)) is None
+    c = h5write.chunk_layout((64, 14, 14), "mpi", max_cpu=4)
+    monkeypatch.setattr(gemini3d.mpi, "get_cpu_count", lambda: 4)
+    assert h5write.chunk_layout((64, 14, 14), "mpi", max_cpu=4) == c
+
+
+def test_state_layout(tmp_path):
+    lx = (20, 8, 6)
+    dat = xarray.Dataset(
+        {
+            "ns": (("species", "x1", "x2", "x3"), np.ones((LSP, *lx))),
+            "Phitop": (("x2", "x3"), np.zeros(lx[1:])),
+        },
+        attrs={"time": T0},
+    )
+
+    h5write.state(tmp_path / "x1.h5", dat, layout="x1")
+    h5write.state(tmp_path / "tile.h5", dat, layout=(5, 4, 3))
+
+    with h5py.File(tmp_path / "x1.h5", "r") as f:
+        assert f["nsall"].chunks == (LSP, 6, 8, 20)
+    with h5py.File(tmp_path / "tile.h5", "r") as f:
+        assert f["nsall"].chunks == (LSP, 3, 4, 5)
+        assert f["Phiall"].chunks == (3, 4)
@@ -11,7 +11,14 @@ from .utils import git_meta
 from .hdf5 import write as h5write
 
 
-def state(out_file: Path, dat: xarray.Dataset, **kwargs):
+def state(
+    out_file: Path,
+    dat: xarray.Dataset,
+    *,
+    compression: str | dict[str, T.Any] | None = None,
+    layout: str | tuple[int, int, int] | None = None,
+    **kwargs,
+):
     """
     WRITE STATE VARIABLE DATA.
     NOTE: WE don't write ANY OF THE ELECTRODYNAMIC
@@ -20,6 +27,9 @@ def state(out_file: Path, dat: xarray.Dataset, **kwargs):
 
     INPUT ARRAYS SHOULD BE TRIMMED TO THE CORRECT SIZE
     I.E. THEY SHOULD NOT INCLUDE GHOST CELLS
+
+    compression: see gemini3d.hdf5.write.filters
+    layout: see gemini3d.hdf5.write.chunk_layout
     """
 
     # %% allow overriding "dat"
@@ -33,19 +43,23 @@ def state(out_file: Path, dat: xarray.Dataset, **kwargs):
     if "Phitop" in kwargs:
         dat["Phitop"] = (("x2", "x3"), kwargs["Phitop"])
 
-    h5write.state(out_file, dat)
+    h5write.state(out_file, dat, compression=compression, layout=layout)
 
 
-def grid(cfg: dict[str, T.Any], xg: dict[str, T.Any]):
+def grid(
+    cfg: dict[str, T.Any], xg: dict[str, T.Any], *, layout: str | tuple[int, int, int] | None = None
+):
     """writes grid to disk
 
     Parameters
     ----------
 
     cfg: dict
-        simulation parameters
+        simulation parameters, including optional "compression" profile
     xg: dict
         grid values
+    layout: str or tuple of int, optional
+        chunk layout, see gemini3d.hdf5.write.chunk_layout
     """
 
     input_dir = cfg["indat_size"].parent
@@ -54,12 +68,25 @@ def grid(cfg: dict[str, T.Any], xg: dict[str, T.Any]):
 
     input_dir.mkdir(parents=True, exist_ok=True)
 
-    h5write.grid(cfg["indat_size"], cfg["indat_grid"], xg)
+    # replace rather than truncate: the files may be links into the grid store
+    for k in ("indat_size", "indat_grid"):
+        try:
+            cfg[k].unlink()
+        except FileNotFoundError:
+            pass
+
+    h5write.grid(
+        cfg["indat_size"],
+        cfg["indat_grid"],
+        xg,
+        compression=cfg.get("compression"),
+        layout=layout,
+    )
 
     meta(input_dir / "setup_grid.json", git_meta(), cfg)
 
 
-def Efield(E: xarray.Dataset, outdir: Path):
+def Efield(E: xarray.Dataset, outdir: Path, **kwargs):
     """writes E-field to disk
 
     Parameters
@@ -69,15 +96,17 @@ def Efield(E: xarray.Dataset, outdir: Path):
         E-field values
     outdir: pathlib.Path
         directory to write files into
+    kwargs:
+        workers, processes, compression: see gemini3d.hdf5.write.Efield
     """
 
     print("write E-field data to", outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    h5write.Efield(outdir, E)
+    h5write.Efield(outdir, E, **kwargs)
 
 
-def precip(precip: xarray.Dataset, outdir: Path):
+def precip(precip: xarray.Dataset, outdir: Path, **kwargs):
     """writes precipitation to disk
 
     Parameters
@@ -86,12 +115,14 @@ def precip(precip: xarray.Dataset, outdir: Path):
         preicipitation values
     outdir: pathlib.Path
         directory to write files into
+    kwargs:
+        workers, processes, compression: see gemini3d.hdf5.write.precip
     """
 
     print("write precipitation data to", outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    h5write.precip(outdir, precip)
+    h5write.precip(outdir, precip, **kwargs)
 
 
 def meta(fn: Path, git_meta: dict[str, str], cfg: dict[str, T.Any]):